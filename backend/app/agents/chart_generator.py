@@ -1,15 +1,23 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
+from app import config
 from app.models import Task
+from app.utils.task_table import TaskTable
+from app.utils.analysis_context import AnalysisContext
+from app.utils.chart_data import gantt_dataset, histogram, top_resources
+from app.utils.evm import EarnedValue
+import numpy as np
 import pandas as pd
 
 class ChartGenerator:
-    def generate_charts(self, tasks: List[Task], resource_analysis: Dict[str, Any], risk_analysis: Dict[str, Any]) -> Dict[str, Any]:
-        # Convert to simple list of dicts for frontend consumption
+    def generate_charts(self, tasks: Union[AnalysisContext, TaskTable, List[Task]], resource_analysis: Dict[str, Any], risk_analysis: Dict[str, Any]) -> Dict[str, Any]:
         # Streamlit can handle lists of dicts or pandas DataFrames directly, 
         # but this agent can pre-calculate some aggregations.
-        
-        task_data = [t.dict() for t in tasks]
-        df = pd.DataFrame(task_data)
+        context = AnalysisContext.coerce(tasks)
+        table = context.table
+        df = pd.DataFrame({
+            "duration": table.duration,
+            "percent_complete": table.percent_complete
+        })
         
         # 1. Cumulative Progress
         # Simple average progress? Or weighted by duration?
@@ -20,17 +28,39 @@ class ChartGenerator:
         else:
             weighted_progress = 0
 
-        # 2. Tasks per Resource
-        # Flatten resource list
-        all_resources = []
-        for t in tasks:
-            all_resources.extend(t.resource_names)
-        
-        res_counts = pd.Series(all_resources).value_counts().to_dict()
+        # 2. Tasks per Resource, most assigned first (ties in resource order)
+        counts = context.resource_task_counts.tolist()
+        names = context.resource_names
+        res_counts = {names[r]: counts[r] for r in np.argsort(-context.resource_task_counts, kind="stable").tolist() if counts[r] > 0}
 
         return {
             "agent": "Chart Generator",
             "summary": "Prepared visualization data.",
             "weighted_progress": weighted_progress,
-            "resource_distribution": res_counts
+            "resource_distribution": res_counts,
+            "evm": self._evm(context.earned_value),
+            # Pre-aggregated datasets, small whatever the schedule size
+            "gantt": gantt_dataset(table, config.GANTT_MAX_BARS),
+            "duration_histogram": histogram(table.duration[~table.summary]),
+            "resource_bars": top_resources(res_counts)
+        }
+
+    def _evm(self, evm: Optional[EarnedValue]) -> Optional[Dict[str, Any]]:
+        """Earned value S-curves as plain arrays; earned_value, spi and sv stop at the status date."""
+        if evm is None:
+            return None
+        spi = np.round(evm.spi, 3)
+        return {
+            "period": evm.period,
+            "status_date": np.datetime_as_string(evm.status_date, unit="s").item(),
+            "dates": np.datetime_as_string(evm.dates, unit="D").tolist(),
+            "planned_value": np.round(evm.planned, 2).tolist(),
+            "earned_value": np.round(evm.earned, 2).tolist(),
+            "spi": [None if np.isnan(x) else x for x in spi.tolist()],
+            "sv": np.round(evm.sv, 2).tolist(),
+            "budget_at_completion": round(evm.budget, 2),
+            "planned_value_to_date": round(evm.planned_to_date, 2),
+            "earned_value_to_date": round(evm.earned_to_date, 2),
+            "spi_to_date": None if evm.spi_to_date is None else round(evm.spi_to_date, 3),
+            "sv_to_date": round(evm.sv_to_date, 2)
         }
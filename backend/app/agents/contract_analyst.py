@@ -1,9 +1,22 @@
-from typing import List, Dict, Any
-from app.models import Task, ContractActivity, ProductivityMetric, ContractComparison
-from datetime import datetime
-import re
-import pdfplumber
-from docx import Document
+from typing import List, Dict, Any, Union, Callable, Optional
+from app.models import Task, ContractActivity, ProductivityMetric, ContractComparison, ActivityMatch
+from app.utils.task_table import TaskTable
+from app.utils.analysis_context import AnalysisContext
+from app.utils.messages import render
+from app.utils.matching import match_containment, fuzzy_match, FUZZY_THRESHOLD
+from app.utils.disk_cache import contract_cache
+from app.utils.pdf_pages import iter_page_texts
+from app.utils.clauses import ClauseExtractor
+from app.utils.docx_text import iter_docx_text
+import hashlib
+import numpy as np
+
+# Part of the contract cache key; bump it whenever extraction output changes
+EXTRACTION_VERSION = 3
+
+# DOCX lines handed to the clause extractor at a time
+DOCX_FEED_LINES = 256
+
 
 class ContractAnalyst:
     """
@@ -11,43 +24,61 @@ class ContractAnalyst:
     Identifies delayed activities, missing tasks, and calculates productivity metrics.
     """
     
-    def parse_contract_pdf(self, pdf_content: bytes) -> Dict[str, Any]:
-        """Extract structured data from PDF contract."""
+    def parse_contract(self, content: bytes, filename: str,
+                       on_page: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Extract structured data from a PDF or DOCX contract, reusing the
+        on-disk result of an earlier extraction of the same file.
+        """
+        kind = "pdf" if filename.endswith('.pdf') else "docx"
+        key = f"{hashlib.sha256(content).hexdigest()}-{kind}-v{EXTRACTION_VERSION}"
+        contract_data = contract_cache.get(key)
+        if contract_data is not None:
+            return contract_data
+
+        if kind == "pdf":
+            contract_data = self.parse_contract_pdf(content, on_page)
+        else:
+            contract_data = self.parse_contract_docx(content)
+        # Failed extractions are retried next time
+        if "error" not in contract_data:
+            contract_cache.put(key, contract_data)
+        return contract_data
+    
+    def parse_contract_pdf(self, pdf_content: bytes,
+                           on_page: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Extract structured data from PDF contract.
+        Pages are extracted in parallel ranges (see iter_page_texts) and the
+        clauses are matched page by page as the text arrives, with the same
+        results as matching the whole text at once.
+        on_page(pages_done, pages_total) is called as pages finish extracting.
+        """
         contract_data = {
             "activities": [],
             "raw_text": ""
         }
         
         try:
-            import io
-            pdf_file = io.BytesIO(pdf_content)
+            # Activity, deadline, deliverable and resource clauses (pt/es/en)
+            # are picked up page by page as the text arrives
+            extractor = ClauseExtractor()
             
-            with pdfplumber.open(pdf_file) as pdf:
-                full_text = ""
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        full_text += text + "\n"
-                
-                contract_data["raw_text"] = full_text
-                
-                # Extract activities using pattern matching
-                # Look for common patterns like:
-                # - "Activity: <name>" or "Task: <name>"
-                # - "Deadline: <date>" or "Due date: <date>"
-                # - "Deliverable: <item>"
-                
-                activity_pattern = r'(?:Activity|Task|Item)\s*[:\-]\s*([^\n]+)'
-                deadline_pattern = r'(?:Deadline|Due\s*date|Completion\s*date)\s*[:\-]\s*([^\n]+)'
-                deliverable_pattern = r'(?:Deliverable|Output)\s*[:\-]\s*([^\n]+)'
-                
-                activities = re.findall(activity_pattern, full_text, re.IGNORECASE)
-                deadlines = re.findall(deadline_pattern, full_text, re.IGNORECASE)
-                deliverables = re.findall(deliverable_pattern, full_text, re.IGNORECASE)
-                
-                contract_data["activities"] = activities
-                contract_data["deadlines"] = deadlines
-                contract_data["deliverables"] = deliverables
+            pages = []
+            # Where each page's text starts in raw_text
+            page_offsets = []
+            length = 0
+            for text in iter_page_texts(pdf_content, on_page):
+                page_offsets.append(length)
+                if text:
+                    pages.append(text + "\n")
+                    length += len(pages[-1])
+                    extractor.feed(pages[-1])
+            
+            contract_data["raw_text"] = "".join(pages)
+            contract_data["pages"] = len(page_offsets)
+            contract_data["page_offsets"] = page_offsets
+            contract_data.update(extractor.close())
                 
         except Exception as e:
             contract_data["error"] = str(e)
@@ -55,115 +86,100 @@ class ContractAnalyst:
         return contract_data
     
     def parse_contract_docx(self, docx_content: bytes) -> Dict[str, Any]:
-        """Extract structured data from DOCX contract."""
+        """
+        Extract structured data from DOCX contract.
+        Paragraphs and table rows are streamed from word/document.xml (see
+        iter_docx_text) and fed to the clause extractor as they are read.
+        """
         contract_data = {
             "activities": [],
             "raw_text": ""
         }
         
         try:
-            import io
-            docx_file = io.BytesIO(docx_content)
-            doc = Document(docx_file)
-            
-            full_text = ""
-            for paragraph in doc.paragraphs:
-                full_text += paragraph.text + "\n"
-            
-            contract_data["raw_text"] = full_text
-            
-            # Same pattern matching as PDF
-            activity_pattern = r'(?:Activity|Task|Item)\s*[:\-]\s*([^\n]+)'
-            deadline_pattern = r'(?:Deadline|Due\s*date|Completion\s*date)\s*[:\-]\s*([^\n]+)'
-            deliverable_pattern = r'(?:Deliverable|Output)\s*[:\-]\s*([^\n]+)'
-            
-            activities = re.findall(activity_pattern, full_text, re.IGNORECASE)
-            deadlines = re.findall(deadline_pattern, full_text, re.IGNORECASE)
-            deliverables = re.findall(deliverable_pattern, full_text, re.IGNORECASE)
+            # Same clause extraction as PDF
+            extractor = ClauseExtractor()
+            lines = []
+            # Lines not yet fed; fed in batches, per-call overhead adds up per line
+            pending = 0
+            for text in iter_docx_text(docx_content):
+                lines.append(text + "\n")
+                pending += 1
+                if pending == DOCX_FEED_LINES:
+                    extractor.feed("".join(lines[-pending:]))
+                    pending = 0
+            if pending:
+                extractor.feed("".join(lines[-pending:]))
             
-            contract_data["activities"] = activities
-            contract_data["deadlines"] = deadlines
-            contract_data["deliverables"] = deliverables
+            contract_data["raw_text"] = "".join(lines)
+            contract_data.update(extractor.close())
             
         except Exception as e:
             contract_data["error"] = str(e)
         
         return contract_data
     
-    def compare_with_schedule(self, contract_data: Dict, tasks: List[Task], language: str = "en") -> ContractComparison:
+    def compare_with_schedule(self, contract_data: Dict, tasks: Union[AnalysisContext, TaskTable, List[Task]], language: str = "en",
+                              match_mode: str = "substring") -> ContractComparison:
         """
         Compare contract activities with schedule tasks.
         Returns comprehensive comparison analysis.
+
+        match_mode "substring" pairs an activity and a task when either name
+        contains the other. "fuzzy" also accepts pairs whose character
+        n-gram TF-IDF similarity reaches FUZZY_THRESHOLD, and lists each
+        activity's best such task in matched_activities.
         """
-        now = datetime.now()
-        
-        # Localization dictionary
-        translations = {
-            "pt": {
-                "add_missing": "Adicionar {} atividades faltantes ao cronograma para cumprir os requisitos do contrato.",
-                "expedite_delayed": "Acelerar {} atividades atrasadas para cumprir os prazos.",
-                "review_resources": "Revisar alocação de recursos para recursos com baixo desempenho.",
-                "low_compliance": "Conformidade do cronograma está abaixo do limite aceitável. Ação imediata necessária.",
-                "summary": "Analisadas {} tarefas do cronograma contra {} atividades do contrato. Encontradas {} tarefas atrasadas e {} atividades faltantes. Conformidade geral: {:.1f}%"
-            },
-            "es": {
-                "add_missing": "Agregar {} actividades faltantes al cronograma para cumplir con los requisitos del contrato.",
-                "expedite_delayed": "Acelerar {} actividades retrasadas para cumplir con los plazos.",
-                "review_resources": "Revisar asignación de recursos para recursos con bajo rendimiento.",
-                "low_compliance": "El cumplimiento del cronograma está por debajo del umbral aceptable. Se requiere acción inmediata.",
-                "summary": "Analizadas {} tareas del cronograma contra {} actividades del contrato. Encontradas {} tareas retrasadas y {} actividades faltantes. Cumplimiento general: {:.1f}%"
-            },
-            "en": {
-                "add_missing": "Add {} missing activities to the schedule to comply with contract requirements.",
-                "expedite_delayed": "Expedite {} delayed activities to meet deadlines.",
-                "review_resources": "Review resource allocation for underperforming resources.",
-                "low_compliance": "Schedule compliance is below acceptable threshold. Immediate action required.",
-                "summary": "Analyzed {} schedule tasks against {} contract activities. Found {} delayed tasks and {} missing activities. Overall compliance: {:.1f}%"
-            }
-        }
-        
-        t = translations.get(language, translations["en"])
+        context = AnalysisContext.coerce(tasks)
+        table = context.table
         
         # Extract task names from schedule
-        schedule_task_names = [task.name.lower() for task in tasks]
+        schedule_task_names = [name.lower() for name in table.names]
         contract_activities = [act.lower() for act in contract_data.get("activities", [])]
         
+        # Match in both directions at once: a contract activity and a task
+        # match when either name contains the other
+        activity_found, task_found = match_containment(contract_activities, schedule_task_names)
+
+        matched_activities = []
+        if match_mode == "fuzzy":
+            fuzzy = fuzzy_match(contract_activities, schedule_task_names)
+            for i, (j, score) in enumerate(zip(fuzzy.best_right.tolist(), fuzzy.best_score.tolist())):
+                if j >= 0:
+                    activity_found[i] = True
+                    matched_activities.append(ActivityMatch(
+                        activity=contract_activities[i],
+                        task_id=table.ids[j],
+                        task_name=table.names[j],
+                        score=round(score, 3)
+                    ))
+            for j in np.flatnonzero(fuzzy.best_score_right >= FUZZY_THRESHOLD).tolist():
+                task_found[j] = True
+
         # Find missing activities (in contract but not in schedule)
-        missing_activities = []
-        for contract_activity in contract_activities:
-            # Use fuzzy matching - check if any schedule task contains the contract activity
-            found = any(contract_activity in task_name or task_name in contract_activity 
-                       for task_name in schedule_task_names)
-            if not found:
-                missing_activities.append(contract_activity)
+        missing_activities = [act for act, found in zip(contract_activities, activity_found) if not found]
         
         # Find extra activities (in schedule but not mentioned in contract)
         extra_activities = []
-        for task in tasks:
-            task_name_lower = task.name.lower()
-            found = any(act in task_name_lower or task_name_lower in act 
-                       for act in contract_activities)
-            if not found and len(contract_activities) > 0:  # Only if we have contract data
-                extra_activities.append(task.name)
+        if len(contract_activities) > 0:  # Only if we have contract data
+            extra_activities = [name for name, found in zip(table.names, task_found) if not found]
         
         # Find delayed activities
         delayed_activities = []
-        for task in tasks:
-            if task.finish_date and task.finish_date < now and task.percent_complete < 100:
-                days_delayed = (now - task.finish_date).days
-                delayed_activities.append({
-                    "name": task.name,
-                    "finish_date": task.finish_date.isoformat(),
-                    "percent_complete": task.percent_complete,
-                    "days_delayed": days_delayed,
-                    "resources": task.resource_names
-                })
+        for i, days in zip(context.overdue.tolist(), context.days_overdue):
+            delayed_activities.append({
+                "name": table.names[i],
+                "finish_date": table.finish[i].item().isoformat(),
+                "percent_complete": int(table.percent_complete[i]),
+                "days_delayed": days,
+                "resources": table.task_resources(i)
+            })
         
         # Calculate productivity metrics by resource
-        productivity_metrics = self.calculate_productivity_metrics(tasks)
+        productivity_metrics = self.calculate_productivity_metrics(context)
         
         # Calculate compliance score (0-100)
-        total_metrics = len(contract_activities) + len(tasks)
+        total_metrics = len(contract_activities) + len(table)
         if total_metrics > 0:
             issues = len(missing_activities) + len(delayed_activities)
             compliance_score = max(0, 100 - (issues / total_metrics * 100))
@@ -173,16 +189,17 @@ class ContractAnalyst:
         # Generate recommendations
         recommendations = []
         if missing_activities:
-            recommendations.append(t["add_missing"].format(len(missing_activities)))
+            recommendations.append(render("contract.add_missing", language, len(missing_activities)))
         if delayed_activities:
-            recommendations.append(t["expedite_delayed"].format(len(delayed_activities)))
+            recommendations.append(render("contract.expedite_delayed", language, len(delayed_activities)))
         if any(metric.productivity_index < 0.5 for metric in productivity_metrics):
-            recommendations.append(t["review_resources"])
+            recommendations.append(render("contract.review_resources", language))
         if compliance_score < 80:
-            recommendations.append(t["low_compliance"])
+            recommendations.append(render("contract.low_compliance", language))
         
-        summary = t["summary"].format(
-            len(tasks), len(contract_activities), len(delayed_activities), len(missing_activities), compliance_score
+        summary = render(
+            "contract.summary", language,
+            len(table), len(contract_activities), len(delayed_activities), len(missing_activities), compliance_score
         )
         
         return ContractComparison(
@@ -192,32 +209,32 @@ class ContractAnalyst:
             extra_activities=extra_activities[:10],  # Limit to top 10
             productivity_metrics=productivity_metrics,
             compliance_score=compliance_score,
-            recommendations=recommendations
+            recommendations=recommendations,
+            matched_activities=matched_activities
         )
     
-    def calculate_productivity_metrics(self, tasks: List[Task]) -> List[ProductivityMetric]:
+    def calculate_productivity_metrics(self, tasks: Union[AnalysisContext, TaskTable, List[Task]]) -> List[ProductivityMetric]:
         """Calculate productivity indices for each resource."""
-        resource_stats = {}
-        
-        for task in tasks:
-            for resource in task.resource_names:
-                if resource not in resource_stats:
-                    resource_stats[resource] = {
-                        "assigned_tasks": 0,
-                        "completed_tasks": 0,
-                        "total_duration": 0.0,
-                        "completed_duration": 0.0
-                    }
-                
-                resource_stats[resource]["assigned_tasks"] += 1
-                resource_stats[resource]["total_duration"] += task.duration
-                
-                if task.percent_complete == 100:
-                    resource_stats[resource]["completed_tasks"] += 1
-                    resource_stats[resource]["completed_duration"] += task.duration
-                elif task.percent_complete > 0:
-                    # Partial completion
-                    resource_stats[resource]["completed_duration"] += task.duration * (task.percent_complete / 100)
+        context = AnalysisContext.coerce(tasks)
+        
+        # Per-resource aggregates shared with the other agents; partial
+        # completion counts proportionally
+        columns = zip(
+            context.resource_names,
+            context.resource_task_counts.tolist(),
+            context.resource_completed_tasks.tolist(),
+            context.resource_hours.tolist(),
+            context.resource_earned_hours.tolist()
+        )
+        resource_stats = {
+            name: {
+                "assigned_tasks": assigned,
+                "completed_tasks": completed,
+                "total_duration": total,
+                "completed_duration": completed_duration
+            }
+            for name, assigned, completed, total, completed_duration in columns
+        }
         
         # Convert to ProductivityMetric objects
         metrics = []
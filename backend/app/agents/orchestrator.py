@@ -0,0 +1,148 @@
+from typing import Dict, Any, List, Callable, Optional, Union
+from app import config
+from app.agents.schedule_analyst import ScheduleAnalyst
+from app.agents.resource_manager import ResourceManager
+from app.agents.risk_analyst import RiskAnalyst
+from app.agents.chart_generator import ChartGenerator
+from app.agents.text_report_generator import TextReportGenerator
+from app.agents.contract_analyst import ContractAnalyst
+from app.utils.pipeline import Pipeline, Stage
+from app.utils.task_table import TaskTable
+from app.utils.analysis_context import AnalysisContext
+
+REPORT_LANGUAGES = ["pt", "en", "es"]
+
+# Analysis inputs the text reports read
+STANDARD_ANALYSES = ["schedule_analysis", "resource_analysis", "risk_analysis"]
+CONTRACT_ANALYSES = STANDARD_ANALYSES + ["contract_analysis"]
+
+# How contract activities are paired with schedule tasks
+MATCH_MODES = ["substring", "fuzzy"]
+
+
+def _agent_stages(tasks: AnalysisContext, language: str) -> List[Stage]:
+    """
+    Agent dependencies: Schedule and Resource are independent, Risk needs
+    Resource, and Chart needs Resource and Risk. All of them read the same
+    context, so values several agents derive are computed once.
+    """
+    return [
+        Stage("schedule_analysis", lambda: ScheduleAnalyst().analyze(tasks, language)),
+        Stage("resource_analysis", lambda: ResourceManager().analyze(tasks, language)),
+        Stage(
+            "risk_analysis",
+            lambda resource_analysis: RiskAnalyst().analyze(tasks, resource_analysis, language),
+            ["resource_analysis"]
+        ),
+        Stage(
+            "chart_data",
+            lambda resource_analysis, risk_analysis: ChartGenerator().generate_charts(tasks, resource_analysis, risk_analysis),
+            ["resource_analysis", "risk_analysis"]
+        ),
+    ]
+
+
+def _report_stages(tasks: AnalysisContext, inputs: List[str], languages: List[str]) -> List[Stage]:
+    """One text report stage per requested language, each reading every analysis in `inputs`."""
+    def report(lang):
+        return lambda **analysis: render_report(tasks, analysis, lang)
+    return [Stage(f"report_{lang}", report(lang), inputs) for lang in languages]
+
+
+def render_report(tasks: Union[AnalysisContext, TaskTable], analysis: Dict[str, Any], language: str) -> str:
+    """
+    Text report from finished agent results. Also used to render further
+    languages later from a cached analysis.
+    """
+    return TextReportGenerator().generate_report(tasks, analysis, language)
+
+
+def _timings(timings: Dict[str, float]) -> Dict[str, float]:
+    return {name: round(seconds, 4) for name, seconds in timings.items()}
+
+
+def analyze_schedule(tasks: TaskTable, language: str = "en",
+                     progress: Optional[Callable[..., None]] = None,
+                     languages: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Run every schedule agent plus a text report per entry of `languages`
+    (default: just `language`); independent stages run in parallel.
+    progress(stage, status, **detail) receives the pipeline events.
+    """
+    languages = languages or [language]
+    context = AnalysisContext(tasks)
+    stages = _agent_stages(context, language) + _report_stages(context, STANDARD_ANALYSES, languages)
+    results, timings = Pipeline(stages, config.AGENT_WORKERS, progress).run()
+
+    return {
+        "schedule_analysis": results["schedule_analysis"],
+        "resource_analysis": results["resource_analysis"],
+        "risk_analysis": results["risk_analysis"],
+        "chart_data": results["chart_data"],
+        "text_reports": {lang: results[f"report_{lang}"] for lang in languages},
+        "stage_timings": _timings(timings)
+    }
+
+
+def _contract_stages(tasks: AnalysisContext, contract_content: bytes, contract_filename: str,
+                     language: str, languages: List[str],
+                     progress: Optional[Callable[..., None]] = None,
+                     match_mode: str = "substring") -> List[Stage]:
+    analyst = ContractAnalyst()
+
+    def on_page(pages_done, pages_total):
+        progress("contract_data", "running", pages_done=pages_done, pages_total=pages_total)
+
+    def parse_contract():
+        return analyst.parse_contract(contract_content, contract_filename, on_page if progress else None)
+
+    return _agent_stages(tasks, language) + [
+        Stage("contract_data", parse_contract),
+        Stage(
+            "contract_analysis",
+            lambda contract_data: analyst.compare_with_schedule(contract_data, tasks, language, match_mode).dict(),
+            ["contract_data"]
+        ),
+    ] + _report_stages(tasks, CONTRACT_ANALYSES, languages)
+
+
+def contract_stage_names(languages: List[str]) -> List[str]:
+    """Stage names of analyze_contract, in pipeline order, for progress reporting."""
+    return [stage.name for stage in _contract_stages(None, b"", "", "en", languages)]
+
+
+def analyze_contract(tasks: TaskTable, contract_content: bytes, contract_filename: str,
+                     language: str = "en", progress: Optional[Callable[..., None]] = None,
+                     languages: Optional[List[str]] = None, match_mode: str = "substring") -> Dict[str, Any]:
+    """
+    Contract extraction and comparison run alongside the schedule agents;
+    the text reports (one per entry of `languages`, default `language`)
+    wait for all of them. PDF extraction additionally reports
+    pages_done/pages_total for the contract_data stage. match_mode is
+    passed to ContractAnalyst.compare_with_schedule.
+    """
+    languages = languages or [language]
+    stages = _contract_stages(AnalysisContext(tasks), contract_content, contract_filename, language, languages,
+                              progress, match_mode)
+    results, timings = Pipeline(stages, config.AGENT_WORKERS, progress).run()
+
+    contract_data = results["contract_data"]
+    return {
+        "agent": "Contract Analyst",
+        "comparison": results["contract_analysis"],
+        "contract_data": {
+            "activities_found": len(contract_data.get("activities", [])),
+            "deadlines_found": len(contract_data.get("deadlines", [])),
+            "deliverables_found": len(contract_data.get("deliverables", [])),
+            "resources_found": len(contract_data.get("resources", [])),
+            # Activities with the deadline, deliverable and resource clauses that follow them
+            "activities": contract_data.get("contract_activities", [])
+        },
+        # Include standard analysis results
+        "schedule_analysis": results["schedule_analysis"],
+        "resource_analysis": results["resource_analysis"],
+        "risk_analysis": results["risk_analysis"],
+        "chart_data": results["chart_data"],
+        "text_reports": {lang: results[f"report_{lang}"] for lang in languages},
+        "stage_timings": _timings(timings)
+    }
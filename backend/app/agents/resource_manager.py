@@ -1,39 +1,129 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
+from app import config
 from app.models import Task
+from app.utils.task_table import TaskTable, isoformat
+from app.utils.analysis_context import AnalysisContext
+from app.utils.leveling import level_resources
+from app.utils.loading import BUSINESS_DAYS_PER_WEEK, ResourceLoading, resource_loading
+from app.utils.messages import render_all
+import numpy as np
 
 class ResourceManager:
-    def analyze(self, tasks: List[Task], language: str = "en") -> Dict[str, Any]:
-        resource_counts = {}
-        resource_hours = {}
-        
-        for task in tasks:
-            for res in task.resource_names:
-                # Count tasks per resource
-                resource_counts[res] = resource_counts.get(res, 0) + 1
-                
-                # Estimate hours (Duration is in hours)
-                # If multiple resources, split duration? Or assume full effort?
-                # MS Project is complex, but let's assume full duration for now per resource assignment
-                resource_hours[res] = resource_hours.get(res, 0.0) + task.duration
-
-        # Identify over-allocation (simple heuristic: > 5 tasks or > 40 hours?)
-        # This is just a demo heuristic.
-        overloaded = [r for r, count in resource_counts.items() if count > 5]
-        
-        translations = {
-            "pt": "Analisados {} recursos.",
-            "es": "Analizados {} recursos.",
-            "en": "Analyzed {} resources."
-        }
-        summaries = {}
-        for lang in ["pt", "es", "en"]:
-            summary_tmpl = translations.get(lang)
-            summaries[lang] = summary_tmpl.format(len(resource_counts))
+    def analyze(self, tasks: Union[AnalysisContext, TaskTable, List[Task]], language: str = "en") -> Dict[str, Any]:
+        context = AnalysisContext.coerce(tasks)
+        table = context.table
 
+        # Tasks and hours per resource (Duration is in hours)
+        # If multiple resources, split duration? Or assume full effort?
+        # MS Project is complex, but let's assume full duration for now per resource assignment
+        names = context.resource_names
+        resource_counts = dict(zip(names, context.resource_task_counts.tolist()))
+        resource_hours = dict(zip(names, context.resource_hours.tolist()))
+
+        # Time-phased loading: a resource is over-allocated on the days its
+        # concurrent assignments exceed the daily capacity
+        loading = resource_loading(table)
+        overallocations = self._overallocations(loading, names)
+        overloaded = [name for name in names if name in overallocations]
+        
         return {
             "agent": "Resource Manager",
-            "summary": summaries,
+            "summary": render_all("resource.summary", len(resource_counts)),
             "utilization": resource_counts,
             "total_hours": resource_hours,
-            "overloaded_resources": overloaded
+            "overloaded_resources": overloaded,
+            "capacity_hours_per_day": config.RESOURCE_DAILY_CAPACITY,
+            "weekly_loading": self._weekly_loading(loading, names),
+            "overallocations": overallocations
+        }
+
+    def _weekly_loading(self, loading: ResourceLoading, names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Hours per week of each resource, from the Monday of its first working week."""
+        first_week, week_indptr, hours = loading.weekly_hours()
+        active = np.flatnonzero(first_week >= 0)
+        if not len(active):
+            return {}
+        mondays = np.datetime_as_string(loading.date(first_week[active] * BUSINESS_DAYS_PER_WEEK)).tolist()
+        hours = np.round(hours, 2).tolist()
+        indptr = week_indptr.tolist()
+        return {
+            names[r]: {"week_start": monday, "hours": hours[indptr[r]:indptr[r + 1]]}
+            for r, monday in zip(active.tolist(), mondays)
+        }
+
+    def _overallocations(self, loading: ResourceLoading, names: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Periods (first and last business day) where a resource exceeds its daily capacity."""
+        periods = loading.overallocations(config.RESOURCE_DAILY_CAPACITY)
+        if not periods:
+            return {}
+        starts = np.datetime_as_string(loading.date(np.array([p.start for p in periods]))).tolist()
+        finishes = np.datetime_as_string(loading.date(np.array([p.finish for p in periods]) - 1)).tolist()
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        for period, start, finish in zip(periods, starts, finishes):
+            result.setdefault(names[period.resource], []).append({
+                "start": start,
+                "finish": finish,
+                "peak_hours_per_day": round(period.peak_hours_per_day, 2)
+            })
+        return result
+
+    def level(self, tasks: Union[TaskTable, List[Task]], language: str = "en") -> Dict[str, Any]:
+        """
+        Resource-leveled schedule (see utils/leveling.py): the tasks leveling
+        delays, with their shifted dates, and the resulting move of the
+        project finish. Leveling works on the tasks' own dates and on the
+        same daily capacity as the over-allocation periods of analyze, so a
+        leveled schedule has none left (bar tasks that alone exceed it).
+        Raises ScheduleCycleError when the links form a cycle.
+        """
+        table = TaskTable.coerce(tasks)
+        hours_per_day = config.RESOURCE_DAILY_CAPACITY
+        result = level_resources(table, hours_per_day)
+        moved = result.delayed
+        delay = result.delay[moved]
+
+        leveled_start, leveled_finish = result.dates(table.start[moved], table.finish[moved], moved)
+        finishes = table.finish.copy()
+        finishes[moved] = leveled_finish
+
+        starts_text = isoformat(table.start[moved])
+        finishes_text = isoformat(table.finish[moved])
+        leveled_starts_text = isoformat(leveled_start)
+        leveled_finishes_text = isoformat(leveled_finish)
+        delays = np.round(delay, 2).tolist()
+        shifted = [
+            {
+                "task_id": table.ids[i],
+                "task_name": table.names[i],
+                "start_date": starts_text[k],
+                "finish_date": finishes_text[k],
+                "leveled_start_date": leveled_starts_text[k],
+                "leveled_finish_date": leveled_finishes_text[k],
+                "delay_hours": delays[k]
+            }
+            for k, i in enumerate(moved.tolist())
+        ]
+
+        # The move of the latest reported finish, in business days
+        original_latest = self._latest(table.finish)
+        leveled_latest = self._latest(finishes)
+        delta_days = 0
+        if original_latest is not None:
+            delta_days = int(np.busday_count(original_latest.astype("datetime64[D]"),
+                                             leveled_latest.astype("datetime64[D]")))
+        return {
+            "agent": "Resource Manager",
+            "summary": render_all("resource.leveling", len(shifted), delta_days),
+            "shifted_tasks": shifted,
+            "project_finish_delta_hours": round(delta_days * hours_per_day, 2),
+            "project_finish_delta_days": delta_days,
+            "original_finish": self._isoformat(original_latest),
+            "leveled_finish": self._isoformat(leveled_latest)
         }
+
+    def _latest(self, dates: np.ndarray) -> Optional[np.datetime64]:
+        dated = dates[~np.isnat(dates)]
+        return dated.max() if len(dated) else None
+
+    def _isoformat(self, date: Optional[np.datetime64]) -> Optional[str]:
+        return isoformat(np.array([date]))[0] if date is not None else None
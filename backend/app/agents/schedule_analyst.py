@@ -1,57 +1,51 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 from app.models import Task
-from datetime import datetime
+from app.utils.task_table import TaskTable
+from app.utils.analysis_context import AnalysisContext
+from app.utils.cpm import critical_path_method, ScheduleCycleError
+from app.utils.messages import render, render_all
+import numpy as np
 
 class ScheduleAnalyst:
-    def analyze(self, tasks: List[Task], language: str = "en") -> Dict[str, Any]:
+    def analyze(self, tasks: Union[AnalysisContext, TaskTable, List[Task]], language: str = "en") -> Dict[str, Any]:
+        context = AnalysisContext.coerce(tasks)
+        table = context.table
         risks = []
         delayed_tasks = []
-        
-        now = datetime.now()
-        
-        translations = {
-            "pt": {
-                "overdue": "Tarefa '{}' está atrasada.",
-                "summary": "Encontradas {} tarefas atrasadas."
-            },
-            "es": {
-                "overdue": "La tarea '{}' está retrasada.",
-                "summary": "Encontradas {} tareas retrasadas."
-            },
-            "en": {
-                "overdue": "Task '{}' is overdue.",
-                "summary": "Found {} delayed tasks."
-            }
-        }
-        t = translations.get(language, translations["en"])
 
-        for task in tasks:
-            # Check for delayed tasks (past finish date and not complete)
-            if task.finish_date and task.finish_date < now and task.percent_complete < 100:
-                delayed_tasks.append({
-                    "id": task.id,
-                    "name": task.name,
-                    "finish_date": task.finish_date,
-                    "percent_complete": task.percent_complete,
-                    "days_delayed": (now - task.finish_date).days
-                })
-                risks.append(t["overdue"].format(task.name))
+        # Check for delayed tasks (past finish date and not complete)
+        for i, days in zip(context.overdue.tolist(), context.days_overdue):
+            name = table.names[i]
+            delayed_tasks.append({
+                "id": table.ids[i],
+                "name": name,
+                "finish_date": table.finish[i].item(),
+                "percent_complete": int(table.percent_complete[i]),
+                "days_delayed": days
+            })
+            risks.append(render("schedule.overdue", language, name))
 
-        # Simple critical path estimation (longest duration tasks? or just list top 5 longest)
-        # Real critical path requires dependency graph traversal.
-        # For now, let's sort by duration.
-        sorted_by_duration = sorted(tasks, key=lambda x: x.duration, reverse=True)
-        top_long_tasks = sorted_by_duration[:5]
+        # Critical path from the predecessor network (CPM forward/backward pass)
+        critical_path = []
+        project_duration = None
+        cycle_tasks = []
+        try:
+            cpm = critical_path_method(table)
+            critical_path = table.names[cpm.critical_path].tolist()
+            project_duration = cpm.project_duration
+        except ScheduleCycleError as e:
+            cycle_tasks = e.task_ids
+            risks.append(render("schedule.cycle", language, len(cycle_tasks)))
 
-        summaries = {}
-        for lang in ["pt", "es", "en"]:
-            summary_tmpl = translations.get(lang)
-            summaries[lang] = summary_tmpl["summary"].format(len(delayed_tasks))
+        top_long_tasks = np.argsort(-table.duration, kind="stable")[:5]
 
         return {
             "agent": "Schedule Analyst",
-            "summary": summaries,
+            "summary": render_all("schedule.summary", len(delayed_tasks)),
             "risks": risks,
             "delayed_tasks": delayed_tasks,
-            "longest_tasks": [t.name for t in top_long_tasks]
+            "critical_path": critical_path,
+            "project_duration_hours": project_duration,
+            "dependency_cycle": cycle_tasks,
+            "longest_tasks": table.names[top_long_tasks].tolist()
         }
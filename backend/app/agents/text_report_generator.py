@@ -1,68 +1,72 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
 from app.models import Task
+from app.utils.task_table import TaskTable
+from app.utils.analysis_context import AnalysisContext
+from app.utils.evm import EarnedValue
+from app.utils.messages import render
 from datetime import datetime
 
+# SPI below 1 but at least this reads as slightly behind schedule
+SPI_WARNING = 0.9
+
 class TextReportGenerator:
     """
     Agent responsible for generating comprehensive text-based status reports
     of the project schedule in natural language.
     """
     
-    def generate_report(self, tasks: List[Task], analysis: Dict[str, Any], language: str = "pt") -> str:
+    def generate_report(self, tasks: Union[AnalysisContext, TaskTable, List[Task]], analysis: Dict[str, Any], language: str = "pt") -> str:
         """
         Generate a comprehensive text report of the schedule status.
         
         Args:
-            tasks: List of project tasks
+            tasks: Analysis context of the project (or its task table, or list of tasks)
             analysis: Analysis data from other agents (schedule, resource, risk)
             language: Report language (pt, es, en)
         
         Returns:
             Formatted text report
         """
-        now = datetime.now()
-        
         # Extract data from analysis
         schedule_analysis = analysis.get('schedule_analysis', {})
         resource_analysis = analysis.get('resource_analysis', {})
         risk_analysis = analysis.get('risk_analysis', {})
         
         # Calculate statistics
-        total_tasks = len(tasks)
-        completed_tasks = sum(1 for t in tasks if t.percent_complete == 100)
-        in_progress_tasks = sum(1 for t in tasks if 0 < t.percent_complete < 100)
-        not_started_tasks = sum(1 for t in tasks if t.percent_complete == 0)
-        
-        avg_completion = sum(t.percent_complete for t in tasks) / total_tasks if total_tasks > 0 else 0
+        context = AnalysisContext.coerce(tasks)
+        total_tasks = len(context.table)
+        completed_tasks, in_progress_tasks, not_started_tasks = context.status_counts
+        avg_completion = context.average_completion
         
         delayed_tasks = schedule_analysis.get('delayed_tasks', [])
         risks = schedule_analysis.get('risks', [])
         
         project_risk_level = risk_analysis.get('project_risk_level', 1)
         high_risk_tasks = risk_analysis.get('high_risk_tasks', [])
+        evm = context.earned_value
         
         # Generate report based on language
         if language == "pt":
             return self._generate_pt_report(
                 total_tasks, completed_tasks, in_progress_tasks, not_started_tasks,
                 avg_completion, delayed_tasks, risks, project_risk_level, high_risk_tasks,
-                resource_analysis
+                resource_analysis, evm
             )
         elif language == "es":
             return self._generate_es_report(
                 total_tasks, completed_tasks, in_progress_tasks, not_started_tasks,
                 avg_completion, delayed_tasks, risks, project_risk_level, high_risk_tasks,
-                resource_analysis
+                resource_analysis, evm
             )
         else:  # en
             return self._generate_en_report(
                 total_tasks, completed_tasks, in_progress_tasks, not_started_tasks,
                 avg_completion, delayed_tasks, risks, project_risk_level, high_risk_tasks,
-                resource_analysis
+                resource_analysis, evm
             )
     
     def _generate_pt_report(self, total, completed, in_progress, not_started, avg_completion,
-                           delayed, risks, risk_level, high_risk, resources):
+                           delayed, risks, risk_level, high_risk, resources, evm):
         """Generate Portuguese report"""
         report = f"""
 # 📊 RELATÓRIO DE STATUS DO CRONOGRAMA
@@ -122,6 +126,9 @@ O projeto possui **{total} tarefas** no total, com um progresso médio de **{avg
             if overloaded:
                 report += f"**Recursos Sobrecarregados:** {', '.join(overloaded)}\n\n"
         
+        # Earned value
+        report += self._evm_section(evm, "pt")
+        
         # Recommendations
         report += "## 💡 RECOMENDAÇÕES\n\n"
         
@@ -147,7 +154,7 @@ O projeto possui **{total} tarefas** no total, com um progresso médio de **{avg
         return report
     
     def _generate_es_report(self, total, completed, in_progress, not_started, avg_completion,
-                           delayed, risks, risk_level, high_risk, resources):
+                           delayed, risks, risk_level, high_risk, resources, evm):
         """Generate Spanish report"""
         report = f"""
 # 📊 INFORME DE ESTADO DEL CRONOGRAMA
@@ -191,13 +198,15 @@ El proyecto tiene **{total} tareas** en total, con un progreso promedio de **{av
                 report += f"- **{task['name']}**: {task['days_delayed']} días de retraso ({task['percent_complete']}% completado)\n"
             report += "\n"
         
+        report += self._evm_section(evm, "es")
+        
         report += "\n---\n\n"
         report += "*Informe generado automáticamente por Planus - Project Manager AI*\n"
         
         return report
     
     def _generate_en_report(self, total, completed, in_progress, not_started, avg_completion,
-                           delayed, risks, risk_level, high_risk, resources):
+                           delayed, risks, risk_level, high_risk, resources, evm):
         """Generate English report"""
         report = f"""
 # 📊 SCHEDULE STATUS REPORT
@@ -241,7 +250,33 @@ The project has **{total} tasks** in total, with an average progress of **{avg_c
                 report += f"- **{task['name']}**: {task['days_delayed']} days delayed ({task['percent_complete']}% complete)\n"
             report += "\n"
         
+        report += self._evm_section(evm, "en")
+        
         report += "\n---\n\n"
         report += "*Report automatically generated by Planus - Project Manager AI*\n"
         
         return report
+
+    def _evm_section(self, evm: Optional[EarnedValue], language: str) -> str:
+        """Earned value lines of the report, if the schedule has any."""
+        if evm is None:
+            return ""
+        lines = [
+            render("report.evm.title", language),
+            "",
+            render("report.evm.planned", language, evm.planned_to_date, evm.budget),
+            render("report.evm.earned", language, evm.earned_to_date),
+            render("report.evm.sv", language, evm.sv_to_date),
+        ]
+        if evm.spi_to_date is not None:
+            label = self._spi_label(evm.spi_to_date, language)
+            lines.append(render("report.evm.spi", language, evm.spi_to_date, label))
+        return "\n".join(lines) + "\n\n"
+
+    def _spi_label(self, spi: float, language: str) -> str:
+        """Traffic-light reading of a schedule performance index."""
+        if spi >= 1.0:
+            return render("report.spi.on_track", language)
+        if spi >= SPI_WARNING:
+            return render("report.spi.slightly_behind", language)
+        return render("report.spi.behind", language)
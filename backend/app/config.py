@@ -0,0 +1,72 @@
+import os
+
+
+def _user_cache_dir(name: str) -> str:
+    """name under the current user's cache directory ($XDG_CACHE_HOME or ~/.cache)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "mcp", name)
+
+
+# Runtime settings, overridable through environment variables
+
+# Parsed schedules kept in memory, keyed by the hash of the uploaded file
+PROJECT_CACHE_SIZE = int(os.environ.get("PROJECT_CACHE_SIZE", "32"))
+
+# Finished analyses kept in memory so text reports in other languages can be
+# rendered later without rerunning the agents
+ANALYSIS_CACHE_SIZE = int(os.environ.get("ANALYSIS_CACHE_SIZE", "64"))
+
+# Threads used to run independent agents of one analysis side by side
+AGENT_WORKERS = int(os.environ.get("AGENT_WORKERS", "4"))
+
+# Worker pool that runs parsing and analysis off the event loop:
+# "process" (default) or "thread"
+OFFLOAD_MODE = os.environ.get("OFFLOAD_MODE", "process")
+OFFLOAD_WORKERS = int(os.environ.get("OFFLOAD_WORKERS", str(os.cpu_count() or 2)))
+
+# Jobs submitted but not yet finished; further requests get 429
+OFFLOAD_MAX_PENDING = int(os.environ.get("OFFLOAD_MAX_PENDING", str(4 * OFFLOAD_WORKERS)))
+
+# Seconds a request waits for its job before answering 504
+OFFLOAD_TIMEOUT = float(os.environ.get("OFFLOAD_TIMEOUT", "300"))
+
+# Seconds a background analysis job may run before it fails; nobody waits
+# on it, so it is not bound by OFFLOAD_TIMEOUT
+JOB_TIMEOUT = float(os.environ.get("JOB_TIMEOUT", "3600"))
+
+# Seconds a finished analysis job and its result stay available for polling
+JOB_RESULT_TTL = float(os.environ.get("JOB_RESULT_TTL", "3600"))
+
+# Processes that extract text from PDF contracts page range by page range,
+# and the pages each of them handles at a time. PDFs with no more than one
+# range of pages are read in-process.
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", str(os.cpu_count() or 2)))
+PDF_PAGES_PER_CHUNK = int(os.environ.get("PDF_PAGES_PER_CHUNK", "8"))
+
+# Extracted contract text and clauses, cached on disk by file hash so a
+# contract compared against every new schedule revision is read only once.
+# CONTRACT_CACHE_MAX_BYTES=0 disables the cache.
+CONTRACT_CACHE_DIR = os.environ.get("CONTRACT_CACHE_DIR", _user_cache_dir("contracts"))
+CONTRACT_CACHE_MAX_BYTES = int(os.environ.get("CONTRACT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Working hours per business day a resource can take before it counts as
+# over-allocated
+RESOURCE_DAILY_CAPACITY = float(os.environ.get("RESOURCE_DAILY_CAPACITY", "8"))
+
+# Monte Carlo schedule simulation: processes sharing the iterations of one
+# run, the smallest run worth starting them for, and the task-iterations
+# each chunk holds in memory at once (about 8 bytes * 6 per cell)
+MONTE_CARLO_WORKERS = int(os.environ.get("MONTE_CARLO_WORKERS", str(os.cpu_count() or 2)))
+MONTE_CARLO_PARALLEL_ITERATIONS = int(os.environ.get("MONTE_CARLO_PARALLEL_ITERATIONS", "10000"))
+MONTE_CARLO_CHUNK_CELLS = int(os.environ.get("MONTE_CARLO_CHUNK_CELLS", "2000000"))
+MONTE_CARLO_MAX_ITERATIONS = int(os.environ.get("MONTE_CARLO_MAX_ITERATIONS", "100000"))
+
+# Processes rendering PDF reports (WeasyPrint plus Kaleido chart export),
+# kept warm between reports, and the on-disk cache of finished PDFs keyed by
+# a hash of their content. REPORT_CACHE_MAX_BYTES=0 disables the cache.
+PDF_RENDER_WORKERS = int(os.environ.get("PDF_RENDER_WORKERS", "2"))
+REPORT_CACHE_DIR = os.environ.get("REPORT_CACHE_DIR", _user_cache_dir("reports"))
+REPORT_CACHE_MAX_BYTES = int(os.environ.get("REPORT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Most bars in a Gantt dataset; larger schedules are rolled up by WBS level
+GANTT_MAX_BARS = int(os.environ.get("GANTT_MAX_BARS", "500"))
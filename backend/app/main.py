@@ -1,7 +1,21 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.utils.jobs import job_store
+from app.utils.offload import offloader
+from app.utils.pdf_report import pdf_renderer
 
-app = FastAPI(title="Engineering Project Management Agents")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop the worker pools and the job event queue with the server
+    offloader.shutdown()
+    pdf_renderer.shutdown()
+    job_store.shutdown()
+
+
+app = FastAPI(title="Engineering Project Management Agents", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -12,6 +12,10 @@ class Task(BaseModel):
     resource_names: List[str] = []
     predecessors: List[str] = []
 
+class ProjectUpload(BaseModel):
+    project_id: str
+    tasks: List[Task]
+
 class ProjectAnalysis(BaseModel):
     project_name: str
     total_tasks: int
@@ -29,6 +33,8 @@ class ContractActivity(BaseModel):
     name: str
     description: Optional[str] = None
     deadline: Optional[datetime] = None
+    # Deadline clause as written, also when it is not a date
+    deadline_text: Optional[str] = None
     resource_requirements: List[str] = []
     deliverables: List[str] = []
 
@@ -41,6 +47,12 @@ class ProductivityMetric(BaseModel):
     productivity_index: float
     status: str  # "efficient", "normal", "delayed"
 
+class ActivityMatch(BaseModel):
+    activity: str
+    task_id: str
+    task_name: str
+    score: float  # cosine similarity, 0-1
+
 class ContractComparison(BaseModel):
     summary: str
     delayed_activities: List[Dict[str, Any]]
@@ -49,3 +61,11 @@ class ContractComparison(BaseModel):
     productivity_metrics: List[ProductivityMetric]
     compliance_score: float
     recommendations: List[str]
+    matched_activities: List[ActivityMatch] = []  # filled in "fuzzy" match mode
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str  # "queued", "running", "done", "failed"
+    progress: float
+    stages: Dict[str, Dict[str, Any]]
+    error: Optional[str] = None
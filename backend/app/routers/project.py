@@ -1,179 +1,464 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from app.utils.parser import MSProjectParser
-from app.models import ProjectAnalysis, Task
-from typing import List
+import hashlib
+import os
+import time
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Form, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from app.utils.jobs import job_store, DONE, FAILED
+from app.utils.offload import Offloader, OffloadSlot, offloader, OffloadBusyError, OffloadTimeoutError
+from app.utils.parser import parse_schedule_file
+from app.utils.project_store import project_store, analysis_store, spool_upload
+from app.utils.task_table import TaskTable
+from app.models import JobStatus, ProjectAnalysis, ProjectUpload, Task
+from datetime import datetime
+from typing import List, Optional, Tuple
 
 router = APIRouter(
     prefix="/projects",
     tags=["projects"]
 )
 
-@router.post("/upload", response_model=List[Task])
+# Seconds clients are asked to wait when the worker pool is saturated
+RETRY_AFTER_SECONDS = 5
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Server is busy processing other schedules. Retry later.",
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
+
+
+async def _offload(func, *args, pool: Offloader = offloader, timeout: Optional[float] = None,
+                   slot: Optional[OffloadSlot] = None):
+    """
+    Run blocking work on a worker pool, mapping backpressure to HTTP errors.
+    timeout defaults to the pool's, which is meant for a waiting request.
+    """
+    try:
+        return await pool.run(func, *args, timeout=timeout, slot=slot)
+    except OffloadBusyError:
+        raise _busy()
+    except OffloadTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+
+async def _load_schedule(file: UploadFile) -> Tuple[str, TaskTable]:
+    """Hash the upload and parse it unless the same file is already cached."""
+    project_id, path = await run_in_threadpool(spool_upload, file.file, ".xml")
+    try:
+        return project_id, await _parse_spooled(project_id, path)
+    finally:
+        os.remove(path)
+
+
+async def _parse_spooled(project_id: str, path: str, timeout: Optional[float] = None,
+                         slot: Optional[OffloadSlot] = None) -> TaskTable:
+    table = project_store.get(project_id)
+    if table is None:
+        # The worker streams the file from disk instead of receiving its bytes
+        table = await _offload(parse_schedule_file, path, timeout=timeout, slot=slot)
+        project_store.put(project_id, table)
+    return table
+
+
+def _get_project(project_id: str) -> TaskTable:
+    table = project_store.get(project_id)
+    if table is None:
+        raise HTTPException(status_code=404, detail="Project not found. Upload the schedule again.")
+    return table
+
+
+@router.post("/upload", response_model=ProjectUpload)
 async def upload_project_file(file: UploadFile = File(...)):
     if not file.filename.endswith('.xml'):
         raise HTTPException(status_code=400, detail="Only .xml files are supported")
-    
-    content = await file.read()
+
     try:
-        parser = MSProjectParser(content.decode('utf-8'))
-        tasks = parser.parse_tasks()
-        return tasks
+        project_id, table = await _load_schedule(file)
+        tasks = await run_in_threadpool(table.to_tasks)
+        return ProjectUpload(project_id=project_id, tasks=tasks)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to parse file: {str(e)}")
 
 
+@router.get("/{project_id}/tasks", response_model=List[Task])
+async def get_project_tasks(project_id: str):
+    return await run_in_threadpool(_get_project(project_id).to_tasks)
+
+
+def _report_languages(language: str, languages: Optional[List[str]]) -> List[str]:
+    """Languages to render text reports in; defaults to the analysis language."""
+    from app.agents.orchestrator import REPORT_LANGUAGES
+
+    selected = list(dict.fromkeys(languages or [language]))
+    unsupported = [lang for lang in [language] + selected if lang not in REPORT_LANGUAGES]
+    if unsupported:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported language: {unsupported[0]}. Use one of {REPORT_LANGUAGES}"
+        )
+    return selected
+
+
+def _check_match_mode(match_mode: str):
+    from app.agents.orchestrator import MATCH_MODES
+
+    if match_mode not in MATCH_MODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported match_mode: {match_mode}. Use one of {MATCH_MODES}")
+
+
+def _remember_analysis(project_id: str, contract_id: Optional[str], result: dict):
+    """Keep the report inputs so other languages can be rendered on demand."""
+    from app.agents.orchestrator import STANDARD_ANALYSES
+
+    analysis = {name: result[name] for name in STANDARD_ANALYSES}
+    if contract_id is not None:
+        analysis["contract_analysis"] = result["comparison"]
+    analysis_store.put(project_id, contract_id, analysis, result["text_reports"])
 
 
 @router.post("/analyze")
-async def analyze_project(tasks: List[Task]):
-    from app.agents.schedule_analyst import ScheduleAnalyst
-    from app.agents.resource_manager import ResourceManager
-    from app.agents.risk_analyst import RiskAnalyst
-    from app.agents.chart_generator import ChartGenerator
-    from app.agents.text_report_generator import TextReportGenerator
+async def analyze_project(tasks: List[Task], language: str = "en",
+                          languages: Optional[List[str]] = Query(None)):
+    # Agents work on the columnar table, not on the Task models
+    languages = _report_languages(language, languages)
+    return await _analyze_table(await run_in_threadpool(TaskTable.from_tasks, tasks), language, languages)
+
+
+@router.post("/{project_id}/analyze")
+async def analyze_project_by_id(project_id: str, language: str = "en",
+                                languages: Optional[List[str]] = Query(None)):
+    """Analyze a previously uploaded schedule without posting its tasks again."""
+    languages = _report_languages(language, languages)
+    result = await _analyze_table(_get_project(project_id), language, languages)
+    _remember_analysis(project_id, None, result)
+    result["project_id"] = project_id
+    return result
+
+
+async def _analyze_table(tasks: TaskTable, language: str, languages: List[str]):
+    from app.agents.orchestrator import analyze_schedule
 
     try:
-        # 1. Schedule Analysis
-        schedule_analyst = ScheduleAnalyst()
-        schedule_analysis = schedule_analyst.analyze(tasks)
-        
-        # 2. Resource Analysis
-        resource_manager = ResourceManager()
-        resource_analysis = resource_manager.analyze(tasks)
-        
-        # 3. Risk Analysis
-        risk_analyst = RiskAnalyst()
-        risk_analysis = risk_analyst.analyze(tasks, resource_analysis)
-        
-        # 4. Generate Charts Data
-        chart_generator = ChartGenerator()
-        chart_data = chart_generator.generate_charts(tasks, resource_analysis, risk_analysis)
-        
-        # 5. Generate Text Reports (for all languages)
-        text_generator = TextReportGenerator()
-        
-        # Create a comprehensive analysis object for the text generator
-        full_analysis = {
-            "schedule_analysis": schedule_analysis,
-            "resource_analysis": resource_analysis,
-            "risk_analysis": risk_analysis
-        }
-        
-        text_reports = {
-            "pt": text_generator.generate_report(tasks, full_analysis, "pt"),
-            "en": text_generator.generate_report(tasks, full_analysis, "en"),
-            "es": text_generator.generate_report(tasks, full_analysis, "es")
-        }
-        
-        return {
-            "schedule_analysis": schedule_analysis,
-            "resource_analysis": resource_analysis,
-            "risk_analysis": risk_analysis,
-            "chart_data": chart_data,
-            "text_reports": text_reports
-        }
-        
+        return await _offload(analyze_schedule, tasks, language, None, languages)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
-@router.post("/analyze-contract")
-async def analyze_contract(
-    contract_file: UploadFile = File(...),
-    schedule_file: UploadFile = File(...),
-    language: str = "en"
-):
+@router.post("/{project_id}/level")
+async def level_project(project_id: str):
     """
-    Analyze contract vs schedule.
-    Accepts contract (PDF/DOCX) and schedule (XML).
-    Returns comprehensive comparison analysis + standard analysis.
+    Level the resources of an uploaded schedule: tasks not yet started are
+    delayed, within their links, until no resource works more than
+    RESOURCE_DAILY_CAPACITY hours on any business day.
     """
-    from app.agents.contract_analyst import ContractAnalyst
-    from app.agents.schedule_analyst import ScheduleAnalyst
     from app.agents.resource_manager import ResourceManager
+    from app.utils.cpm import ScheduleCycleError
+
+    tasks = _get_project(project_id)
+    try:
+        result = await _offload(ResourceManager().level, tasks)
+    except HTTPException:
+        raise
+    except ScheduleCycleError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Leveling failed: {str(e)}")
+    result["project_id"] = project_id
+    return result
+
+
+@router.post("/{project_id}/simulate")
+async def simulate_project(project_id: str, iterations: int = Query(1000, ge=1),
+                           seed: Optional[int] = Query(None, ge=0), distribution: str = "pert",
+                           status_date: Optional[datetime] = None):
+    """
+    Monte Carlo schedule risk analysis of an uploaded schedule: finish
+    date percentiles, the chance of meeting the planned finish and the
+    criticality index of every task. Work left starts no earlier than
+    status_date (default now). The same seed and status date reproduce the
+    same result; the seed is returned when none is given.
+    """
+    from app import config
     from app.agents.risk_analyst import RiskAnalyst
-    from app.agents.chart_generator import ChartGenerator
-    from app.agents.text_report_generator import TextReportGenerator
-    
+    from app.utils.cpm import ScheduleCycleError
+    from app.utils.montecarlo import DISTRIBUTIONS
+
+    if distribution not in DISTRIBUTIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported distribution: {distribution}. Use one of {DISTRIBUTIONS}")
+    if iterations > config.MONTE_CARLO_MAX_ITERATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {config.MONTE_CARLO_MAX_ITERATIONS} iterations are allowed")
+    tasks = _get_project(project_id)
+    if status_date is not None and status_date.tzinfo is not None:
+        # Schedule dates are naive; keep the wall-clock time
+        status_date = status_date.replace(tzinfo=None)
+    try:
+        result = await _offload(RiskAnalyst().simulate, tasks, iterations, seed, distribution, status_date)
+    except HTTPException:
+        raise
+    except ScheduleCycleError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Simulation failed: {str(e)}")
+    result["project_id"] = project_id
+    return result
+
+
+@router.get("/{project_id}/charts/gantt")
+async def get_gantt_chart(project_id: str, start: Optional[datetime] = None, finish: Optional[datetime] = None,
+                          max_bars: Optional[int] = Query(None, ge=1, le=5000)):
+    """
+    Gantt dataset for the tasks overlapping [start, finish], rolled up by
+    WBS level to at most max_bars bars (default GANTT_MAX_BARS), so clients
+    can zoom into a period and get more detail.
+    """
+    from app import config
+    from app.utils.chart_data import gantt_dataset
+
+    tasks = _get_project(project_id)
+    if start is not None and start.tzinfo is not None:
+        start = start.replace(tzinfo=None)
+    if finish is not None and finish.tzinfo is not None:
+        finish = finish.replace(tzinfo=None)
+    result = await run_in_threadpool(gantt_dataset, tasks, max_bars or config.GANTT_MAX_BARS, start, finish)
+    result["project_id"] = project_id
+    return result
+
+
+@router.get("/{project_id}/report")
+async def get_project_report(project_id: str, language: str = "en", contract_id: Optional[str] = None):
+    """
+    Text report of the latest analysis of a project (or of a project and
+    contract) in any language, rendered from the cached agent results.
+    """
+    _, report = await _cached_report(project_id, language, contract_id)
+    return {"project_id": project_id, "contract_id": contract_id, "language": language, "report": report}
+
+
+async def _cached_report(project_id: str, language: str, contract_id: Optional[str]):
+    """Cached analysis entry and its text report in `language`, rendered on first request."""
+    from app.agents.orchestrator import render_report
+
+    _report_languages(language, None)
+    entry = analysis_store.get(project_id, contract_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="No analysis found for this project. Run the analysis again.")
+
+    report = entry["reports"].get(language)
+    if report is None:
+        tasks = _get_project(project_id)
+        report = await run_in_threadpool(render_report, tasks, entry["analysis"], language)
+        analysis_store.add_report(project_id, contract_id, language, report)
+    return entry, report
+
+
+def _stream_file(f, chunk_size: int = 64 * 1024):
+    with f:
+        yield from iter(lambda: f.read(chunk_size), b"")
+
+
+@router.get("/{project_id}/report.pdf")
+async def get_project_report_pdf(project_id: str, language: str = "en", contract_id: Optional[str] = None):
+    """
+    PDF of the text report of the latest analysis, with charts rendered on
+    the server. PDFs are cached on disk by a hash of their content.
+    """
+    from app.utils.pdf_report import pdf_renderer, render_report_pdf, report_cache, report_cache_key, report_chart_specs
+
+    entry, report = await _cached_report(project_id, language, contract_id)
+    tasks = _get_project(project_id)
+    charts = await run_in_threadpool(report_chart_specs, tasks, entry["analysis"], language)
+    key = report_cache_key(report, charts, language)
+    headers = {"Content-Disposition": f'attachment; filename="report_{project_id[:12]}_{language}.pdf"'}
+
+    cached = await run_in_threadpool(report_cache.open, key)
+    if cached is not None:
+        return StreamingResponse(_stream_file(cached), media_type="application/pdf", headers=headers)
+
+    try:
+        pdf = await _offload(render_report_pdf, report, charts, language, pool=pdf_renderer)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"PDF export failed: {str(e)}")
+    await run_in_threadpool(report_cache.put, key, pdf)
+    return Response(content=pdf, media_type="application/pdf", headers=headers)
+
+
+def _check_contract_request(contract_file: UploadFile, schedule_file: Optional[UploadFile],
+                            project_id: Optional[str]):
     # Validate file types
-    if not schedule_file.filename.endswith('.xml'):
+    if schedule_file is None and project_id is None:
+        raise HTTPException(status_code=400, detail="Provide a schedule file or a project_id")
+    if schedule_file is not None and not schedule_file.filename.endswith('.xml'):
         raise HTTPException(status_code=400, detail="Schedule must be .xml file")
-    
+
     allowed_contract_extensions = ['.pdf', '.docx', '.doc']
     if not any(contract_file.filename.endswith(ext) for ext in allowed_contract_extensions):
         raise HTTPException(
-            status_code=400, 
+            status_code=400,
             detail="Contract must be PDF or DOCX file"
         )
-    
+
+
+@router.post("/analyze-contract")
+async def analyze_contract(
+    contract_file: UploadFile = File(...),
+    schedule_file: Optional[UploadFile] = File(None),
+    project_id: Optional[str] = Form(None),
+    language: str = "en",
+    languages: Optional[List[str]] = Query(None),
+    match_mode: str = "substring"
+):
+    """
+    Analyze contract vs schedule.
+    Accepts contract (PDF/DOCX) and either a schedule (XML) or the project_id
+    of an already uploaded schedule. match_mode "fuzzy" also pairs activities
+    and tasks by name similarity.
+    Returns comprehensive comparison analysis + standard analysis.
+    """
+    from app.agents.orchestrator import analyze_contract as run_contract_analysis
+
+    _check_contract_request(contract_file, schedule_file, project_id)
+    _check_match_mode(match_mode)
+    languages = _report_languages(language, languages)
+    if schedule_file is None:
+        tasks = _get_project(project_id)
+
     try:
         # Parse schedule
-        schedule_content = await schedule_file.read()
-        parser = MSProjectParser(schedule_content.decode('utf-8'))
-        tasks = parser.parse_tasks()
-        
-        # Parse contract
+        if schedule_file is not None:
+            project_id, tasks = await _load_schedule(schedule_file)
+
+        # Contract extraction, comparison and the standard agents run as one
+        # pipeline inside a single worker job
         contract_content = await contract_file.read()
-        analyst = ContractAnalyst()
-        
-        if contract_file.filename.endswith('.pdf'):
-            contract_data = analyst.parse_contract_pdf(contract_content)
-        else:
-            contract_data = analyst.parse_contract_docx(contract_content)
-        
-        # Compare and analyze (Contract)
-        comparison = analyst.compare_with_schedule(contract_data, tasks, language)
-        
-        # Run Standard Analysis (Schedule, Resource, Risk)
-        # 1. Schedule Analysis
-        schedule_analyst = ScheduleAnalyst()
-        schedule_analysis = schedule_analyst.analyze(tasks, language)
-        
-        # 2. Resource Analysis
-        resource_manager = ResourceManager()
-        resource_analysis = resource_manager.analyze(tasks, language)
-        
-        # 3. Risk Analysis
-        risk_analyst = RiskAnalyst()
-        risk_analysis = risk_analyst.analyze(tasks, resource_analysis, language)
-        
-        # 4. Generate Charts Data
-        chart_generator = ChartGenerator()
-        chart_data = chart_generator.generate_charts(tasks, resource_analysis, risk_analysis)
-        
-        # 5. Generate Text Reports
-        text_generator = TextReportGenerator()
-        full_analysis = {
-            "schedule_analysis": schedule_analysis,
-            "resource_analysis": resource_analysis,
-            "risk_analysis": risk_analysis,
-            "contract_analysis": comparison.dict()
-        }
-        
-        text_reports = {
-            "pt": text_generator.generate_report(tasks, full_analysis, "pt"),
-            "en": text_generator.generate_report(tasks, full_analysis, "en"),
-            "es": text_generator.generate_report(tasks, full_analysis, "es")
-        }
-        
-        return {
-            "agent": "Contract Analyst",
-            "comparison": comparison.dict(),
-            "contract_data": {
-                "activities_found": len(contract_data.get("activities", [])),
-                "deadlines_found": len(contract_data.get("deadlines", [])),
-                "deliverables_found": len(contract_data.get("deliverables", []))
-            },
-            # Include standard analysis results
-            "schedule_analysis": schedule_analysis,
-            "resource_analysis": resource_analysis,
-            "risk_analysis": risk_analysis,
-            "chart_data": chart_data,
-            "text_reports": text_reports
-        }
-        
+        result = await _offload(run_contract_analysis, tasks, contract_content, contract_file.filename,
+                                language, None, languages, match_mode)
+        contract_id = hashlib.sha256(contract_content).hexdigest()
+        _remember_analysis(project_id, contract_id, result)
+        result["project_id"] = project_id
+        result["contract_id"] = contract_id
+        return result
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
-            status_code=500, 
+            status_code=500,
             detail=f"Failed to analyze contract: {str(e)}"
         )
+
+
+@router.post("/analyze-contract/jobs", response_model=JobStatus, status_code=202)
+async def submit_contract_job(
+    background_tasks: BackgroundTasks,
+    contract_file: UploadFile = File(...),
+    schedule_file: Optional[UploadFile] = File(None),
+    project_id: Optional[str] = Form(None),
+    language: str = "en",
+    languages: Optional[List[str]] = Query(None),
+    match_mode: str = "substring"
+):
+    """
+    Same inputs as /analyze-contract, but returns a job id right away.
+    Poll /projects/jobs/{job_id} for stage progress and fetch the payload
+    from /projects/jobs/{job_id}/result once the job is done.
+    """
+    from app.agents.orchestrator import contract_stage_names
+
+    _check_contract_request(contract_file, schedule_file, project_id)
+    _check_match_mode(match_mode)
+    languages = _report_languages(language, languages)
+    # The job's pool slot is taken now, so an accepted job never finds the pool full
+    try:
+        slot = offloader.reserve()
+    except OffloadBusyError:
+        raise _busy()
+
+    try:
+        # Uploads are closed once the response is sent, so keep what the job needs
+        tasks, schedule_path = None, None
+        if schedule_file is None:
+            tasks = _get_project(project_id)
+        else:
+            project_id, schedule_path = await run_in_threadpool(spool_upload, schedule_file.file, ".xml")
+        contract_content = await contract_file.read()
+
+        stages = (["schedule_parse"] if schedule_path else []) + contract_stage_names(languages)
+        job = job_store.create(stages)
+    except BaseException:
+        slot.release()
+        raise
+    background_tasks.add_task(
+        _run_contract_job, job.job_id, slot, project_id, tasks, schedule_path,
+        contract_content, contract_file.filename, language, languages, match_mode
+    )
+    return job.snapshot()
+
+
+async def _run_contract_job(job_id: str, slot: OffloadSlot, project_id: str, tasks: Optional[TaskTable],
+                            schedule_path: Optional[str], contract_content: bytes,
+                            contract_filename: str, language: str, languages: List[str],
+                            match_mode: str):
+    from app import config
+    from app.agents.orchestrator import analyze_contract as run_contract_analysis
+
+    progress = job_store.reporter(job_id)
+    job_store.start(job_id)
+    try:
+        if schedule_path is not None:
+            progress("schedule_parse", "running")
+            started = time.perf_counter()
+            try:
+                tasks = await _parse_spooled(project_id, schedule_path, config.JOB_TIMEOUT, slot)
+            finally:
+                os.remove(schedule_path)
+            progress("schedule_parse", "done", seconds=round(time.perf_counter() - started, 4))
+
+        # Nobody waits on a background job, so it gets its own, longer deadline
+        result = await _offload(run_contract_analysis, tasks, contract_content, contract_filename,
+                                language, progress, languages, match_mode, timeout=config.JOB_TIMEOUT,
+                                slot=slot)
+        contract_id = hashlib.sha256(contract_content).hexdigest()
+        _remember_analysis(project_id, contract_id, result)
+        result["project_id"] = project_id
+        result["contract_id"] = contract_id
+        # Encoded once here; polling the result just returns these bytes
+        body = await run_in_threadpool(lambda: JSONResponse(jsonable_encoder(result)).body)
+        job_store.finish(job_id, body)
+    except HTTPException as e:
+        job_store.fail(job_id, e.detail)
+    except Exception as e:
+        job_store.fail(job_id, f"Failed to analyze contract: {str(e)}")
+    finally:
+        slot.release()
+
+
+def _get_job(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job_status(job_id: str):
+    return _get_job(job_id).snapshot()
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = _get_job(job_id)
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != DONE:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return Response(content=job.result, media_type="application/json")
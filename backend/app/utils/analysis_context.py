@@ -0,0 +1,101 @@
+from datetime import datetime
+from functools import cached_property
+from typing import List, Optional, Tuple, Union
+import numpy as np
+from app.models import Task
+from app.utils.evm import EarnedValue, earned_value
+from app.utils.risk_scoring import RiskScores, score_risks
+from app.utils.task_table import TaskTable
+
+
+class AnalysisContext:
+    """
+    A task table plus the values several agents derive from it: progress
+    status counts, overdue tasks, per-resource aggregates, risk scores and
+    earned value. Each is computed on first use and then kept, so all the
+    agents of one analysis share a single pass, and they all use the same
+    `now`.
+
+    Pipeline stages read one context from several threads. When two threads
+    ask for the same value together it may be computed twice, but the
+    result is the same either way.
+    """
+
+    def __init__(self, table: TaskTable, now: Optional[datetime] = None):
+        self.table = table
+        self.now = now or datetime.now()
+        self.now64 = np.datetime64(self.now, "us")
+
+    @classmethod
+    def coerce(cls, tasks: Union["AnalysisContext", TaskTable, List[Task]]) -> "AnalysisContext":
+        """Accept a context, a table or a list of Task models."""
+        if isinstance(tasks, AnalysisContext):
+            return tasks
+        return cls(TaskTable.coerce(tasks))
+
+    @cached_property
+    def status_counts(self) -> Tuple[int, int, int]:
+        """Completed, in progress and not started task counts."""
+        percent = self.table.percent_complete
+        completed = int((percent == 100).sum())
+        not_started = int((percent == 0).sum())
+        return completed, len(percent) - completed - not_started, not_started
+
+    @cached_property
+    def average_completion(self) -> float:
+        total = len(self.table)
+        return int(self.table.percent_complete.sum()) / total if total > 0 else 0
+
+    @cached_property
+    def overdue(self) -> np.ndarray:
+        """Positions of the unfinished tasks whose finish date has passed; NaT never compares."""
+        table = self.table
+        return np.flatnonzero((table.finish < self.now64) & (table.percent_complete < 100))
+
+    @cached_property
+    def days_overdue(self) -> List[int]:
+        """Whole days past the finish date of every overdue task."""
+        return ((self.now64 - self.table.finish[self.overdue]) // np.timedelta64(1, "D")).tolist()
+
+    @cached_property
+    def resource_names(self) -> List[str]:
+        return self.table.resources.tolist()
+
+    @cached_property
+    def assignment_duration(self) -> np.ndarray:
+        """Duration of the task of every assignment, aligned with res_indices."""
+        return self.table.duration[self.table.res_task_index]
+
+    def _per_resource(self, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        return np.bincount(self.table.res_indices, weights=weights, minlength=len(self.table.resources))
+
+    @cached_property
+    def resource_task_counts(self) -> np.ndarray:
+        return self._per_resource()
+
+    @cached_property
+    def resource_hours(self) -> np.ndarray:
+        """Sum of the full duration of every task assigned to each resource."""
+        return self._per_resource(self.assignment_duration)
+
+    @cached_property
+    def resource_completed_tasks(self) -> np.ndarray:
+        percent = self.table.percent_complete[self.table.res_task_index]
+        return self._per_resource(percent == 100).astype(np.int64)
+
+    @cached_property
+    def resource_earned_hours(self) -> np.ndarray:
+        """Duration of each resource's tasks weighted by their completion."""
+        percent = self.table.percent_complete[self.table.res_task_index]
+        duration = self.assignment_duration
+        earned = np.where(percent == 100, duration, np.where(percent > 0, duration * (percent / 100), 0.0))
+        return self._per_resource(earned)
+
+    @cached_property
+    def risk_scores(self) -> RiskScores:
+        return score_risks(self.table, self.now)
+
+    @cached_property
+    def earned_value(self) -> Optional[EarnedValue]:
+        """Earned value S-curves with `now` as the status date."""
+        return earned_value(self.table, self.now)
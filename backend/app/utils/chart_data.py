@@ -0,0 +1,136 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from app.utils.task_table import TaskTable, isoformat
+
+# Resources drawn as their own bar; the rest are summed into "others"
+TOP_RESOURCES = 15
+HISTOGRAM_BINS = 40
+
+
+def _wbs_paths(table: TaskTable) -> List[Tuple[str, ...]]:
+    """
+    WBS code of every task as a tuple of levels. Schedules without WBS
+    codes get outline numbers rebuilt from the outline levels instead.
+    """
+    codes = table.wbs.tolist()
+    if all(codes):
+        return [tuple(code.split(".")) for code in codes]
+    paths = []
+    counters: List[int] = []
+    for level in table.outline_level.tolist():
+        level = max(level, 1)
+        del counters[level:]
+        counters.extend([0] * (level - len(counters)))
+        counters[level - 1] += 1
+        paths.append(tuple(str(c) for c in counters))
+    return paths
+
+
+def _bars(table: TaskTable, rows: np.ndarray, group: np.ndarray, names: List[str],
+          ids: List[str]) -> Dict[str, list]:
+    """Columnar bars, one per group id 0..len(names)-1, over the tasks `rows`."""
+    n_groups = len(names)
+    start = table.start[rows].astype(np.int64)
+    finish = table.finish[rows].astype(np.int64)
+    first = np.full(n_groups, np.iinfo(np.int64).max)
+    last = np.full(n_groups, np.iinfo(np.int64).min)
+    np.minimum.at(first, group, start)
+    np.maximum.at(last, group, finish)
+
+    # Progress of a group weighted by the duration of its detail tasks
+    detail = ~table.summary[rows]
+    duration = np.where(detail, table.duration[rows], 0.0)
+    weight = np.bincount(group, weights=duration, minlength=n_groups)
+    done = np.bincount(group, weights=duration * table.percent_complete[rows], minlength=n_groups)
+    plain = np.bincount(group, weights=table.percent_complete[rows], minlength=n_groups)
+    count = np.bincount(group, minlength=n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent = np.where(weight > 0, done / weight, plain / np.maximum(count, 1))
+
+    return {
+        "id": ids,
+        "name": names,
+        "start": isoformat(first.astype("datetime64[us]")),
+        "finish": isoformat(last.astype("datetime64[us]")),
+        "percent_complete": np.round(percent, 1).tolist(),
+        "task_count": count.tolist()
+    }
+
+
+def gantt_dataset(table: TaskTable, max_bars: int, window_start: Optional[datetime] = None,
+                  window_finish: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Gantt bars for the tasks overlapping a date window, at the deepest WBS
+    level that fits in max_bars: at coarse zoom every bar rolls up a WBS
+    branch (earliest start, latest finish, duration-weighted progress); at
+    fine zoom bars are single tasks. A flat schedule that does not fit is
+    cut into runs of consecutive tasks instead (level is then None).
+    """
+    dated = ~np.isnat(table.start) & ~np.isnat(table.finish)
+    if window_start is not None:
+        dated &= table.finish >= np.datetime64(window_start, "us")
+    if window_finish is not None:
+        dated &= table.start <= np.datetime64(window_finish, "us")
+    rows = np.flatnonzero(dated)
+    if not len(rows):
+        return {"level": None, "max_level": 0, "total_tasks": 0,
+                "bars": _bars(table, rows, rows, [], [])}
+
+    paths = _wbs_paths(table)
+    names = table.names
+    ids = table.ids
+    depth = max((len(paths[i]) for i in rows.tolist()), default=0)
+
+    chosen = None
+    for level in range(1, depth + 1):
+        keys: Dict[Tuple[str, ...], int] = {}
+        group = np.array([keys.setdefault(paths[i][:level], len(keys)) for i in rows.tolist()], dtype=np.int64)
+        if len(keys) > max_bars:
+            break
+        chosen = level, keys, group
+
+    if chosen is not None:
+        level, keys, group = chosen
+        # A group is named after its own summary task when that is in the window
+        own = {paths[i]: i for i in rows.tolist() if len(paths[i]) <= level}
+        group_ids, group_names = [], []
+        for key in keys:
+            i = own.get(key)
+            group_ids.append(ids[i] if i is not None else ".".join(key))
+            group_names.append(names[i] if i is not None else f"WBS {'.'.join(key)}")
+    else:
+        level = None
+        size = -(-len(rows) // max(max_bars, 1))
+        group = np.arange(len(rows)) // size
+        starts = rows[::size].tolist()
+        ends = rows[size - 1::size].tolist() + ([rows[-1]] if len(rows) % size else [])
+        group_ids = [f"{ids[a]}..{ids[b]}" for a, b in zip(starts, ends)]
+        group_names = [f"{names[a]} … {names[b]}" for a, b in zip(starts, ends)]
+
+    return {
+        "level": level,
+        "max_level": depth,
+        "total_tasks": len(rows),
+        "bars": _bars(table, rows, group, group_names, group_ids)
+    }
+
+
+def histogram(values: np.ndarray, bins: int = HISTOGRAM_BINS) -> Dict[str, list]:
+    """Bin edges and counts; counts[i] covers [edges[i], edges[i + 1])."""
+    if not len(values):
+        return {"edges": [], "counts": []}
+    counts, edges = np.histogram(values, bins=bins)
+    return {"edges": np.round(edges, 2).tolist(), "counts": counts.tolist()}
+
+
+def top_resources(counts: Dict[str, int], n: int = TOP_RESOURCES) -> Dict[str, Any]:
+    """The n resources with most tasks, plus the tasks and number of resources summed into "others"."""
+    ranked = sorted(counts.items(), key=lambda item: -item[1])
+    top, rest = ranked[:n], ranked[n:]
+    return {
+        "names": [name for name, _ in top],
+        "counts": [count for _, count in top],
+        "others_count": sum(count for _, count in rest),
+        "others_resources": len(rest)
+    }
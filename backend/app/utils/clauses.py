@@ -0,0 +1,155 @@
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.models import ContractActivity
+from app.utils.text_scan import IncrementalScanner
+
+# Clause keywords per kind, in English, Portuguese and Spanish. Matching is
+# case-insensitive and, as before, not anchored to word starts.
+CLAUSE_KEYWORDS = {
+    "activity": [
+        r"Activity", r"Task", r"Item",
+        r"Atividade", r"Tarefa",
+        r"Actividad", r"Tarea", r"Ítem",
+    ],
+    "deadline": [
+        r"Deadline", r"Due\s*date", r"Completion\s*date",
+        r"Prazo", r"Data\s+limite", r"Data\s+de\s+(?:conclusão|conclusao|entrega|término|termino)",
+        r"Plazo", r"Fecha\s+(?:límite|limite)", r"Fecha\s+de\s+(?:entrega|finalización|finalizacion|término|termino)",
+    ],
+    "deliverable": [
+        r"Deliverable", r"Output",
+        r"Entregável", r"Entregavel", r"Produto",
+        r"Entregable", r"Producto",
+    ],
+    "resource": [
+        r"Resources?", r"Staff", r"Crew", r"Equipment", r"Responsible",
+        r"Recursos?", r"Equipe", r"Equipamentos?", r"Mão\s+de\s+obra", r"Responsável",
+        r"Personal", r"Equipos?", r"Mano\s+de\s+obra", r"Responsable",
+    ],
+}
+
+# Result lists of contract_data, per clause kind
+CLAUSE_FIELDS = {
+    "activity": "activities",
+    "deadline": "deadlines",
+    "deliverable": "deliverables",
+    "resource": "resources",
+}
+
+# Every kind in one alternation, so the text is scanned once. Each branch is
+# a named group around the whole clause, followed by the value's group, so
+# match.lastgroup is the kind and group lastindex + 1 the value.
+CLAUSE_PATTERN = re.compile(
+    "|".join(
+        f"(?P<{kind}>(?:{'|'.join(words)})" + r"\s*[:\-]\s*([^\n]+))"
+        for kind, words in CLAUSE_KEYWORDS.items()
+    ),
+    re.IGNORECASE
+)
+
+# Any keyword on its own, e.g. a table header cell
+KEYWORD_PATTERN = re.compile(
+    "|".join(word for words in CLAUSE_KEYWORDS.values() for word in words),
+    re.IGNORECASE
+)
+
+# Keyword words + separator + value, each possibly on its own line
+CLAUSE_MAX_LINES = 6
+
+_DATE_PATTERNS = [
+    (re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})"), ("year", "month", "day")),
+    # Day first, as written in pt/es contracts
+    (re.compile(r"(\d{1,2})[/.](\d{1,2})[/.](\d{4})"), ("day", "month", "year")),
+]
+
+
+def parse_deadline(text: str) -> Optional[datetime]:
+    """First ISO (2024-03-31) or day-first (31/03/2024) date in the text, if any."""
+    for pattern, fields in _DATE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            parts = dict(zip(fields, map(int, match.groups())))
+            try:
+                return datetime(parts["year"], parts["month"], parts["day"])
+            except ValueError:
+                # 03/31/2024: month first after all
+                try:
+                    return datetime(parts["year"], parts["day"], parts["month"])
+                except ValueError:
+                    return None
+    return None
+
+
+class ClauseExtractor(IncrementalScanner):
+    """
+    Single-pass extraction of activity, deadline, deliverable and resource
+    clauses ("Prazo: 31/03/2024", "Task - Foundations", ...) from text fed
+    in pieces, e.g. page by page.
+
+    Besides the plain value lists, every activity becomes a ContractActivity
+    and collects the deadline, deliverable and resource clauses that follow
+    it up to the next activity. Clauses before the first activity only
+    appear in the value lists.
+    """
+
+    def __init__(self):
+        super().__init__({"clauses": CLAUSE_PATTERN}, CLAUSE_MAX_LINES)
+        self.results = {field: [] for field in CLAUSE_FIELDS.values()}
+        # ContractActivity fields, filled in as clauses arrive
+        self._activities: List[Dict[str, Any]] = []
+
+    def _accept(self, name: str, match):
+        kind = match.lastgroup
+        value = match.group(match.lastindex + 1)
+        self.results[CLAUSE_FIELDS[kind]].append(value)
+
+        if kind == "activity":
+            self._activities.append({
+                "name": value.strip(),
+                "deadline_text": None,
+                "resource_requirements": [],
+                "deliverables": []
+            })
+            return
+        if not self._activities:
+            return
+        current = self._activities[-1]
+        if kind == "deadline":
+            # The first deadline after an activity is its own
+            if current["deadline_text"] is None:
+                current["deadline_text"] = value.strip()
+        elif kind == "deliverable":
+            current["deliverables"].append(value.strip())
+        else:
+            current["resource_requirements"].append(value.strip())
+
+    def _resume_at(self, match) -> int:
+        # Continue inside the value, so a clause in it ("Deliverable:" with
+        # the next line as value) is still found, as with separate scans
+        return match.start(match.lastindex + 1)
+
+    def _contract_activities(self) -> List[ContractActivity]:
+        activities = []
+        for activity in self._activities:
+            text = activity["deadline_text"]
+            activities.append(ContractActivity(
+                name=activity["name"],
+                deadline=parse_deadline(text) if text is not None else None,
+                deadline_text=text,
+                resource_requirements=activity["resource_requirements"],
+                deliverables=activity["deliverables"]
+            ))
+        return activities
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Value lists per kind, plus "contract_activities": the validated
+        ContractActivity models as JSON-ready dicts (deadline as an ISO
+        string), so the result can go to the disk cache as is.
+        """
+        results = super().close()
+        results["contract_activities"] = [activity.model_dump(mode="json")
+                                          for activity in self._contract_activities()]
+        return results
+
@@ -0,0 +1,190 @@
+from typing import List
+import numpy as np
+from app.utils.task_table import TaskTable
+
+# MSPDI PredecessorLink/Type codes
+FF, FS, SF, SS = 0, 1, 2, 3
+
+# Float below this (in hours) counts as zero
+FLOAT_TOLERANCE = 1e-6
+
+
+class ScheduleCycleError(ValueError):
+    """
+    Raised when the predecessor graph is not a DAG. task_ids lists every task
+    that could not be ordered: the cycle members and everything after them.
+    """
+
+    def __init__(self, task_ids: List[str]):
+        self.task_ids = task_ids
+        super().__init__(f"Dependency cycle detected; {len(task_ids)} tasks could not be ordered")
+
+    def __reduce__(self):
+        # Rebuilt from task_ids when it crosses a worker process boundary
+        return type(self), (self.task_ids,)
+
+
+class ScheduleGraph:
+    """
+    Predecessor links of a TaskTable as flat edge arrays plus a topological
+    order. Links to unknown UIDs are dropped, and summary tasks are left out
+    of the network since their dates are derived from their children.
+    """
+
+    def __init__(self, table: TaskTable):
+        n = len(table)
+        self.n = n
+        self.duration = np.where(table.summary, 0.0, table.duration)
+
+        dst = np.repeat(np.arange(n), np.diff(table.pred_indptr))
+        src = table.pred_index
+        keep = (src >= 0) & ~table.summary[dst] & ~table.summary[np.maximum(src, 0)]
+        self.src = src[keep]
+        self.dst = dst[keep]
+        self.link_type = table.pred_type[keep]
+        self.lag = table.pred_lag[keep]
+
+        # Incoming edges grouped by successor, outgoing grouped by predecessor
+        self.in_edges = np.argsort(self.dst, kind="stable")
+        self.in_indptr = np.concatenate(([0], np.cumsum(np.bincount(self.dst, minlength=n))))
+        self.out_edges = np.argsort(self.src, kind="stable")
+        self.out_indptr = np.concatenate(([0], np.cumsum(np.bincount(self.src, minlength=n))))
+
+        self.order = self._topological_order(table)
+
+    def _topological_order(self, table: TaskTable) -> np.ndarray:
+        """Kahn's algorithm; iterative so long chains cannot hit the recursion limit."""
+        indegree = np.bincount(self.dst, minlength=self.n).tolist()
+        successors = self.dst[self.out_edges].tolist()
+        indptr = self.out_indptr.tolist()
+
+        order = [v for v in range(self.n) if indegree[v] == 0]
+        head = 0
+        while head < len(order):
+            u = order[head]
+            head += 1
+            for k in range(indptr[u], indptr[u + 1]):
+                v = successors[k]
+                indegree[v] -= 1
+                if indegree[v] == 0:
+                    order.append(v)
+
+        if len(order) < self.n:
+            remaining = np.flatnonzero(np.array(indegree) > 0)
+            raise ScheduleCycleError(table.ids[remaining].tolist())
+        return np.array(order, dtype=np.int64)
+
+
+class CPMResult:
+    """Per-task CPM dates, in hours from project start, aligned with the table."""
+
+    def __init__(self, order: np.ndarray, early_start: np.ndarray, early_finish: np.ndarray,
+                 late_start: np.ndarray, late_finish: np.ndarray, free_float: np.ndarray,
+                 project_duration: float):
+        self.order = order
+        self.early_start = early_start
+        self.early_finish = early_finish
+        self.late_start = late_start
+        self.late_finish = late_finish
+        self.total_float = late_start - early_start
+        self.free_float = free_float
+        self.project_duration = project_duration
+        self.critical = self.total_float <= FLOAT_TOLERANCE
+
+    @property
+    def critical_path(self) -> np.ndarray:
+        """Critical task positions, ordered by early start then topological order."""
+        nodes = self.order[self.critical[self.order]]
+        return nodes[np.argsort(self.early_start[nodes], kind="stable")]
+
+
+def critical_path_method(table: TaskTable, graph: ScheduleGraph = None) -> CPMResult:
+    """
+    Forward/backward pass over the predecessor network in O(V + E).
+
+    Handles FS/SS/FF/SF links and LinkLag (hours). Raises ScheduleCycleError
+    when the links contain a cycle.
+    """
+    if graph is None:
+        graph = ScheduleGraph(table)
+    n = graph.n
+    order = graph.order.tolist()
+    duration = graph.duration.tolist()
+
+    src = graph.src.tolist()
+    dst = graph.dst.tolist()
+    link_type = graph.link_type.tolist()
+    lag = graph.lag.tolist()
+    in_edges = graph.in_edges.tolist()
+    in_indptr = graph.in_indptr.tolist()
+    out_edges = graph.out_edges.tolist()
+    out_indptr = graph.out_indptr.tolist()
+
+    # Forward pass: earliest start allowed by every incoming link
+    es = [0.0] * n
+    ef = [0.0] * n
+    for v in order:
+        start = 0.0
+        d = duration[v]
+        for k in range(in_indptr[v], in_indptr[v + 1]):
+            e = in_edges[k]
+            u = src[e]
+            typ = link_type[e]
+            if typ == FS:
+                bound = ef[u] + lag[e]
+            elif typ == SS:
+                bound = es[u] + lag[e]
+            elif typ == FF:
+                bound = ef[u] + lag[e] - d
+            else:  # SF
+                bound = es[u] + lag[e] - d
+            if bound > start:
+                start = bound
+        es[v] = start
+        ef[v] = start + d
+
+    project_duration = max(ef) if n else 0.0
+
+    # Backward pass: latest finish allowed by every outgoing link
+    ls = [0.0] * n
+    lf = [0.0] * n
+    for u in reversed(order):
+        finish = project_duration
+        d = duration[u]
+        for k in range(out_indptr[u], out_indptr[u + 1]):
+            e = out_edges[k]
+            v = dst[e]
+            typ = link_type[e]
+            if typ == FS:
+                bound = ls[v] - lag[e]
+            elif typ == SS:
+                bound = ls[v] - lag[e] + d
+            elif typ == FF:
+                bound = lf[v] - lag[e]
+            else:  # SF
+                bound = lf[v] - lag[e] + d
+            if bound < finish:
+                finish = bound
+        lf[u] = finish
+        ls[u] = finish - d
+
+    early_start = np.array(es)
+    early_finish = np.array(ef)
+
+    # Free float: slack on the tightest outgoing link, or to project end
+    free_float = project_duration - early_finish
+    if len(graph.src):
+        typ = graph.link_type
+        pred_time = np.where((typ == FS) | (typ == FF), early_finish[graph.src], early_start[graph.src])
+        succ_time = np.where((typ == FS) | (typ == SS), early_start[graph.dst], early_finish[graph.dst])
+        np.minimum.at(free_float, graph.src, succ_time - (pred_time + graph.lag))
+
+    return CPMResult(
+        graph.order,
+        early_start,
+        early_finish,
+        np.array(ls),
+        np.array(lf),
+        free_float,
+        project_duration
+    )
@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+from typing import IO, Any, Optional
+from app import config
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """
+    Content-addressed JSON documents in a directory, bounded in total size.
+
+    Entries are files named after their key, so every worker process shares
+    the same cache. Reads touch the file's mtime and eviction removes the
+    oldest files first, which makes the bound least-recently-used. Writes go
+    through a temporary file and os.replace, so readers never see a partial
+    entry; an unreadable entry is treated as a miss and removed.
+
+    Entries are trusted as our own, so the directory is created private to
+    this user and a directory another user owns or can write to disables
+    the cache instead.
+    """
+
+    SUFFIX = ".json"
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._usable: Optional[bool] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self._directory_usable()
+
+    def _directory_usable(self) -> bool:
+        """Create the directory with mode 0700 if missing and check who owns it, once."""
+        if self._usable is None:
+            problem = None
+            try:
+                os.makedirs(self.directory, mode=0o700, exist_ok=True)
+                info = os.stat(self.directory)
+            except OSError as e:
+                problem = str(e)
+            else:
+                if not stat.S_ISDIR(info.st_mode):
+                    problem = "not a directory"
+                elif hasattr(os, "geteuid") and info.st_uid != os.geteuid():
+                    problem = "owned by another user"
+                elif info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+                    problem = "writable by other users"
+            if problem:
+                logger.warning("Disk cache %s disabled: %s", self.directory, problem)
+            self._usable = problem is None
+        return self._usable
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            value = self._read(path)
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            self._remove(path)
+            return None
+
+    def _read(self, path: str) -> Any:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write(self, fd: int, value: Any):
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+
+    def put(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        # Recreated if something removed the directory meanwhile
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            self._write(fd, value)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            self._remove(tmp)
+            raise
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the directory fits max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if not entry.name.endswith(self.SUFFIX):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class BlobCache(DiskCache):
+    """DiskCache of raw bytes, whose hits can be streamed from their file."""
+
+    def __init__(self, directory: str, max_bytes: int, suffix: str):
+        super().__init__(directory, max_bytes)
+        self.SUFFIX = suffix
+
+    def _read(self, path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _write(self, fd: int, value: bytes):
+        with os.fdopen(fd, "wb") as f:
+            f.write(value)
+
+    def open(self, key: str) -> Optional[IO[bytes]]:
+        """
+        The entry opened for reading, or None on a miss. An open file stays
+        readable even if eviction removes it meanwhile.
+        """
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return f
+
+
+contract_cache = DiskCache(config.CONTRACT_CACHE_DIR, config.CONTRACT_CACHE_MAX_BYTES)
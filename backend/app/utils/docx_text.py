@@ -0,0 +1,121 @@
+import io
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import Iterator, List
+from app.utils.clauses import KEYWORD_PATTERN
+
+DOCUMENT_PART = "word/document.xml"
+FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+
+def _is_keyword(text: str) -> bool:
+    return KEYWORD_PATTERN.fullmatch(text.strip()) is not None
+
+
+def _is_header(cells: List[str]) -> bool:
+    """
+    Two or more keyword cells, or nothing but keywords. A keyword followed
+    by plain values is a key/value row instead.
+    """
+    keywords = sum(_is_keyword(cell) for cell in cells)
+    return keywords >= 2 or 0 < keywords == sum(1 for cell in cells if cell)
+
+
+def _row_lines(cells: List[str], header: List[str]) -> List[str]:
+    """
+    Table rows as clause-style lines. Under a header row naming clause
+    kinds, every cell becomes "Header: value"; a row whose first cell is a
+    keyword becomes "Keyword: rest of the row"; other rows are tab-joined.
+    """
+    if header:
+        return [f"{name}: {cell}" if name else cell
+                for name, cell in zip(header, cells) if cell]
+    if len(cells) > 1 and _is_keyword(cells[0]):
+        rest = " ".join(cell for cell in cells[1:] if cell)
+        return [f"{cells[0]}: {rest}"] if rest else []
+    return ["\t".join(cells)] if any(cells) else []
+
+
+class _Table:
+    def __init__(self):
+        self.header: List[str] = []
+        self.rows = 0
+        self.cells: List[str] = []
+        self.cell: List[str] = []
+
+
+def iter_docx_text(docx_content: bytes) -> Iterator[str]:
+    """
+    Text of a DOCX file in document order, one line per body paragraph and
+    per table row (see _row_lines), without building the whole document.
+
+    Only word/document.xml is decompressed, streamed through iterparse, and
+    every paragraph and table is dropped from the tree once read, so media
+    parts and document size do not add to peak memory. The first row of a
+    table is a header when its cells are clause keywords (see _is_header).
+    """
+    with zipfile.ZipFile(io.BytesIO(docx_content)) as archive:
+        with archive.open(DOCUMENT_PART) as part:
+            ns = ""
+            stack = []
+            tables: List[_Table] = []
+            # Runs of every open paragraph; text boxes nest paragraphs in runs
+            paragraphs: List[List[str]] = []
+            # Inside mc:Fallback, which repeats the mc:Choice content
+            fallback = 0
+
+            for event, elem in ET.iterparse(part, events=("start", "end")):
+                if event == "start":
+                    if not stack and elem.tag.startswith("{"):
+                        ns = elem.tag.split("}")[0] + "}"
+                    stack.append(elem)
+                    if elem.tag == FALLBACK:
+                        fallback += 1
+                    elif fallback:
+                        pass
+                    elif elem.tag == f"{ns}tbl":
+                        tables.append(_Table())
+                    elif elem.tag == f"{ns}p":
+                        paragraphs.append([])
+                    continue
+
+                stack.pop()
+                tag = elem.tag[len(ns):] if elem.tag.startswith(ns) else elem.tag
+
+                if tag == FALLBACK:
+                    fallback -= 1
+                    continue
+                if fallback or (not paragraphs and tag in ("t", "tab", "br", "cr")):
+                    continue
+
+                if tag == "t":
+                    paragraphs[-1].append(elem.text or "")
+                elif tag == "tab":
+                    paragraphs[-1].append("\t")
+                elif tag in ("br", "cr"):
+                    paragraphs[-1].append("\n")
+                elif tag == "p":
+                    text = "".join(paragraphs.pop())
+                    if tables:
+                        tables[-1].cell.append(text.strip())
+                    else:
+                        yield text
+                elif tag == "tc" and tables:
+                    table = tables[-1]
+                    table.cells.append(" ".join(text for text in table.cell if text))
+                    table.cell = []
+                elif tag == "tr" and tables:
+                    table = tables[-1]
+                    if table.rows == 0 and _is_header(table.cells):
+                        table.header = [cell if _is_keyword(cell) else "" for cell in table.cells]
+                        yield "\t".join(table.cells)
+                    else:
+                        yield from _row_lines(table.cells, table.header)
+                    table.rows += 1
+                    table.cells = []
+                elif tag == "tbl":
+                    tables.pop()
+
+                if tag in ("p", "tr", "tbl") and stack:
+                    elem.clear()
+                    stack[-1].remove(elem)
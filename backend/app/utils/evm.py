@@ -0,0 +1,131 @@
+from datetime import datetime
+from typing import Optional
+import numpy as np
+from app.utils.task_table import TaskTable
+
+# Periods the S-curves can be sampled at, in days
+PERIOD_DAYS = {"day": 1, "week": 7}
+
+# Schedules spanning more days than this are sampled weekly by default
+DAILY_MAX_SPAN_DAYS = 120
+
+_US_PER_DAY = 86_400_000_000
+
+
+class EarnedValue:
+    """
+    Cumulative planned and earned value (in hours of work) at every sample
+    date, plus the values at the status date. The earned curve ends at the
+    last sample on or before the status date.
+    """
+
+    def __init__(self, period: str, status_date: np.datetime64, dates: np.ndarray,
+                 planned: np.ndarray, earned: np.ndarray, budget: float,
+                 planned_to_date: float, earned_to_date: float):
+        self.period = period
+        self.status_date = status_date
+        self.dates = dates
+        self.planned = planned
+        self.earned = earned
+        self.budget = budget
+        self.planned_to_date = planned_to_date
+        self.earned_to_date = earned_to_date
+
+    @property
+    def spi(self) -> np.ndarray:
+        """Schedule performance index EV / PV of every earned sample, NaN where nothing was planned yet."""
+        planned = self.planned[:len(self.earned)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(planned > 0, self.earned / planned, np.nan)
+
+    @property
+    def sv(self) -> np.ndarray:
+        """Schedule variance EV - PV of every earned sample."""
+        return self.earned - self.planned[:len(self.earned)]
+
+    @property
+    def spi_to_date(self) -> Optional[float]:
+        return self.earned_to_date / self.planned_to_date if self.planned_to_date > 0 else None
+
+    @property
+    def sv_to_date(self) -> float:
+        return self.earned_to_date - self.planned_to_date
+
+
+def _ramps(begin: np.ndarray, end: np.ndarray, value: np.ndarray, at: np.ndarray) -> np.ndarray:
+    """
+    Sum over tasks of value * clip((t - begin) / (end - begin), 0, 1) at
+    every time t of `at`: each task adds a slope at its begin and removes
+    it at its end (or jumps by its whole value when begin == end), so the
+    sum is a cumulative sum over the sorted events, looked up by
+    searchsorted, in O((tasks + samples) log tasks).
+    """
+    span = end - begin
+    ramp = span > 0
+    rate = np.where(ramp, value / np.where(ramp, span, 1.0), 0.0)
+
+    time = np.concatenate((begin, end))
+    slope = np.concatenate((rate, -rate))
+    jump = np.concatenate((np.where(ramp, 0.0, value), np.zeros(len(end))))
+    order = np.argsort(time, kind="stable")
+    time, slope, jump = time[order], slope[order], jump[order]
+
+    # After event k: f(t) = t * sum(slope) - sum(slope * time) + sum(jump)
+    slope_sum = np.concatenate(([0.0], np.cumsum(slope)))
+    offset_sum = np.concatenate(([0.0], np.cumsum(slope * time)))
+    jump_sum = np.concatenate(([0.0], np.cumsum(jump)))
+    k = np.searchsorted(time, at, side="right")
+    return at * slope_sum[k] - offset_sum[k] + jump_sum[k]
+
+
+def earned_value(table: TaskTable, status_date: Optional[datetime] = None,
+                 period: Optional[str] = None) -> Optional[EarnedValue]:
+    """
+    Earned value S-curves from the task dates, durations and progress.
+
+    Each task's budget is its duration in hours. It is planned linearly
+    from its start to its finish date, and its earned share (percent
+    complete) is assumed earned linearly from its start until its finish
+    or the status date (default now), whichever comes first. Samples are
+    taken at the end of every day or week (default: by day for schedules
+    up to DAILY_MAX_SPAN_DAYS long) from the first start to the last finish.
+
+    Summary tasks and tasks without both dates are left out. Returns None
+    when no task can be placed in time.
+    """
+    valid = ~table.summary & ~np.isnat(table.start) & ~np.isnat(table.finish)
+    if not valid.any():
+        return None
+    status = np.datetime64(status_date or datetime.now(), "us")
+    start, finish = table.start[valid], table.finish[valid]
+    finish = np.maximum(start, finish)
+    budget = table.duration[valid]
+    earned = budget * table.percent_complete[valid] / 100.0
+
+    # Days (as floats) from midnight of the first start
+    origin = start.min().astype("datetime64[D]")
+    last = finish.max()
+    if period is None:
+        period = "day" if (last - origin) / np.timedelta64(1, "D") <= DAILY_MAX_SPAN_DAYS else "week"
+    step = PERIOD_DAYS[period]
+    if period == "week":
+        # Weeks end on Sundays; 1970-01-01 was a Thursday
+        origin -= (origin.astype(np.int64) + 3) % 7
+
+    def days(dates):
+        return (dates - origin).astype(np.int64) / _US_PER_DAY
+
+    begin, end, now = days(start), days(finish), days(status)
+    n_samples = max(int(np.ceil(days(last) / step)), 1)
+    at = np.arange(1, n_samples + 1) * float(step)
+
+    planned = _ramps(begin, end, budget, at)
+    earn_begin = np.minimum(begin, now)
+    earn_end = np.minimum(end, now)
+    n_earned = int(np.searchsorted(at, now, side="right"))
+    earned_curve = _ramps(earn_begin, earn_end, earned, at[:n_earned])
+    planned_to_date, = _ramps(begin, end, budget, np.array([now]))
+
+    dates = origin + (at * _US_PER_DAY).astype("timedelta64[us]")
+    return EarnedValue(period, status, dates, planned, earned_curve, float(budget.sum()),
+                       float(planned_to_date), float(earned.sum()))
@@ -0,0 +1,167 @@
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from app import config
+from app.models import JobStatus
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class ProgressReporter:
+    """
+    Progress callback for one job: reporter(stage, status, **detail). It is
+    picklable, so it can be handed to a worker process along with the job.
+    """
+
+    def __init__(self, events, job_id: str):
+        self.events = events
+        self.job_id = job_id
+
+    def __call__(self, stage: str, status: str, **detail):
+        self.events.put((self.job_id, stage, status, detail))
+
+
+class Job:
+    def __init__(self, job_id: str, stages: List[str]):
+        self.job_id = job_id
+        self.status = QUEUED
+        self.stages: Dict[str, Dict[str, Any]] = {name: {"status": "pending"} for name in stages}
+        self.error: Optional[str] = None
+        self.result: Optional[bytes] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def progress(self) -> float:
+        """Share of stages done; a PDF being read counts by pages."""
+        if self.status == DONE:
+            return 1.0
+        if not self.stages:
+            return 0.0
+        done = 0.0
+        for stage in self.stages.values():
+            if stage["status"] == "done":
+                done += 1
+            elif stage.get("pages_total"):
+                done += stage["pages_done"] / stage["pages_total"]
+        return round(done / len(self.stages), 4)
+
+    def snapshot(self) -> JobStatus:
+        return JobStatus(
+            job_id=self.job_id,
+            status=self.status,
+            progress=self.progress,
+            stages={name: dict(stage) for name, stage in self.stages.items()},
+            error=self.error
+        )
+
+
+class JobStore:
+    """
+    In-process registry of background analysis jobs.
+
+    Stage events are sent through a queue (a Manager queue when jobs run in
+    worker processes) and applied by a drain thread, so workers never touch
+    the store directly. Finished jobs keep their JSON-encoded result for
+    `ttl` seconds, so repeated polls only return stored bytes.
+    """
+
+    def __init__(self, ttl: float, cross_process: bool):
+        self.ttl = ttl
+        self.cross_process = cross_process
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._manager = None
+        self._events = None
+
+    def create(self, stages: List[str]) -> Job:
+        job = Job(uuid.uuid4().hex, stages)
+        with self._lock:
+            self._purge()
+            self._jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def reporter(self, job_id: str) -> ProgressReporter:
+        return ProgressReporter(self._event_queue(), job_id)
+
+    def start(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.status = RUNNING
+
+    def finish(self, job_id: str, result: bytes):
+        self._close(job_id, DONE, result=result)
+
+    def fail(self, job_id: str, error: str):
+        self._close(job_id, FAILED, error=error)
+
+    def update_stage(self, job_id: str, stage: str, status: str, detail: Dict[str, Any]):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            entry = job.stages.setdefault(stage, {"status": "pending"})
+            # Events may arrive after the job is closed; never move a stage back
+            if entry["status"] in ("done", "failed"):
+                return
+            entry["status"] = status
+            entry.update(detail)
+
+    def shutdown(self):
+        if self._events is not None:
+            self._events.put(None)
+            self._events = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def _close(self, job_id: str, status: str, result: Optional[bytes] = None, error: Optional[str] = None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = time.monotonic()
+
+    def _purge(self):
+        now = time.monotonic()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and now - job.finished_at > self.ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _event_queue(self):
+        with self._lock:
+            if self._events is None:
+                if self.cross_process:
+                    self._manager = multiprocessing.Manager()
+                    self._events = self._manager.Queue()
+                else:
+                    self._events = queue.Queue()
+                threading.Thread(target=self._drain, args=(self._events,), daemon=True,
+                                 name="job-events").start()
+            return self._events
+
+    def _drain(self, events):
+        while True:
+            try:
+                item = events.get()
+            except (EOFError, OSError):
+                # Manager shut down
+                return
+            if item is None:
+                return
+            self.update_stage(*item)
+
+
+job_store = JobStore(config.JOB_RESULT_TTL, config.OFFLOAD_MODE == "process")
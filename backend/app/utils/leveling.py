@@ -0,0 +1,214 @@
+import heapq
+import math
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.utils.cpm import FF, FS, SS, CPMResult, ScheduleGraph, critical_path_method
+from app.utils.loading import LOAD_TOLERANCE, business_days, week_start
+from app.utils.task_table import TaskTable
+
+
+class _Load:
+    """
+    Hours per business day of one resource as a step function: loads[k]
+    from days[k] until days[k + 1], the last step running on forever.
+    """
+
+    __slots__ = ("days", "loads")
+
+    def __init__(self):
+        self.days: List[int] = [-(1 << 62)]
+        self.loads: List[float] = [0.0]
+
+    def earliest(self, t: int, span: int, limit: float) -> int:
+        """Earliest day >= t starting `span` days whose load never exceeds limit."""
+        days, loads = self.days, self.loads
+        j = bisect_right(days, t) - 1
+        while j < len(days) and days[j] < t + span:
+            if loads[j] > limit:
+                # The last step is always free, so a next one exists
+                t = days[j + 1]
+            j += 1
+        return t
+
+    def _split(self, day: int) -> int:
+        """Index of the step starting at day, inserting it if needed."""
+        k = bisect_right(self.days, day) - 1
+        if self.days[k] != day:
+            k += 1
+            self.days.insert(k, day)
+            self.loads.insert(k, self.loads[k - 1])
+        return k
+
+    def add(self, t: int, span: int, rate: float):
+        lo = self._split(t)
+        hi = self._split(t + span)
+        for k in range(lo, hi):
+            self.loads[k] += rate
+
+
+class LevelingResult:
+    """
+    Leveled start and finish of every task in working hours from the
+    Monday of the schedule's first week, its delay in working hours, and
+    the unleveled CPMResult whose float ordered the tasks. Times are whole
+    business days of `hours_per_day`, the grid utils/loading.py uses.
+    Tasks without both dates are NaN and never move.
+    """
+
+    def __init__(self, cpm: CPMResult, hours_per_day: float, origin: Optional[np.datetime64],
+                 start_day: np.ndarray, finish_day: np.ndarray, delay_days: np.ndarray):
+        self.cpm = cpm
+        self.hours_per_day = hours_per_day
+        self.origin = origin
+        self.start_day = start_day
+        self.finish_day = finish_day
+        self.delay_days = delay_days
+        self.start = (start_day + delay_days) * hours_per_day
+        self.finish = (finish_day + delay_days) * hours_per_day
+        self.delay = delay_days * hours_per_day
+
+    @property
+    def delayed(self) -> np.ndarray:
+        """Positions of the tasks leveling moved."""
+        return np.flatnonzero(self.delay_days > 0)
+
+    def dates(self, start: np.ndarray, finish: np.ndarray, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Leveled datetime64[us] start and finish of the dated tasks at
+        positions, given their original dates: the first and last business
+        day of the span leveling placed them on, at the original times of
+        day. A finish never comes before its start.
+        """
+        if not len(positions):
+            return start[:0], finish[:0]
+        delay = self.delay_days[positions]
+        first = (self.start_day[positions] + delay).astype(np.int64)
+        last = (self.finish_day[positions] + delay).astype(np.int64) - 1
+        leveled_start = (np.busday_offset(self.origin, first).astype("datetime64[us]")
+                         + (start - start.astype("datetime64[D]")))
+        leveled_finish = (np.busday_offset(self.origin, last).astype("datetime64[us]")
+                          + (finish - finish.astype("datetime64[D]")))
+        return leveled_start, np.maximum(leveled_finish, leveled_start)
+
+
+def level_resources(table: TaskTable, capacity: float, graph: ScheduleGraph = None) -> LevelingResult:
+    """
+    Serial schedule generation over the schedule's own dates, on the load
+    model of utils/loading.py: an assignment puts its task's duration
+    evenly over the business days from start to finish date, and a
+    resource may take `capacity` hours per day (a task needing more than
+    that on its own gets the resource to itself).
+
+    Tasks whose predecessors are all placed wait in a heap ordered by CPM
+    total float, then longest duration, and each one popped is moved later
+    by whole business days until all of its resources have room for it.
+    A task moves at least as far as the moved predecessors push it through
+    its links, less any slack the plan already gave that link. Tasks in
+    progress or complete never move (they still load their resources);
+    summary tasks, milestones and tasks without both dates load none.
+    Raises ScheduleCycleError like critical_path_method.
+    """
+    if graph is None:
+        graph = ScheduleGraph(table)
+    cpm = critical_path_method(table, graph)
+    n = graph.n
+
+    start = table.start.astype("datetime64[D]")
+    finish = table.finish.astype("datetime64[D]")
+    dated = ~np.isnat(start) & ~np.isnat(finish) & (finish >= start)
+    start_day = np.full(n, np.nan)
+    finish_day = np.full(n, np.nan)
+    origin = None
+    if dated.any():
+        origin = week_start(start[dated].min())
+        d0, d1 = business_days(origin, start[dated], finish[dated])
+        start_day[dated] = d0
+        finish_day[dated] = d1
+    span = np.nan_to_num(finish_day - start_day).astype(np.int64)
+    loads = dated & ~table.summary & (table.duration > 0)
+    rate = np.where(loads, table.duration / np.maximum(span, 1), 0.0)
+
+    # Delay a moved predecessor passes on through each link: all of it,
+    # less the slack the link had in the plan. Links from or to undated
+    # tasks pass nothing on.
+    src, dst, link_type = graph.src, graph.dst, graph.link_type
+    lag_days = graph.lag / capacity
+    from_finish = (link_type == FS) | (link_type == FF)
+    to_start = (link_type == FS) | (link_type == SS)
+    slack = (np.where(to_start, start_day[dst], finish_day[dst])
+             - np.where(from_finish, finish_day[src], start_day[src]) - lag_days)
+    linked = dated[src] & dated[dst]
+    allowance = np.where(linked, np.maximum(np.nan_to_num(slack), 0.0), np.inf).tolist()
+
+    duration = graph.duration.tolist()
+    total_float = cpm.total_float.tolist()
+    day = np.nan_to_num(start_day).astype(np.int64).tolist()
+    span = span.tolist()
+    rate = rate.tolist()
+    movable = (dated & (table.percent_complete == 0)).tolist()
+    loads = loads.tolist()
+    src = src.tolist()
+    dst = dst.tolist()
+    in_edges = graph.in_edges.tolist()
+    in_indptr = graph.in_indptr.tolist()
+    out_edges = graph.out_edges.tolist()
+    out_indptr = graph.out_indptr.tolist()
+    res_indices = table.res_indices.tolist()
+    res_indptr = table.res_indptr.tolist()
+
+    def needs(v: int) -> Dict[int, float]:
+        # A resource assigned twice takes the task's load twice, as in loading.py
+        need: Dict[int, float] = {}
+        for r in res_indices[res_indptr[v]:res_indptr[v + 1]]:
+            need[r] = need.get(r, 0.0) + rate[v]
+        return need
+
+    # Tasks that cannot move load their resources before any task is placed
+    profiles = [_Load() for _ in range(len(table.resources))]
+    for v in range(n):
+        if loads[v] and not movable[v]:
+            for r, amount in needs(v).items():
+                profiles[r].add(day[v], span[v], amount)
+
+    indegree = np.bincount(graph.dst, minlength=n).tolist()
+    heap = [(total_float[v], -duration[v], v) for v in range(n) if indegree[v] == 0]
+    heapq.heapify(heap)
+
+    delay = [0] * n
+    while heap:
+        _, _, v = heapq.heappop(heap)
+
+        if movable[v]:
+            pushed = 0.0
+            for k in range(in_indptr[v], in_indptr[v + 1]):
+                e = in_edges[k]
+                pushed = max(pushed, delay[src[e]] - allowance[e])
+            # Whole days; the tolerance keeps float noise from adding one
+            delay[v] = math.ceil(pushed - LOAD_TOLERANCE) if pushed > 0 else 0
+
+        if loads[v] and movable[v]:
+            need = needs(v)
+            t, d = day[v] + delay[v], span[v]
+            # Move past every resource's full days until all have room at once
+            moved = True
+            while moved:
+                moved = False
+                for r, amount in need.items():
+                    limit = max(capacity, amount) - amount + LOAD_TOLERANCE
+                    found = profiles[r].earliest(t, d, limit)
+                    if found > t:
+                        t = found
+                        moved = True
+            delay[v] = t - day[v]
+            for r, amount in need.items():
+                profiles[r].add(t, d, amount)
+
+        for k in range(out_indptr[v], out_indptr[v + 1]):
+            w = dst[out_edges[k]]
+            indegree[w] -= 1
+            if indegree[w] == 0:
+                heapq.heappush(heap, (total_float[w], -duration[w], w))
+
+    return LevelingResult(cpm, capacity, origin, start_day, finish_day, np.array(delay, dtype=np.int64))
+
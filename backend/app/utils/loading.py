@@ -0,0 +1,185 @@
+from typing import List, NamedTuple, Optional, Tuple
+import numpy as np
+from app.utils.task_table import TaskTable
+
+BUSINESS_DAYS_PER_WEEK = 5
+
+# Loads within this many hours per day of each other are the same
+LOAD_TOLERANCE = 1e-6
+
+
+class Overallocation(NamedTuple):
+    resource: int
+    # Business day indices, finish exclusive
+    start: int
+    finish: int
+    peak_hours_per_day: float
+
+
+class ResourceLoading:
+    """
+    Hours per business day of every resource over time, as a step function.
+
+    Days are business days (Mon-Fri) counted from `origin`, a Monday, so day
+    d lies in week d // 5. The steps are stored CSR-style: resource r works
+    rate[k] hours per day from day[k] until day[k + 1], for k in
+    indptr[r]:indptr[r + 1], and the last step of a resource is always 0.
+    Storage is proportional to the number of assignments, whatever the
+    length of the schedule.
+    """
+
+    def __init__(self, origin: Optional[np.datetime64], indptr: np.ndarray, day: np.ndarray, rate: np.ndarray):
+        self.origin = origin
+        self.indptr = indptr
+        self.day = day
+        self.rate = rate
+
+    @property
+    def resource(self) -> np.ndarray:
+        """Resource index of every step."""
+        return np.repeat(np.arange(len(self.indptr) - 1), np.diff(self.indptr))
+
+    def date(self, days: np.ndarray) -> np.ndarray:
+        """Calendar dates (datetime64[D]) of business day indices."""
+        return np.busday_offset(self.origin, days, roll="forward")
+
+    def weekly_hours(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Hours per week of every resource between its first and last working
+        week. Returns (first_week, week_indptr, hours): the weekly hours of
+        resource r are hours[week_indptr[r]:week_indptr[r + 1]], starting at
+        week first_week[r] (-1 for resources without dated assignments).
+        """
+        n_resources = len(self.indptr) - 1
+        counts = np.diff(self.indptr)
+        active = counts > 0
+        first_week = np.full(n_resources, -1, dtype=np.int64)
+        last_week = np.full(n_resources, -2, dtype=np.int64)
+        first_week[active] = self.day[self.indptr[:-1][active]] // BUSINESS_DAYS_PER_WEEK
+        # Every resource's last step is the drop back to 0
+        last_week[active] = (self.day[self.indptr[1:][active] - 1] - 1) // BUSINESS_DAYS_PER_WEEK
+        n_weeks = last_week - first_week + 1
+        week_indptr = np.concatenate(([0], np.cumsum(n_weeks)))
+
+        if not len(self.day):
+            return first_week, week_indptr, np.zeros(0)
+
+        # Hours worked before each step, restarting at every resource
+        resource = self.resource
+        step_hours = np.zeros(len(self.day))
+        step_hours[1:] = self.rate[:-1] * np.diff(self.day)
+        step_hours[self.indptr[:-1][active]] = 0.0
+        worked = np.cumsum(step_hours)
+        worked -= np.repeat(worked[self.indptr[:-1][active]], counts[active])
+
+        # Cumulative hours at every week boundary of every active resource,
+        # looked up by a single search over (resource, day) keys
+        n_boundaries = np.where(active, n_weeks + 1, 0)
+        boundary_resource = np.repeat(np.arange(n_resources), n_boundaries)
+        boundary_end = np.cumsum(n_boundaries)
+        local = np.arange(len(boundary_resource)) - np.repeat(boundary_end - n_boundaries, n_boundaries)
+        boundary = (first_week[boundary_resource] + local) * BUSINESS_DAYS_PER_WEEK
+        boundary = np.maximum(boundary, self.day[self.indptr[:-1][boundary_resource]])
+
+        span = int(self.day.max()) + 1
+        keys = resource * span + self.day
+        step = np.searchsorted(keys, boundary_resource * span + boundary, side="right") - 1
+        cumulative = worked[step] + self.rate[step] * (boundary - self.day[step])
+
+        # Consecutive boundaries of a resource give its weekly hours
+        hours = np.diff(cumulative)
+        keep = np.ones(len(hours), dtype=bool)
+        keep[boundary_end[active][:-1] - 1] = False
+        return first_week, week_indptr, hours[keep]
+
+    def overallocations(self, capacity: float) -> List[Overallocation]:
+        """Maximal runs of days in which a resource works more than `capacity` hours per day."""
+        over = self.rate > capacity + LOAD_TOLERANCE
+        if not over.any():
+            return []
+        resource = self.resource
+        # A run starts at an over-allocated step whose predecessor (of the same resource) is not
+        previous = np.zeros(len(over), dtype=bool)
+        previous[1:] = over[:-1] & (resource[1:] == resource[:-1])
+        starts = np.flatnonzero(over & ~previous)
+        # Runs end at the first step that is not over-allocated; the last step never is
+        ends = np.flatnonzero(~over)
+        ends = ends[np.searchsorted(ends, starts)]
+        # Runs are disjoint and ordered, so every other reduceat slice is a run
+        peaks = np.maximum.reduceat(self.rate, np.column_stack((starts, ends)).ravel())[::2].tolist()
+        return [
+            Overallocation(r, d0, d1, peak)
+            for r, d0, d1, peak in zip(resource[starts].tolist(), self.day[starts].tolist(),
+                                      self.day[ends].tolist(), peaks)
+        ]
+
+
+def week_start(day: np.datetime64) -> np.datetime64:
+    """Monday of the week of a datetime64[D] day; 1970-01-01 was a Thursday."""
+    return day - (day.astype(np.int64) + 3) % 7
+
+
+def business_days(origin: np.datetime64, start: np.ndarray, finish: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First and one-past-last business day indices from origin of the
+    datetime64[D] ranges start..finish. Weekend starts roll forward to
+    Monday, finish days count when they are business days, and every range
+    covers at least one day.
+    """
+    d0 = np.busday_count(origin, start)
+    d1 = np.maximum(np.busday_count(origin, finish + 1), d0 + 1)
+    return d0, d1
+
+
+def resource_loading(table: TaskTable) -> ResourceLoading:
+    """
+    Sweep over assignment intervals: each assignment adds its task's
+    duration spread evenly over the business days from start to finish
+    date. Assignments are turned into +rate/-rate events, sorted by
+    (resource, day) and summed, in O(A log A) for A assignments.
+
+    Summary tasks, tasks without both dates and tasks without duration do
+    not load their resources.
+    """
+    n_resources = len(table.resources)
+    task = table.res_task_index
+    res = table.res_indices
+    start = table.start[task].astype("datetime64[D]")
+    finish = table.finish[task].astype("datetime64[D]")
+    duration = table.duration[task]
+
+    valid = ~np.isnat(start) & ~np.isnat(finish) & ~table.summary[task] & (duration > 0)
+    valid &= finish >= start
+    if not valid.any():
+        return ResourceLoading(None, np.zeros(n_resources + 1, dtype=np.int64),
+                               np.zeros(0, dtype=np.int64), np.zeros(0))
+    res, start, finish, duration = res[valid], start[valid], finish[valid], duration[valid]
+
+    origin = week_start(start.min())
+    d0, d1 = business_days(origin, start, finish)
+    rate = duration / (d1 - d0)
+
+    ev_res = np.concatenate((res, res))
+    ev_day = np.concatenate((d0, d1))
+    ev_delta = np.concatenate((rate, -rate))
+    order = np.lexsort((ev_day, ev_res))
+    ev_res, ev_day, ev_delta = ev_res[order], ev_day[order], ev_delta[order]
+
+    # Running load per resource: a global cumulative sum, rebased at every
+    # resource's first event
+    load = np.cumsum(ev_delta)
+    first_event = np.flatnonzero(np.r_[True, ev_res[1:] != ev_res[:-1]])
+    base = np.r_[0.0, load][first_event]
+    load -= np.repeat(base, np.diff(np.r_[first_event, len(load)]))
+
+    # Load after the last event of each (resource, day)
+    last = np.r_[(ev_res[1:] != ev_res[:-1]) | (ev_day[1:] != ev_day[:-1]), True]
+    res, day, load = ev_res[last], ev_day[last], load[last]
+    load[np.abs(load) < LOAD_TOLERANCE] = 0.0
+
+    # Drop steps that do not change the load
+    changed = np.r_[True, (res[1:] != res[:-1]) | (np.abs(np.diff(load)) >= LOAD_TOLERANCE)]
+    res, day, load = res[changed], day[changed], load[changed]
+
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(res, minlength=n_resources))))
+    return ResourceLoading(origin, indptr, day, load)
@@ -0,0 +1,256 @@
+import re
+import unicodedata
+from collections import deque
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+
+class Automaton:
+    """
+    Aho-Corasick automaton over a set of patterns.
+
+    scan() walks one text in O(len(text)), telling whether any pattern occurs
+    in it and recording every state it passed through. contained() then
+    says, for each pattern, whether it occurred in any of the scanned texts.
+    """
+
+    def __init__(self, patterns: Sequence[str]):
+        goto: List[Dict[str, int]] = [{}]
+        terminals = []
+        for pattern in patterns:
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                state = nxt
+            terminals.append(state)
+
+        is_terminal = bytearray(len(goto))
+        for state in terminals:
+            is_terminal[state] = 1
+
+        # Failure links in BFS order; a state has output when it or any state
+        # on its failure chain ends a pattern
+        fail = [0] * len(goto)
+        has_output = bytearray(is_terminal)
+        order = [0]
+        queue = deque(goto[0].values())
+        while queue:
+            u = queue.popleft()
+            order.append(u)
+            for ch, v in goto[u].items():
+                queue.append(v)
+                f = fail[u]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[v] = goto[f].get(ch, 0) if u else 0
+                if has_output[fail[v]]:
+                    has_output[v] = 1
+
+        self.goto = goto
+        self.fail = fail
+        self.has_output = has_output
+        self.order = order
+        self.terminals = terminals
+
+    def new_visited(self) -> bytearray:
+        return bytearray(len(self.goto))
+
+    def scan(self, text: str, visited: bytearray) -> bool:
+        """True if any pattern occurs in text; marks the states passed in visited."""
+        goto, fail, has_output = self.goto, self.fail, self.has_output
+        state = 0
+        visited[0] = 1
+        found = bool(has_output[0])
+        for ch in text:
+            while True:
+                nxt = goto[state].get(ch)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+            visited[state] = 1
+            if has_output[state]:
+                found = True
+        return found
+
+    def contained(self, visited: bytearray) -> List[bool]:
+        """Per pattern, whether it occurred in any text scanned with visited."""
+        # A visited state also witnesses every state on its failure chain
+        marks = bytearray(visited)
+        fail = self.fail
+        for u in reversed(self.order):
+            if marks[u]:
+                marks[fail[u]] = 1
+        return [bool(marks[state]) for state in self.terminals]
+
+
+def match_containment(left: Sequence[str], right: Sequence[str]) -> Tuple[List[bool], List[bool]]:
+    """
+    Containment matching in both directions, without comparing every pair:
+
+        left_found[i]  == any(l in r or r in l for r in right), l = left[i]
+        right_found[j] == any(l in r or r in l for l in left),  r = right[j]
+
+    One automaton is built over each side; scanning every text of one side
+    through the other side's automaton answers "contains a pattern" for the
+    texts and "is contained in a text" for the patterns. Total work is
+    linear in the length of all strings plus the automaton sizes.
+    """
+    left_unique = list(dict.fromkeys(left))
+    right_unique = list(dict.fromkeys(right))
+    left_automaton = Automaton(left_unique)
+    right_automaton = Automaton(right_unique)
+
+    # right texts through left patterns: r contains some l / l inside some r
+    left_visited = left_automaton.new_visited()
+    right_contains = [left_automaton.scan(r, left_visited) for r in right_unique]
+    left_inside = left_automaton.contained(left_visited)
+
+    # left texts through right patterns: l contains some r / r inside some l
+    right_visited = right_automaton.new_visited()
+    left_contains = [right_automaton.scan(l, right_visited) for l in left_unique]
+    right_inside = right_automaton.contained(right_visited)
+
+    # An empty side has no automaton states to visit, so nothing matches
+    left_hit = {l: bool(right_unique) and (a or b) for l, a, b in zip(left_unique, left_inside, left_contains)}
+    right_hit = {r: bool(left_unique) and (a or b) for r, a, b in zip(right_unique, right_inside, right_contains)}
+    return [left_hit[l] for l in left], [right_hit[r] for r in right]
+
+
+# Minimum cosine similarity for a fuzzy match
+FUZZY_THRESHOLD = 0.5
+
+# Character n-gram size, and the share of documents above which an n-gram is
+# too common to carry signal (like the stop words of word-level TF-IDF).
+# Small corpora are not pruned.
+NGRAM_SIZE = 3
+MAX_DOCUMENT_FREQUENCY = 0.5
+MIN_DOCUMENTS_TO_PRUNE = 50
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _ngrams(text: str) -> List[str]:
+    """Character n-grams of every word, padded so word boundaries count."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    grams = []
+    for token in _TOKEN.findall(text):
+        padded = f" {token} "
+        grams.extend(padded[i:i + NGRAM_SIZE] for i in range(max(len(padded) - NGRAM_SIZE + 1, 1)))
+    return grams
+
+
+class FuzzyMatches:
+    """
+    Result of fuzzy_match. For each left string: best_right (-1 when
+    nothing reaches the threshold) and best_score; for each right string:
+    best_score_right, its highest similarity to any left string.
+    """
+
+    def __init__(self, best_right: np.ndarray, best_score: np.ndarray, best_score_right: np.ndarray):
+        self.best_right = best_right
+        self.best_score = best_score
+        self.best_score_right = best_score_right
+
+
+def _tfidf(docs: List[List[str]], vocabulary: Dict[str, int], idf: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """L2-normalized TF-IDF rows in CSR form (indptr, gram ids, weights), unknown grams dropped."""
+    indptr = [0]
+    ids: List[int] = []
+    counts: List[int] = []
+    for grams in docs:
+        row: Dict[int, int] = {}
+        for g in grams:
+            gid = vocabulary.get(g)
+            if gid is not None:
+                row[gid] = row.get(gid, 0) + 1
+        ids.extend(row)
+        counts.extend(row.values())
+        indptr.append(len(ids))
+
+    indptr = np.array(indptr, dtype=np.int64)
+    ids = np.array(ids, dtype=np.int64)
+    weights = np.array(counts, dtype=np.float64) * idf[ids]
+    row_of = np.repeat(np.arange(len(docs)), np.diff(indptr))
+    norms = np.sqrt(np.bincount(row_of, weights=weights ** 2, minlength=len(docs)))
+    weights /= np.where(norms > 0, norms, 1.0)[row_of]
+    return indptr, ids, weights
+
+
+def fuzzy_match(left: Sequence[str], right: Sequence[str], threshold: float = FUZZY_THRESHOLD) -> FuzzyMatches:
+    """
+    Cosine similarity of character n-gram TF-IDF vectors, so word order,
+    inflections and punctuation matter little ("Concrete pouring - Block A"
+    vs "Pour concrete Block A").
+
+    The right side goes into an inverted index (n-gram -> postings of right
+    rows and weights). Each left string only accumulates scores over the
+    postings of its own n-grams, so pairs that share no n-gram are never
+    looked at. Ties go to the first right string.
+    """
+    left_grams = [_ngrams(s) for s in left]
+    right_grams = [_ngrams(s) for s in right]
+    n_docs = len(left) + len(right)
+
+    # Document frequency over both sides, with smoothed IDF
+    df: Dict[str, int] = {}
+    for grams in left_grams + right_grams:
+        for g in set(grams):
+            df[g] = df.get(g, 0) + 1
+    max_df = MAX_DOCUMENT_FREQUENCY * n_docs if n_docs >= MIN_DOCUMENTS_TO_PRUNE else n_docs
+    vocabulary = {}
+    for g, count in df.items():
+        if count <= max_df:
+            vocabulary[g] = len(vocabulary)
+    idf = np.log((1 + n_docs) / (1 + np.array([df[g] for g in vocabulary], dtype=np.float64))) + 1
+
+    left_indptr, left_ids, left_weights = _tfidf(left_grams, vocabulary, idf)
+    right_indptr, right_ids, right_weights = _tfidf(right_grams, vocabulary, idf)
+
+    # Inverted index over the right side: postings grouped by n-gram id
+    right_rows = np.repeat(np.arange(len(right)), np.diff(right_indptr))
+    by_gram = np.argsort(right_ids, kind="stable")
+    post_rows = right_rows[by_gram]
+    post_weights = right_weights[by_gram]
+    post_indptr = np.concatenate(([0], np.cumsum(np.bincount(right_ids, minlength=len(vocabulary)))))
+
+    best_right = np.full(len(left), -1, dtype=np.int64)
+    best_score = np.zeros(len(left))
+    best_score_right = np.zeros(len(right))
+    for i in range(len(left)):
+        grams = left_ids[left_indptr[i]:left_indptr[i + 1]]
+        if not len(grams):
+            continue
+        starts = post_indptr[grams]
+        lengths = post_indptr[grams + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            continue
+        # Positions of every posting of these grams, without a Python loop
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        contributions = post_weights[offsets] * np.repeat(left_weights[left_indptr[i]:left_indptr[i + 1]], lengths)
+        if total * 8 < len(right):
+            # Few candidates: accumulate over just those rows
+            rows, inverse = np.unique(post_rows[offsets], return_inverse=True)
+            scores = np.bincount(inverse, weights=contributions)
+            np.maximum.at(best_score_right, rows, scores)
+        else:
+            # Candidates are a large share of the index anyway: a dense
+            # accumulator avoids sorting them
+            rows = None
+            scores = np.bincount(post_rows[offsets], weights=contributions, minlength=len(right))
+            np.maximum(best_score_right, scores, out=best_score_right)
+
+        top = int(np.argmax(scores))
+        best_score[i] = scores[top]
+        if scores[top] >= threshold:
+            best_right[i] = top if rows is None else rows[top]
+
+    return FuzzyMatches(best_right, best_score, best_score_right)
@@ -0,0 +1,271 @@
+from typing import Callable, Dict, NamedTuple, Tuple
+
+# Languages every message is available in, in the order agents list them
+LANGUAGES = ("pt", "es", "en")
+DEFAULT_LANGUAGE = "en"
+
+# Message code -> template per language. Templates use str.format fields.
+CATALOG: Dict[str, Dict[str, str]] = {
+    # Schedule Analyst
+    "schedule.overdue": {
+        "pt": "Tarefa '{}' está atrasada.",
+        "es": "La tarea '{}' está retrasada.",
+        "en": "Task '{}' is overdue."
+    },
+    "schedule.cycle": {
+        "pt": "Ciclo de dependências detectado; {} tarefas não puderam ser ordenadas e o caminho crítico não foi calculado.",
+        "es": "Ciclo de dependencias detectado; {} tareas no pudieron ordenarse y la ruta crítica no fue calculada.",
+        "en": "Dependency cycle detected; {} tasks could not be ordered and the critical path was not computed."
+    },
+    "schedule.summary": {
+        "pt": "Encontradas {} tarefas atrasadas.",
+        "es": "Encontradas {} tareas retrasadas.",
+        "en": "Found {} delayed tasks."
+    },
+
+    # Resource Manager
+    "resource.summary": {
+        "pt": "Analisados {} recursos.",
+        "es": "Analizados {} recursos.",
+        "en": "Analyzed {} resources."
+    },
+    "resource.leveling": {
+        "pt": "Nivelamento atrasou {} tarefas; o término do projeto mudou {} dias úteis.",
+        "es": "La nivelación retrasó {} tareas; el fin del proyecto cambió {} días hábiles.",
+        "en": "Leveling delayed {} tasks; the project finish moved {} working days."
+    },
+
+    # Risk Analyst: factors behind a task's risk level
+    "risk.simulation": {
+        "pt": "Em 80% de {} simulações o projeto termina até {}.",
+        "es": "En el 80% de {} simulaciones el proyecto termina antes de {}.",
+        "en": "In 80% of {} simulated runs the project finishes by {}."
+    },
+    "risk.overdue": {
+        "pt": "Já atrasado {} dias",
+        "es": "Ya retrasado {} días",
+        "en": "Already {} days overdue"
+    },
+    "risk.recent_overdue": {
+        "pt": "Atrasado recentemente ({} dias)",
+        "es": "Retrasado recientemente ({} días)",
+        "en": "Recently became overdue ({} days)"
+    },
+    "risk.behind_schedule": {
+        "pt": "Progresso do trabalho ({}%) significativamente atrás do tempo ({}%)",
+        "es": "Progreso del trabajo ({}%) significativamente detrás del tiempo ({}%)",
+        "en": "Work progress ({}%) significantly behind time progress ({}%)"
+    },
+    "risk.lagging": {
+        "pt": "Progresso do trabalho atrasado em relação ao cronograma",
+        "es": "Progreso del trabajo rezagado respecto al cronograma",
+        "en": "Work progress lagging behind schedule"
+    },
+    "risk.long_duration": {
+        "pt": "Tarefa de longa duração ({} dias)",
+        "es": "Tarea de larga duración ({} días)",
+        "en": "Long duration task ({} days)"
+    },
+    "risk.no_resources": {
+        "pt": "Sem recursos atribuídos",
+        "es": "Sin recursos asignados",
+        "en": "No resources assigned"
+    },
+    "risk.should_start": {
+        "pt": "Deveria ter iniciado há {} dias",
+        "es": "Debería haber comenzado hace {} días",
+        "en": "Should have started {} days ago"
+    },
+    "risk.start_passed": {
+        "pt": "Data de início passou sem progresso",
+        "es": "La fecha de inicio pasó sin progreso",
+        "en": "Start date passed without progress"
+    },
+    "risk.approaching_deadline": {
+        "pt": "Apenas {} dias restantes com {}% concluído",
+        "es": "Solo quedan {} días con {}% completado",
+        "en": "Only {} days left with {}% complete"
+    },
+    "risk.approaching_low": {
+        "pt": "Aproximando-se do prazo com baixa taxa de conclusão",
+        "es": "Acercándose a la fecha límite con baja tasa de finalización",
+        "en": "Approaching deadline with low completion rate"
+    },
+    "risk.completed": {
+        "pt": "Tarefa concluída",
+        "es": "Tarea completada",
+        "en": "Task completed"
+    },
+    "risk.ample_time": {
+        "pt": "Tempo restante amplo",
+        "es": "Tiempo restante amplio",
+        "en": "Ample time remaining"
+    },
+    "risk.good_progress": {
+        "pt": "Bom progresso mantido",
+        "es": "Buen progreso mantenido",
+        "en": "Good progress maintained"
+    },
+
+    # Risk Analyst: level descriptions
+    "risk.level.1": {
+        "pt": "Risco Muito Baixo - No Prazo",
+        "es": "Riesgo Muy Bajo - A Tiempo",
+        "en": "Very Low Risk - On Track"
+    },
+    "risk.level.2": {
+        "pt": "Risco Baixo - Preocupações Menores",
+        "es": "Riesgo Bajo - Preocupaciones Menores",
+        "en": "Low Risk - Minor Concerns"
+    },
+    "risk.level.3": {
+        "pt": "Risco Médio - Precisa Monitoramento",
+        "es": "Riesgo Medio - Necesita Monitoreo",
+        "en": "Medium Risk - Needs Monitoring"
+    },
+    "risk.level.4": {
+        "pt": "Risco Alto - Provável Atraso",
+        "es": "Riesgo Alto - Probable Retraso",
+        "en": "High Risk - Likely to Delay"
+    },
+    "risk.level.5": {
+        "pt": "Risco Crítico - Atraso Certo",
+        "es": "Riesgo Crítico - Retraso Seguro",
+        "en": "Critical Risk - Certain to Delay"
+    },
+
+    # Risk Analyst: project summary
+    "risk.summary.critical": {
+        "pt": "⚠️ CRÍTICO: {} atividades com atraso certo. Intervenção imediata necessária!",
+        "es": "⚠️ CRÍTICO: {} actividades con retraso seguro. ¡Se requiere intervención inmediata!",
+        "en": "⚠️ CRITICAL: {} activities certain to delay. Immediate intervention required!"
+    },
+    "risk.summary.high": {
+        "pt": "⚠️ ALTO RISCO: {} atividades com provável atraso. Monitoramento próximo necessário.",
+        "es": "⚠️ ALTO RIESGO: {} actividades con probable retraso. Se necesita monitoreo cercano.",
+        "en": "⚠️ HIGH RISK: {} activities likely to delay. Close monitoring needed."
+    },
+    "risk.summary.medium": {
+        "pt": "⚡ RISCO MÉDIO: {} atividades precisam de monitoramento.",
+        "es": "⚡ RIESGO MEDIO: {} actividades necesitan monitoreo.",
+        "en": "⚡ MEDIUM RISK: {} activities need monitoring."
+    },
+    "risk.summary.low": {
+        "pt": "✅ BAIXO RISCO: Projeto no prazo com risco mínimo de atraso.",
+        "es": "✅ BAJO RIESGO: Proyecto a tiempo con riesgo mínimo de retraso.",
+        "en": "✅ LOW RISK: Project is on track with minimal delay risk."
+    },
+
+    # Text Report: earned value section
+    "report.evm.title": {
+        "pt": "## 💰 VALOR AGREGADO (EVM)",
+        "es": "## 💰 VALOR GANADO (EVM)",
+        "en": "## 💰 EARNED VALUE (EVM)"
+    },
+    "report.evm.planned": {
+        "pt": "- **Valor Planejado (PV):** {:,.1f} h de {:,.1f} h",
+        "es": "- **Valor Planificado (PV):** {:,.1f} h de {:,.1f} h",
+        "en": "- **Planned Value (PV):** {:,.1f} h of {:,.1f} h"
+    },
+    "report.evm.earned": {
+        "pt": "- **Valor Agregado (EV):** {:,.1f} h",
+        "es": "- **Valor Ganado (EV):** {:,.1f} h",
+        "en": "- **Earned Value (EV):** {:,.1f} h"
+    },
+    "report.evm.sv": {
+        "pt": "- **Variação de Prazo (SV):** {:+,.1f} h",
+        "es": "- **Variación del Cronograma (SV):** {:+,.1f} h",
+        "en": "- **Schedule Variance (SV):** {:+,.1f} h"
+    },
+    "report.evm.spi": {
+        "pt": "- **Índice de Desempenho de Prazo (SPI):** {:.2f} - {}",
+        "es": "- **Índice de Desempeño del Cronograma (SPI):** {:.2f} - {}",
+        "en": "- **Schedule Performance Index (SPI):** {:.2f} - {}"
+    },
+    "report.spi.on_track": {
+        "pt": "🟢 no prazo ou adiantado",
+        "es": "🟢 a tiempo o adelantado",
+        "en": "🟢 on or ahead of schedule"
+    },
+    "report.spi.slightly_behind": {
+        "pt": "🟡 levemente atrasado",
+        "es": "🟡 ligeramente retrasado",
+        "en": "🟡 slightly behind schedule"
+    },
+    "report.spi.behind": {
+        "pt": "🔴 atrasado",
+        "es": "🔴 retrasado",
+        "en": "🔴 behind schedule"
+    },
+
+    # Contract Analyst
+    "contract.add_missing": {
+        "pt": "Adicionar {} atividades faltantes ao cronograma para cumprir os requisitos do contrato.",
+        "es": "Agregar {} actividades faltantes al cronograma para cumplir con los requisitos del contrato.",
+        "en": "Add {} missing activities to the schedule to comply with contract requirements."
+    },
+    "contract.expedite_delayed": {
+        "pt": "Acelerar {} atividades atrasadas para cumprir os prazos.",
+        "es": "Acelerar {} actividades retrasadas para cumplir con los plazos.",
+        "en": "Expedite {} delayed activities to meet deadlines."
+    },
+    "contract.review_resources": {
+        "pt": "Revisar alocação de recursos para recursos com baixo desempenho.",
+        "es": "Revisar asignación de recursos para recursos con bajo rendimiento.",
+        "en": "Review resource allocation for underperforming resources."
+    },
+    "contract.low_compliance": {
+        "pt": "Conformidade do cronograma está abaixo do limite aceitável. Ação imediata necessária.",
+        "es": "El cumplimiento del cronograma está por debajo del umbral aceptable. Se requiere acción inmediata.",
+        "en": "Schedule compliance is below acceptable threshold. Immediate action required."
+    },
+    "contract.summary": {
+        "pt": "Analisadas {} tarefas do cronograma contra {} atividades do contrato. Encontradas {} tarefas atrasadas e {} atividades faltantes. Conformidade geral: {:.1f}%",
+        "es": "Analizadas {} tareas del cronograma contra {} actividades del contrato. Encontradas {} tareas retrasadas y {} actividades faltantes. Cumplimiento general: {:.1f}%",
+        "en": "Analyzed {} schedule tasks against {} contract activities. Found {} delayed tasks and {} missing activities. Overall compliance: {:.1f}%"
+    },
+}
+
+
+def _compile(template: str) -> Callable[..., str]:
+    # Templates without fields render to themselves; skip the format call
+    if "{" not in template:
+        return lambda *params: template
+    return template.format
+
+
+# Built once at import: code -> language -> formatter
+_FORMATTERS: Dict[str, Dict[str, Callable[..., str]]] = {
+    code: {lang: _compile(text) for lang, text in texts.items()}
+    for code, texts in CATALOG.items()
+}
+
+
+class Message(NamedTuple):
+    """A message code plus its parameters, rendered only when text is needed."""
+    code: str
+    params: Tuple = ()
+
+    def render(self, language: str = DEFAULT_LANGUAGE) -> str:
+        return render(self.code, language, *self.params)
+
+    def render_all(self) -> Dict[str, str]:
+        return render_all(self.code, *self.params)
+
+
+def formatter(code: str, language: str = DEFAULT_LANGUAGE) -> Callable[..., str]:
+    """Compiled template of one message, for rendering it in a tight loop."""
+    formatters = _FORMATTERS[code]
+    return formatters.get(language, formatters[DEFAULT_LANGUAGE])
+
+
+def render(code: str, language: str = DEFAULT_LANGUAGE, *params) -> str:
+    """Text of one message; unknown languages fall back to English."""
+    formatters = _FORMATTERS[code]
+    return formatters.get(language, formatters[DEFAULT_LANGUAGE])(*params)
+
+
+def render_all(code: str, *params) -> Dict[str, str]:
+    """The message in every catalog language, as {"pt": ..., "es": ..., "en": ...}."""
+    formatters = _FORMATTERS[code]
+    return {lang: formatters[lang](*params) for lang in LANGUAGES}
@@ -0,0 +1,310 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import List, Optional, Tuple
+import numpy as np
+from app import config
+from app.utils.cpm import FF, FS, SF, SS, FLOAT_TOLERANCE, ScheduleGraph
+from app.utils.loading import business_days
+from app.utils.task_table import TaskTable
+
+DISTRIBUTIONS = ["pert", "triangular"]
+
+# Three-point estimate of a task's remaining work, as multiples of the
+# planned remaining duration (which is the most likely value)
+OPTIMISTIC_FACTOR = 0.8
+PESSIMISTIC_FACTOR = 1.5
+
+# Beta-PERT weight of the most likely value
+PERT_LAMBDA = 4.0
+
+
+class _Network:
+    """
+    ScheduleGraph arranged for passes that advance many iterations at once.
+
+    Tasks are grouped by depth (longest chain of links before them): every
+    task of a depth only depends on shallower ones, so a whole depth is one
+    vectorized step. For each depth the incoming links are stored grouped
+    by successor and the outgoing links grouped by predecessor, ready for
+    np.maximum/minimum.reduceat.
+    """
+
+    def __init__(self, graph: ScheduleGraph, release: np.ndarray, lag: np.ndarray):
+        n = graph.n
+        self.n = n
+        # Earliest start of every task, whatever its links allow
+        self.release = release
+
+        depth = self._depths(graph)
+        nodes = np.argsort(depth, kind="stable")
+        bounds = np.searchsorted(depth[nodes], np.arange(depth.max() + 2 if n else 1))
+        self.levels = [nodes[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+        typ = graph.link_type
+        # Row of the stacked (start, finish) array each link reads: forward
+        # from its predecessor, backward from its successor
+        self.fwd_row = graph.src + n * ((typ == FS) | (typ == FF))
+        self.fwd_minus_duration = (typ == FF) | (typ == SF)
+        self.bwd_row = graph.dst + n * ((typ == FF) | (typ == SF))
+        self.bwd_plus_duration = (typ == SS) | (typ == SF)
+        self.lag = lag
+        self.src = graph.src
+        self.dst = graph.dst
+
+        self.forward = [self._grouped(level, graph.in_edges, graph.in_indptr) for level in self.levels]
+        self.backward = [self._grouped(level, graph.out_edges, graph.out_indptr) for level in self.levels]
+
+    @staticmethod
+    def _depths(graph: ScheduleGraph) -> np.ndarray:
+        depth = [0] * graph.n
+        src = graph.src.tolist()
+        in_edges = graph.in_edges.tolist()
+        in_indptr = graph.in_indptr.tolist()
+        for v in graph.order.tolist():
+            for k in range(in_indptr[v], in_indptr[v + 1]):
+                d = depth[src[in_edges[k]]] + 1
+                if d > depth[v]:
+                    depth[v] = d
+        return np.array(depth, dtype=np.int64)
+
+    @staticmethod
+    def _grouped(level: np.ndarray, edges: np.ndarray, indptr: np.ndarray):
+        """(tasks with links, their links in task order, reduceat offsets) for one depth."""
+        counts = indptr[level + 1] - indptr[level]
+        linked = level[counts > 0]
+        counts = counts[counts > 0]
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+        positions = np.repeat(indptr[linked] - offsets, counts) + np.arange(counts.sum())
+        return linked, edges[positions], offsets
+
+    def passes(self, duration: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        CPM forward and backward pass for a (tasks, iterations) array of
+        durations, no task starting before its release. Returns the project
+        finish of every iteration and whether each task is critical in each
+        iteration.
+        """
+        n, k = duration.shape
+        # Rows [0, n) hold early starts, [n, 2n) early finishes
+        early = np.empty((2 * n, k))
+        early[:n] = self.release[:, None]
+        for level, (linked, edges, offsets) in zip(self.levels, self.forward):
+            if len(edges):
+                bound = early[self.fwd_row[edges]] + self.lag[edges, None]
+                minus = self.fwd_minus_duration[edges]
+                bound[minus] -= duration[self.dst[edges[minus]]]
+                early[linked] = np.maximum(np.maximum.reduceat(bound, offsets, axis=0), self.release[linked, None])
+            early[level + n] = early[level] + duration[level]
+
+        project = early[n:].max(axis=0) if n else np.zeros(k)
+
+        # Rows [0, n) hold late starts, [n, 2n) late finishes
+        late = np.empty((2 * n, k))
+        for level, (linked, edges, offsets) in zip(reversed(self.levels), reversed(self.backward)):
+            late[level + n] = project
+            if len(edges):
+                bound = late[self.bwd_row[edges]] - self.lag[edges, None]
+                plus = self.bwd_plus_duration[edges]
+                bound[plus] += duration[self.src[edges[plus]]]
+                late[linked + n] = np.minimum(np.minimum.reduceat(bound, offsets, axis=0), project)
+            late[level] = late[level + n] - duration[level]
+
+        critical = late[:n] - early[:n] <= FLOAT_TOLERANCE
+        return project, critical
+
+
+class _Sampler:
+    """
+    Three-point estimates of the work every task has left, derived from
+    its planned work (see _Plan) and progress. Complete tasks keep their
+    whole duration; their work is already done.
+    """
+
+    def __init__(self, table: TaskTable, duration: np.ndarray, distribution: str):
+        remaining = duration * (1 - table.percent_complete / 100.0)
+        self.fixed = np.where(remaining > 0, 0.0, duration)
+        self.most_likely = self.fixed + remaining
+        self.distribution = distribution
+        # Only tasks with work left vary
+        self.uncertain = np.flatnonzero(remaining > 0)
+        most_likely = remaining[self.uncertain]
+        self.low = most_likely * OPTIMISTIC_FACTOR
+        self.width = most_likely * (PESSIMISTIC_FACTOR - OPTIMISTIC_FACTOR)
+        # Position of the most likely value within [low, low + width]
+        self.mode = (1 - OPTIMISTIC_FACTOR) / (PESSIMISTIC_FACTOR - OPTIMISTIC_FACTOR)
+
+    def sample(self, rng: np.random.Generator, iterations: int) -> np.ndarray:
+        durations = np.repeat(self.fixed[:, None], iterations, axis=1)
+        shape = (len(self.uncertain), iterations)
+        if self.distribution == "pert":
+            alpha = 1 + PERT_LAMBDA * self.mode
+            beta = 1 + PERT_LAMBDA * (1 - self.mode)
+            unit = rng.beta(alpha, beta, size=shape)
+        else:
+            unit = rng.triangular(0.0, self.mode, 1.0, size=shape)
+        durations[self.uncertain] += self.low[:, None] + self.width[:, None] * unit
+        return durations
+
+
+# Set in every simulation worker process by _init_worker
+_worker_state: Optional[Tuple[_Network, _Sampler]] = None
+
+
+def _init_worker(network: _Network, sampler: _Sampler):
+    global _worker_state
+    _worker_state = (network, sampler)
+
+
+def _run_chunk(seed: np.random.SeedSequence, iterations: int,
+               state: Optional[Tuple[_Network, _Sampler]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Project durations and per-task critical counts of one chunk of iterations."""
+    network, sampler = state or _worker_state
+    project, critical = network.passes(sampler.sample(np.random.default_rng(seed), iterations))
+    return project, critical.sum(axis=1)
+
+
+class SimulationResult:
+    """
+    Project finish of every iteration, in working hours from `origin` (the
+    earliest task start) at `hours_per_day` per business day, the finish
+    of the unsampled schedule and of the plan on the same scale, and the
+    fraction of iterations in which each task was critical, aligned with
+    the table.
+    """
+
+    def __init__(self, seed: int, distribution: str, origin: np.datetime64, hours_per_day: float,
+                 status_date: np.datetime64, deterministic_duration: float, planned_duration: Optional[float],
+                 durations: np.ndarray, criticality: np.ndarray):
+        self.seed = seed
+        self.distribution = distribution
+        self.origin = origin
+        self.hours_per_day = hours_per_day
+        self.status_date = status_date
+        self.deterministic_duration = deterministic_duration
+        self.planned_duration = planned_duration
+        self.durations = durations
+        self.criticality = criticality
+
+    @property
+    def iterations(self) -> int:
+        return len(self.durations)
+
+    def percentiles(self, q: List[float]) -> np.ndarray:
+        return np.percentile(self.durations, q)
+
+    @property
+    def on_time_probability(self) -> float:
+        """
+        Share of iterations finishing no later than the plan's latest finish
+        date, or than the unsampled schedule when no task has a finish date.
+        """
+        target = self.planned_duration if self.planned_duration is not None else self.deterministic_duration
+        return float(np.mean(self.durations <= target + FLOAT_TOLERANCE))
+
+    def dates(self, hours: np.ndarray) -> np.ndarray:
+        """
+        datetime64[us] dates `hours` working hours after origin, to the
+        minute. A whole number of days ends on the last day worked rather
+        than at the start of the next one.
+        """
+        hours = np.asarray(hours, dtype=np.float64)
+        days = np.maximum(np.ceil(hours / self.hours_per_day - FLOAT_TOLERANCE) - 1, 0)
+        day = np.busday_offset(self.origin.astype("datetime64[D]"), days.astype(np.int64), roll="forward")
+        time_of_day = self.origin - self.origin.astype("datetime64[D]")
+        worked = np.round((hours - days * self.hours_per_day) * 60).astype("timedelta64[m]")
+        return day.astype("datetime64[us]") + time_of_day + worked
+
+
+class _Plan:
+    """
+    The schedule's own dates as working hours from `origin`, the earliest
+    task start, on whole business days of hours_per_day: where each task
+    starts, the work it spans (its Duration when it lacks dates, and none
+    for summary tasks and milestones), each link's lag less however much
+    the plan already overlaps it, and the plan's latest finish. With these
+    an unsampled CPM pass reproduces the planned dates.
+    """
+
+    def __init__(self, table: TaskTable, graph: ScheduleGraph, hours_per_day: float, status_date: np.datetime64):
+        start = table.start.astype("datetime64[D]")
+        finish = table.finish.astype("datetime64[D]")
+        has_start = ~np.isnat(start)
+        self.origin = table.start[has_start].min() if has_start.any() else status_date
+        origin_day = self.origin.astype("datetime64[D]")
+
+        self.start = np.zeros(graph.n)
+        self.start[has_start] = np.busday_count(origin_day, start[has_start]) * hours_per_day
+        self.duration = graph.duration.copy()
+        spanned = has_start & ~np.isnat(finish) & (finish >= start) & (graph.duration > 0)
+        d0, d1 = business_days(origin_day, start[spanned], finish[spanned])
+        self.duration[spanned] = (d1 - d0) * hours_per_day
+        self.status = float(np.busday_count(origin_day, status_date.astype("datetime64[D]"))) * hours_per_day
+
+        src, dst, typ = graph.src, graph.dst, graph.link_type
+        finish_hours = self.start + self.duration
+        bound = np.where((typ == FS) | (typ == FF), finish_hours[src], self.start[src]) + graph.lag
+        bound -= np.where((typ == FF) | (typ == SF), self.duration[dst], 0.0)
+        overlap = np.maximum(bound - self.start[dst], 0.0)
+        self.lag = graph.lag - np.where(has_start[src] & has_start[dst], overlap, 0.0)
+
+        dated_finish = finish[~np.isnat(finish)]
+        # The end of the last business day the plan works
+        self.finish = (float(np.busday_count(origin_day, dated_finish.max() + 1)) * hours_per_day
+                       if len(dated_finish) else None)
+
+    def release(self, sampler: "_Sampler") -> np.ndarray:
+        """Earliest start of every task: work left waits for its start date and the status date."""
+        release = self.start.copy()
+        release[sampler.uncertain] = np.maximum(release[sampler.uncertain], self.status)
+        return release
+
+
+def simulate_schedule(table: TaskTable, iterations: int, seed: Optional[int] = None,
+                      distribution: str = "pert", graph: ScheduleGraph = None,
+                      status_date: Optional[datetime] = None) -> SimulationResult:
+    """
+    Monte Carlo schedule risk analysis: remaining durations are drawn from
+    a PERT (beta) or triangular distribution between OPTIMISTIC_FACTOR and
+    PESSIMISTIC_FACTOR times the planned remaining work, and each iteration
+    runs the CPM passes of critical_path_method over the planned dates
+    (see _Plan), counted in business days of RESOURCE_DAILY_CAPACITY hours.
+    Work left starts no earlier than its task's start date nor than
+    status_date (default now), so overdue work pushes the finish out.
+
+    Iterations are processed in chunks of about MONTE_CARLO_CHUNK_CELLS
+    task-iterations, each with its own child of SeedSequence(seed), so a
+    seed gives the same result however many worker processes share the
+    chunks. Runs of at least MONTE_CARLO_PARALLEL_ITERATIONS use a process
+    pool. Raises ScheduleCycleError like ScheduleGraph.
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unsupported distribution: {distribution}. Use one of {DISTRIBUTIONS}")
+    if graph is None:
+        graph = ScheduleGraph(table)
+    if seed is None:
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
+
+    status = np.datetime64(status_date or datetime.now(), "us")
+    hours_per_day = config.RESOURCE_DAILY_CAPACITY
+    plan = _Plan(table, graph, hours_per_day, status)
+    sampler = _Sampler(table, plan.duration, distribution)
+    network = _Network(graph, plan.release(sampler), plan.lag)
+    deterministic = float(network.passes(sampler.most_likely[:, None])[0][0])
+    chunk = max(1, min(iterations, config.MONTE_CARLO_CHUNK_CELLS // max(graph.n, 1)))
+    sizes = [min(chunk, iterations - start) for start in range(0, iterations, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    workers = min(config.MONTE_CARLO_WORKERS, len(sizes))
+    if iterations < config.MONTE_CARLO_PARALLEL_ITERATIONS or workers <= 1:
+        results = [_run_chunk(s, size, (network, sampler)) for s, size in zip(seeds, sizes)]
+    else:
+        # A pool per run, for the same reason as in pdf_pages.iter_page_texts;
+        # the network is sent to each worker once, not with every chunk
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(network, sampler)) as pool:
+            results = list(pool.map(_run_chunk, seeds, sizes))
+
+    durations = np.concatenate([project for project, _ in results]) if results else np.zeros(0)
+    critical = np.sum([counts for _, counts in results], axis=0) if results else np.zeros(graph.n)
+    return SimulationResult(seed, distribution, plan.origin, hours_per_day, status, deterministic, plan.finish,
+                            durations, critical / max(iterations, 1))
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from app import config
+
+
+class OffloadBusyError(Exception):
+    """Raised when max_pending jobs are already in flight."""
+
+
+class OffloadTimeoutError(Exception):
+    """Raised when a job does not finish within its timeout."""
+
+
+class Offloader:
+    """
+    Runs blocking parse/analysis work on a worker pool so the event loop
+    keeps serving other requests.
+
+    At most `max_pending` jobs may be queued or running at once; beyond that
+    run() fails fast with OffloadBusyError instead of growing the queue. A job
+    counts as pending until its worker actually finishes, so a timed-out job
+    that is still running keeps holding its slot. Jobs that time out before a
+    worker picks them up are cancelled. Work accepted now but run later can
+    reserve() its slot up front, so it never finds the pool full.
+    """
+
+    def __init__(self, mode: str, max_workers: int, max_pending: int, timeout: float,
+                 initializer: Optional[Callable[[], None]] = None):
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unknown offload mode: {mode}")
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        # Runs once in every worker as it starts, e.g. to load state all jobs reuse
+        self.initializer = initializer
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        # Created on first use so importing the app does not fork workers
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=self.initializer)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="offload",
+                                                    initializer=self.initializer)
+        return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise OffloadBusyError(f"{self._pending} jobs already pending")
+            self._pending += 1
+
+    def _release(self, future: Optional[Future] = None):
+        with self._lock:
+            self._pending -= 1
+
+    def reserve(self) -> "OffloadSlot":
+        """Take a pending slot now for runs made later with it. Raises OffloadBusyError."""
+        self._acquire()
+        return OffloadSlot(self)
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None,
+                  slot: Optional["OffloadSlot"] = None) -> Any:
+        """
+        Run func(*args) on the pool and await its result. In process mode
+        func must be a module-level function and args must be picklable.
+        With a reserved slot the job uses it instead of taking a new one.
+        """
+        if slot is None:
+            self._acquire()
+            release = self._release
+        else:
+            slot._hold()
+            release = slot._drop
+
+        try:
+            future = self._get_executor().submit(func, *args)
+        except Exception:
+            release()
+            raise
+        future.add_done_callback(release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            raise OffloadTimeoutError(f"Job did not finish within {timeout or self.timeout:g}s")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class OffloadSlot:
+    """
+    A pending slot reserved by Offloader.reserve(). The holder and every
+    job run with the slot keep it taken: it frees once the holder has
+    called release() and those jobs' workers have finished.
+    """
+
+    def __init__(self, offloader: Offloader):
+        self._offloader = offloader
+        self._holds = 1
+        self._released = False
+
+    def _hold(self):
+        with self._offloader._lock:
+            self._holds += 1
+
+    def _drop(self, future: Optional[Future] = None):
+        with self._offloader._lock:
+            self._holds -= 1
+            if self._holds == 0:
+                self._offloader._pending -= 1
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._drop()
+
+
+offloader = Offloader(
+    config.OFFLOAD_MODE,
+    config.OFFLOAD_WORKERS,
+    config.OFFLOAD_MAX_PENDING,
+    config.OFFLOAD_TIMEOUT
+)
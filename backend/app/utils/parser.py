@@ -1,13 +1,38 @@
+import io
+import os
 import xml.etree.ElementTree as ET
 from datetime import datetime
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import List, Dict, Any, IO, Union
 from app.models import Task
+from app.utils.task_table import TaskTable, TaskTableBuilder
+
+
+def parse_schedule_file(path: str) -> TaskTable:
+    """Stream-parse an MSPDI file on disk; module-level so worker processes can run it."""
+    return MSProjectParser(Path(path), streaming=True).parse_table()
+
 
 class MSProjectParser:
-    def __init__(self, xml_content: str):
-        self.root = ET.fromstring(xml_content)
-        # Handle namespaces if necessary, for now assuming simple XML or stripping NS
-        self.ns = self._get_namespace(self.root)
+    def __init__(self, xml_content: Union[str, bytes, IO[bytes], os.PathLike], streaming: bool = False):
+        """
+        Args:
+            xml_content: MSPDI document. In streaming mode this may also be a
+                binary file object or a path, so the upload never has to be
+                read into memory as a whole.
+            streaming: Walk the document with iterparse instead of building
+                the full element tree. Produces the same tasks as the default
+                mode while keeping peak memory flat as the file grows.
+        """
+        self.streaming = streaming
+        if streaming:
+            self.source = xml_content
+            self.root = None
+            self.ns = ''
+        else:
+            self.root = ET.fromstring(xml_content)
+            # Handle namespaces if necessary, for now assuming simple XML or stripping NS
+            self.ns = self._get_namespace(self.root)
 
     def _get_namespace(self, element):
         if element.tag.startswith('{'):
@@ -15,35 +40,32 @@ class MSProjectParser:
         return ''
 
     def parse_tasks(self) -> List[Task]:
+        return self.parse_table().to_tasks()
+
+    def parse_table(self) -> TaskTable:
+        """Parse the document into the columnar table the agents work on."""
+        if self.streaming:
+            return self._parse_table_streaming()
+
         # 1. Parse Resources
         resources = {} # UID -> Name
         res_wrapper = self.root.find(f"{self.ns}Resources") if self.ns else self.root.find("Resources")
         if res_wrapper:
             for r in res_wrapper.findall(f"{self.ns}Resource"):
-                uid = r.find(f"{self.ns}UID")
-                name = r.find(f"{self.ns}Name")
-                if uid is not None and name is not None:
-                    resources[uid.text] = name.text
+                self._read_resource(r, resources)
 
         # 2. Parse Assignments
-        task_resources = {} # TaskUID -> List[ResourceName]
+        assignments = [] # (TaskUID, ResourceUID)
         assign_wrapper = self.root.find(f"{self.ns}Assignments") if self.ns else self.root.find("Assignments")
         if assign_wrapper:
             for a in assign_wrapper.findall(f"{self.ns}Assignment"):
-                task_uid = a.find(f"{self.ns}TaskUID")
-                res_uid = a.find(f"{self.ns}ResourceUID")
-                if task_uid is not None and res_uid is not None:
-                    r_name = resources.get(res_uid.text)
-                    if r_name:
-                        if task_uid.text not in task_resources:
-                            task_resources[task_uid.text] = []
-                        task_resources[task_uid.text].append(r_name)
+                self._read_assignment(a, assignments)
 
         # 3. Parse Tasks
-        tasks = []
+        records = []
         task_tag = f"{self.ns}Task" if self.ns else "Task"
         tasks_wrapper_tag = f"{self.ns}Tasks" if self.ns else "Tasks"
-        
+
         tasks_wrapper = self.root.find(tasks_wrapper_tag)
         if tasks_wrapper is None:
             all_tasks = self.root.findall(f".//{task_tag}")
@@ -51,43 +73,148 @@ class MSProjectParser:
             all_tasks = tasks_wrapper.findall(task_tag)
 
         for t in all_tasks:
-            uid = t.find(f"{self.ns}UID")
-            name = t.find(f"{self.ns}Name")
-            start = t.find(f"{self.ns}Start")
-            finish = t.find(f"{self.ns}Finish")
-            duration_str = t.find(f"{self.ns}Duration")
-            percent_complete = t.find(f"{self.ns}PercentComplete")
-            
-            if uid is None or name is None:
+            self._read_task(t, records)
+
+        return self._build_table(records, resources, assignments)
+
+    def _parse_table_streaming(self) -> TaskTable:
+        """
+        Single iterparse pass over the document. Only compact per-record
+        tuples are kept; every Resource, Assignment and Task element is
+        detached from the tree as soon as it has been read.
+        """
+        resources = {}
+        assignments = []
+        wrapped_records = []
+        loose_records = []
+
+        # First root-level wrapper of each kind, mirroring root.find() above
+        wrappers = {"Resources": None, "Assignments": None, "Tasks": None}
+        stack = []
+
+        for event, elem in ET.iterparse(self._open_source(), events=("start", "end")):
+            if event == "start":
+                if not stack:
+                    self.ns = self._get_namespace(elem)
+                elif len(stack) == 1:
+                    local = elem.tag[len(self.ns):]
+                    if local in wrappers and wrappers[local] is None:
+                        wrappers[local] = elem
+                stack.append(elem)
                 continue
 
-            start_date = self._parse_date(start.text) if start is not None and start.text else None
-            finish_date = self._parse_date(finish.text) if finish is not None and finish.text else None
-            duration = self._parse_duration(duration_str.text) if duration_str is not None and duration_str.text else 0.0
-            
-            # Get resources for this task
-            t_res = task_resources.get(uid.text, [])
-
-            # Get predecessors
-            predecessors = []
-            pred_link_tag = f"{self.ns}PredecessorLink" if self.ns else "PredecessorLink"
-            for link in t.findall(pred_link_tag):
-                pred_uid = link.find(f"{self.ns}PredecessorUID")
-                if pred_uid is not None:
-                    predecessors.append(pred_uid.text)
-
-            tasks.append(Task(
-                id=uid.text,
-                name=name.text,
-                start_date=start_date,
-                finish_date=finish_date,
-                duration=duration,
-                percent_complete=int(percent_complete.text) if percent_complete is not None and percent_complete.text else 0,
-                resource_names=t_res,
-                predecessors=predecessors
-            ))
-        
-        return tasks
+            stack.pop()
+            if not stack:
+                break
+            parent = stack[-1]
+            local = elem.tag[len(self.ns):] if elem.tag.startswith(self.ns) else None
+
+            if local == "Resource" and parent is wrappers["Resources"]:
+                self._read_resource(elem, resources)
+            elif local == "Assignment" and parent is wrappers["Assignments"]:
+                self._read_assignment(elem, assignments)
+            elif local == "Task":
+                if parent is wrappers["Tasks"]:
+                    self._read_task(elem, wrapped_records)
+                elif wrappers["Tasks"] is None or wrappers["Tasks"] not in stack:
+                    self._read_task(elem, loose_records)
+                else:
+                    continue
+            elif len(stack) != 1:
+                # Keep children of records that are still open
+                continue
+
+            elem.clear()
+            parent.remove(elem)
+
+        records = wrapped_records if wrappers["Tasks"] is not None else loose_records
+        return self._build_table(records, resources, assignments)
+
+    def _open_source(self):
+        if isinstance(self.source, os.PathLike):
+            return self.source
+        if isinstance(self.source, str):
+            return io.StringIO(self.source)
+        if isinstance(self.source, bytes):
+            return io.BytesIO(self.source)
+        return self.source
+
+    def _read_resource(self, r, resources: Dict[str, str]):
+        uid = r.find(f"{self.ns}UID")
+        name = r.find(f"{self.ns}Name")
+        if uid is not None and name is not None:
+            resources[uid.text] = name.text
+
+    def _read_assignment(self, a, assignments: List[tuple]):
+        task_uid = a.find(f"{self.ns}TaskUID")
+        res_uid = a.find(f"{self.ns}ResourceUID")
+        if task_uid is not None and res_uid is not None:
+            assignments.append((task_uid.text, res_uid.text))
+
+    def _read_task(self, t, records: List[tuple]):
+        uid = t.find(f"{self.ns}UID")
+        name = t.find(f"{self.ns}Name")
+        start = t.find(f"{self.ns}Start")
+        finish = t.find(f"{self.ns}Finish")
+        duration_str = t.find(f"{self.ns}Duration")
+        percent_complete = t.find(f"{self.ns}PercentComplete")
+        summary = t.find(f"{self.ns}Summary")
+        wbs = t.find(f"{self.ns}WBS")
+        if wbs is None:
+            wbs = t.find(f"{self.ns}OutlineNumber")
+
+        if uid is None or name is None:
+            return
+
+        start_date = self._parse_date(start.text) if start is not None and start.text else None
+        finish_date = self._parse_date(finish.text) if finish is not None and finish.text else None
+        duration = self._parse_duration(duration_str.text) if duration_str is not None and duration_str.text else 0.0
+
+        # Get predecessors, with link type (default FS) and lag
+        predecessors = []
+        pred_types = []
+        pred_lags = []
+        pred_link_tag = f"{self.ns}PredecessorLink" if self.ns else "PredecessorLink"
+        for link in t.findall(pred_link_tag):
+            pred_uid = link.find(f"{self.ns}PredecessorUID")
+            if pred_uid is not None:
+                predecessors.append(pred_uid.text)
+                pred_types.append(self._parse_int(link.find(f"{self.ns}Type"), 1))
+                # LinkLag is expressed in tenths of a minute
+                pred_lags.append(self._parse_int(link.find(f"{self.ns}LinkLag"), 0) / 600.0)
+
+        records.append((
+            uid.text,
+            name.text,
+            start_date,
+            finish_date,
+            duration,
+            int(percent_complete.text) if percent_complete is not None and percent_complete.text else 0,
+            predecessors,
+            pred_types,
+            pred_lags,
+            summary is not None and summary.text == "1",
+            (wbs.text or "") if wbs is not None else "",
+            self._parse_int(t.find(f"{self.ns}OutlineLevel"), 1)
+        ))
+
+    def _build_table(self, records: List[tuple], resources: Dict[str, str], assignments: List[tuple]) -> TaskTable:
+        task_resources = {} # TaskUID -> List[ResourceName]
+        for task_uid, res_uid in assignments:
+            r_name = resources.get(res_uid)
+            if r_name:
+                if task_uid not in task_resources:
+                    task_resources[task_uid] = []
+                task_resources[task_uid].append(r_name)
+
+        builder = TaskTableBuilder()
+        for (uid, name, start_date, finish_date, duration, percent_complete, predecessors, pred_types, pred_lags,
+             summary, wbs, outline_level) in records:
+            builder.add(uid, name, start_date, finish_date, duration, percent_complete,
+                        task_resources.get(uid, []), predecessors, pred_types, pred_lags, summary,
+                        wbs, outline_level)
+
+        return builder.build()
 
     def _parse_date(self, date_str: str) -> datetime:
         try:
@@ -96,12 +223,18 @@ class MSProjectParser:
         except ValueError:
             return None
 
+    def _parse_int(self, element, default: int) -> int:
+        try:
+            return int(element.text)
+        except (AttributeError, TypeError, ValueError):
+            return default
+
     def _parse_duration(self, duration_str: str) -> float:
         # Format PT8H0M0S
         # Very basic parsing, assuming hours
         if not duration_str.startswith("PT"):
             return 0.0
-        
+
         try:
             # Remove PT
             val = duration_str[2:]
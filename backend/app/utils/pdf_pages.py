@@ -0,0 +1,71 @@
+import io
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterator, List, Optional
+import pdfplumber
+from app import config
+
+
+def _extract_range(path: str, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop); runs in a worker process."""
+    texts = []
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages[start:stop]:
+            texts.append(page.extract_text())
+            # Drop the parsed page objects, they are not needed again
+            page.close()
+    return texts
+
+
+def iter_page_texts(pdf_content: bytes,
+                    on_page: Optional[Callable[[int, int], None]] = None) -> Iterator[str]:
+    """
+    Yield page.extract_text() for every page, in page order.
+
+    Large documents are split into ranges of PDF_PAGES_PER_CHUNK pages that
+    are extracted in parallel on a process pool. A range is yielded as soon
+    as it and every range before it are done, so callers can process text
+    while later pages are still being read. on_page(pages_done, pages_total)
+    is called whenever pages finish extracting, in any order.
+    """
+    with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
+        total = len(pdf.pages)
+        if total <= config.PDF_PAGES_PER_CHUNK or config.PDF_WORKERS <= 1:
+            for number, page in enumerate(pdf.pages, 1):
+                text = page.extract_text()
+                page.close()
+                if on_page is not None:
+                    on_page(number, total)
+                yield text
+            return
+
+    # Workers open the document from disk rather than each receiving its bytes
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as out:
+        out.write(pdf_content)
+
+    # The pool lives for one document: this usually runs inside an analysis
+    # worker process, where a long-lived pool of its own would never be
+    # shut down and would keep that worker from exiting
+    chunk = config.PDF_PAGES_PER_CHUNK
+    pool = ProcessPoolExecutor(max_workers=min(config.PDF_WORKERS, -(-total // chunk)))
+    futures = {pool.submit(_extract_range, path, start, min(start + chunk, total)): start
+               for start in range(0, total, chunk)}
+    try:
+        ready = {}
+        next_start = 0
+        pages_done = 0
+        for future in as_completed(futures):
+            texts = future.result()
+            ready[futures[future]] = texts
+            pages_done += len(texts)
+            if on_page is not None:
+                on_page(pages_done, total)
+            while next_start in ready:
+                texts = ready.pop(next_start)
+                next_start += len(texts)
+                yield from texts
+    finally:
+        pool.shutdown(cancel_futures=True)
+        os.remove(path)
@@ -0,0 +1,257 @@
+import hashlib
+import html
+import json
+import re
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app import config
+from app.utils.chart_data import histogram, top_resources
+from app.utils.disk_cache import BlobCache
+from app.utils.evm import earned_value
+from app.utils.offload import Offloader
+from app.utils.task_table import TaskTable
+
+# Bump when the PDF layout changes so cached reports are rendered again
+REPORT_PDF_VERSION = 2
+
+CHART_TITLES = {
+    "pt": {
+        "risk": "Distribuição de Tarefas por Nível de Risco",
+        "resources": "Tarefas por Recurso",
+        "evm": "Curva S de Valor Agregado",
+        "duration": "Distribuição da Duração das Tarefas (h)",
+        "charts": "📊 GRÁFICOS",
+        "planned_value": "Valor Planejado (PV)",
+        "earned_value": "Valor Agregado (EV)",
+        "others": "Outros",
+    },
+    "es": {
+        "risk": "Distribución de Tareas por Nivel de Riesgo",
+        "resources": "Tareas por Recurso",
+        "evm": "Curva S de Valor Ganado",
+        "duration": "Distribución de la Duración de las Tareas (h)",
+        "charts": "📊 GRÁFICOS",
+        "planned_value": "Valor Planificado (PV)",
+        "earned_value": "Valor Ganado (EV)",
+        "others": "Otros",
+    },
+    "en": {
+        "risk": "Task Distribution by Risk Level",
+        "resources": "Tasks per Resource",
+        "evm": "Earned Value S-Curve",
+        "duration": "Task Duration Distribution (h)",
+        "charts": "📊 CHARTS",
+        "planned_value": "Planned Value (PV)",
+        "earned_value": "Earned Value (EV)",
+        "others": "Others",
+    },
+}
+
+RISK_COLORS = ["#21c354", "#7dd87d", "#ffa421", "#ff7a45", "#ff4b4b"]
+
+# A chart is placed after the first report section whose heading holds its marker
+SECTION_MARKERS = {"risk": "⚠️", "resources": "👥", "evm": "💰", "duration": "📈"}
+
+CSS = """
+@page { size: A4; margin: 2cm; }
+body { font-family: 'Helvetica', 'Arial', sans-serif; color: #31333F; line-height: 1.6; font-size: 12px; }
+h1 { color: #0e1117; border-bottom: 2px solid #ff4b4b; padding-bottom: 15px; font-size: 24px;
+     margin-bottom: 30px; text-transform: uppercase; letter-spacing: 1px; }
+h2 { color: #0e1117; margin-top: 30px; background-color: #f0f2f6; padding: 12px; border-radius: 8px;
+     font-size: 16px; border-left: 5px solid #ff4b4b; }
+h3 { color: #31333F; font-size: 14px; margin-top: 20px; border-bottom: 1px solid #e6e9ef; padding-bottom: 5px; }
+.chart-container { margin: 25px 0; text-align: center; page-break-inside: avoid; }
+.chart-title { font-weight: bold; margin-bottom: 15px; font-size: 14px; text-transform: uppercase; }
+.chart-img { width: 100%; max-width: 100%; }
+ul { padding-left: 20px; margin-bottom: 15px; }
+li { margin-bottom: 8px; }
+b, strong { color: #0e1117; font-weight: 600; }
+.footer { position: fixed; bottom: 0; left: 0; right: 0; text-align: center; font-size: 10px;
+          color: #808495; border-top: 1px solid #e6e9ef; padding-top: 10px; }
+"""
+
+
+def report_chart_specs(tasks: TaskTable, analysis: Dict[str, Any], language: str) -> List[Dict[str, Any]]:
+    """
+    Plain data for the charts of a PDF report, from the cached agent results
+    and the task table. Small enough to hash as part of the cache key.
+    """
+    titles = CHART_TITLES[language]
+    specs = []
+
+    distribution = analysis.get("risk_analysis", {}).get("risk_distribution", {})
+    if distribution:
+        specs.append({
+            "section": "risk", "kind": "bar", "title": titles["risk"],
+            "x": [f"{level}" for level in range(1, 6)],
+            "y": [distribution.get(f"level_{level}", 0) for level in range(1, 6)],
+            "colors": RISK_COLORS,
+        })
+
+    utilization = analysis.get("resource_analysis", {}).get("utilization", {})
+    if utilization:
+        top = top_resources(utilization)
+        others = [titles["others"]] if top["others_resources"] else []
+        specs.append({
+            "section": "resources", "kind": "bar", "title": titles["resources"],
+            "x": top["names"] + others, "y": top["counts"] + ([top["others_count"]] if others else []),
+        })
+
+    evm = earned_value(tasks)
+    if evm is not None:
+        dates = np.datetime_as_string(evm.dates, unit="D").tolist()
+        specs.append({
+            "section": "evm", "kind": "lines", "title": titles["evm"], "x": dates,
+            "series": {
+                titles["planned_value"]: np.round(evm.planned, 2).tolist(),
+                titles["earned_value"]: np.round(evm.earned, 2).tolist(),
+            },
+        })
+
+    bins = histogram(tasks.duration[~tasks.summary])
+    if bins["counts"]:
+        edges = bins["edges"]
+        specs.append({
+            "section": "duration", "kind": "bar", "title": titles["duration"],
+            "x": [round((a + b) / 2, 1) for a, b in zip(edges, edges[1:])], "y": bins["counts"],
+        })
+    return specs
+
+
+def report_cache_key(report: str, charts: List[Dict[str, Any]], language: str) -> str:
+    content = json.dumps({"report": report, "charts": charts, "language": language}, sort_keys=True)
+    return f"{hashlib.sha256(content.encode()).hexdigest()}-v{REPORT_PDF_VERSION}"
+
+
+def _inline(text: str) -> str:
+    text = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", html.escape(text))
+    return re.sub(r"\*(.+?)\*", r"<i>\1</i>", text)
+
+
+def _chart_html(title: str, png: str) -> str:
+    return (f'<div class="chart-container"><div class="chart-title">{html.escape(title)}</div>'
+            f'<img src="data:image/png;base64,{png}" class="chart-img"/></div>')
+
+
+def report_html(report: str, charts: List[Dict[str, Any]], images: List[str], language: str) -> str:
+    """
+    HTML page of a markdown text report (headings, bullet lists, emphasis, rules)
+    with every chart image placed after its section; charts whose section
+    the report lacks go at the end.
+    """
+    pending = list(zip(charts, images))
+    body: List[str] = []
+    in_list = False
+
+    def close_list():
+        nonlocal in_list
+        if in_list:
+            body.append("</ul>")
+            in_list = False
+
+    def close_section():
+        nonlocal pending
+        close_list()
+        if section_heading is None:
+            return
+        placed = [(c, png) for c, png in pending if SECTION_MARKERS[c["section"]] in section_heading]
+        body.extend(_chart_html(c["title"], png) for c, png in placed)
+        pending = [item for item in pending if item not in placed]
+
+    section_heading: Optional[str] = None
+    for line in report.splitlines():
+        line = line.strip()
+        if not line.startswith("- "):
+            close_list()
+        if line.startswith("## "):
+            close_section()
+            section_heading = line
+            body.append(f"<h2>{_inline(line[3:])}</h2>")
+        elif line.startswith("### "):
+            body.append(f"<h3>{_inline(line[4:])}</h3>")
+        elif line.startswith("# "):
+            body.append(f"<h1>{_inline(line[2:])}</h1>")
+        elif line.startswith("- "):
+            if not in_list:
+                body.append("<ul>")
+                in_list = True
+            body.append(f"<li>{_inline(line[2:])}</li>")
+        elif line == "---":
+            body.append("<hr/>")
+        elif line:
+            body.append(f"<p>{_inline(line)}</p>")
+    close_section()
+
+    if pending:
+        body.append(f"<h2>{html.escape(CHART_TITLES[language]['charts'])}</h2>")
+        body.extend(_chart_html(c["title"], png) for c, png in pending)
+
+    return (f'<html><head><meta charset="utf-8"><style>{CSS}</style></head><body>'
+            f'{"".join(body)}<div class="footer">Generated by Planus - Project Manager AI</div></body></html>')
+
+
+# Renderer state kept by every pdf_renderer worker between jobs
+_fonts = None
+
+
+def init_renderer():
+    """
+    Runs once per renderer worker: WeasyPrint's font configuration is built
+    once and Kaleido's browser process is started once, instead of on every
+    report.
+    """
+    global _fonts
+    # Failures here must not break the pool: render_report_pdf retries and
+    # reports them per request
+    try:
+        from weasyprint.text.fonts import FontConfiguration
+        _fonts = FontConfiguration()
+
+        import kaleido
+        import plotly.graph_objects as go
+        import plotly.io as pio
+        start = getattr(kaleido, "start_sync_server", None)
+        if start is not None:
+            # Kaleido 1.x: later exports reuse this browser
+            start()
+        # Kaleido 0.2 keeps its process alive after the first export
+        pio.to_image(go.Figure(), format="png", width=10, height=10)
+    except Exception:
+        pass
+
+
+def _chart_png(spec: Dict[str, Any]) -> str:
+    import base64
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    if spec["kind"] == "bar":
+        fig.add_bar(x=spec["x"], y=spec["y"], marker_color=spec.get("colors"))
+    else:
+        for name, values in spec["series"].items():
+            fig.add_scatter(x=spec["x"][:len(values)], y=values, mode="lines", name=name)
+    fig.update_layout(title=spec["title"], template="plotly_white")
+    return base64.b64encode(fig.to_image(format="png", width=800, height=400, scale=2)).decode("ascii")
+
+
+def render_report_pdf(report: str, charts: List[Dict[str, Any]], language: str) -> bytes:
+    """Charts and PDF of a text report; runs on pdf_renderer."""
+    if _fonts is None:
+        init_renderer()
+    if _fonts is None:
+        raise RuntimeError("PDF export needs WeasyPrint installed on the server")
+    from weasyprint import HTML
+
+    images = [_chart_png(spec) for spec in charts]
+    return HTML(string=report_html(report, charts, images, language)).write_pdf(font_config=_fonts)
+
+
+pdf_renderer = Offloader(
+    "process",
+    config.PDF_RENDER_WORKERS,
+    4 * config.PDF_RENDER_WORKERS,
+    config.OFFLOAD_TIMEOUT,
+    initializer=init_renderer
+)
+
+report_cache = BlobCache(config.REPORT_CACHE_DIR, config.REPORT_CACHE_MAX_BYTES, ".pdf")
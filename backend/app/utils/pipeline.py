@@ -0,0 +1,82 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+class Stage:
+    """
+    One step of a Pipeline. `func` is called with the results of the stages
+    listed in `depends_on`, passed as keyword arguments named after them.
+    """
+
+    def __init__(self, name: str, func: Callable[..., Any], depends_on: Sequence[str] = ()):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on)
+
+
+class Pipeline:
+    """
+    Runs a DAG of stages on a thread pool. A stage starts as soon as all of
+    its dependencies have finished, so independent stages run side by side
+    and end-to-end latency tracks the slowest dependency chain rather than
+    the sum of all stages.
+
+    `on_event(stage_name, status, **detail)` is called as stages progress:
+    "pending" for every stage when the run starts, then "running", and
+    finally "done" (with `seconds`) or "failed".
+    """
+
+    def __init__(self, stages: List[Stage], max_workers: Optional[int] = None,
+                 on_event: Optional[Callable[..., None]] = None):
+        self.stages = {s.name: s for s in stages}
+        self.max_workers = max_workers
+        self.on_event = on_event
+        for s in stages:
+            missing = [d for d in s.depends_on if d not in self.stages]
+            if missing:
+                raise ValueError(f"Stage '{s.name}' depends on unknown stages: {missing}")
+
+    def run(self) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Returns (results, timings): stage results by name and the wall time
+        of every stage in seconds. The first failing stage's exception is
+        re-raised after the stages already running have finished.
+        """
+        results: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+        waiting = dict(self.stages)
+        running = {}
+        for name in self.stages:
+            self._emit(name, "pending")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while waiting or running:
+                for name, stage in list(waiting.items()):
+                    if all(d in results for d in stage.depends_on):
+                        del waiting[name]
+                        kwargs = {d: results[d] for d in stage.depends_on}
+                        running[pool.submit(self._timed, stage, kwargs)] = name
+                        self._emit(name, "running")
+
+                if not running:
+                    raise ValueError(f"Pipeline has a dependency cycle between: {sorted(waiting)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        self._emit(name, "failed")
+                    results[name], timings[name] = future.result()
+                    self._emit(name, "done", seconds=round(timings[name], 4))
+
+        return results, timings
+
+    def _emit(self, name: str, status: str, **detail):
+        if self.on_event is not None:
+            self.on_event(name, status, **detail)
+
+    def _timed(self, stage: Stage, kwargs: Dict[str, Any]) -> Tuple[Any, float]:
+        started = time.perf_counter()
+        result = stage.func(**kwargs)
+        return result, time.perf_counter() - started
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import IO, Any, Dict, Optional, Tuple
+from app import config
+from app.utils.task_table import TaskTable
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def spool_upload(file: IO[bytes], suffix: str = "") -> Tuple[str, str]:
+    """
+    Copy a binary file object to a named temporary file, hashing it on the
+    way. Returns (sha256, path); the caller removes the file. Worker
+    processes open the path themselves instead of receiving the bytes.
+    """
+    digest = hashlib.sha256()
+    file.seek(0)
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    file.seek(0)
+    return digest.hexdigest(), path
+
+
+class ProjectStore:
+    """
+    Content-addressed cache of parsed schedules.
+
+    The project id is the hash of the uploaded file, so identical uploads are
+    parsed once and later requests refer to the project by id instead of
+    posting the task list back. Least recently used projects are evicted.
+    """
+
+    def __init__(self, max_projects: int):
+        self.max_projects = max_projects
+        self._projects: "OrderedDict[str, TaskTable]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, project_id: str) -> Optional[TaskTable]:
+        with self._lock:
+            table = self._projects.get(project_id)
+            if table is not None:
+                self._projects.move_to_end(project_id)
+            return table
+
+    def put(self, project_id: str, table: TaskTable):
+        with self._lock:
+            self._projects[project_id] = table
+            self._projects.move_to_end(project_id)
+            while len(self._projects) > self.max_projects:
+                self._projects.popitem(last=False)
+
+    def __contains__(self, project_id: str) -> bool:
+        with self._lock:
+            return project_id in self._projects
+
+
+class AnalysisStore:
+    """
+    Agent results of recent analyses, keyed by (project_id, contract_id)
+    where contract_id is the hash of the contract file, or None for a
+    schedule-only analysis. Each entry holds the report inputs under
+    "analysis" and the text reports rendered so far under "reports", so a
+    report in another language can be produced without rerunning the agents.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, project_id: str, contract_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get((project_id, contract_id))
+            if entry is not None:
+                self._entries.move_to_end((project_id, contract_id))
+            return entry
+
+    def put(self, project_id: str, contract_id: Optional[str], analysis: Dict[str, Any],
+            reports: Dict[str, str]):
+        key = (project_id, contract_id)
+        with self._lock:
+            self._entries[key] = {"analysis": analysis, "reports": dict(reports)}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def add_report(self, project_id: str, contract_id: Optional[str], language: str, report: str):
+        with self._lock:
+            entry = self._entries.get((project_id, contract_id))
+            if entry is not None:
+                entry["reports"][language] = report
+
+
+project_store = ProjectStore(config.PROJECT_CACHE_SIZE)
+analysis_store = AnalysisStore(config.ANALYSIS_CACHE_SIZE)
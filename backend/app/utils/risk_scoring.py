@@ -0,0 +1,189 @@
+from datetime import datetime
+from typing import List
+import numpy as np
+from app.utils.messages import formatter
+from app.utils.task_table import TaskTable
+
+# Risk factor message codes; bit i of a factor mask is FACTOR_CODES[i]. The
+# order is the order in which factors are listed for a task.
+FACTOR_CODES = [
+    "risk.overdue",
+    "risk.recent_overdue",
+    "risk.behind_schedule",
+    "risk.lagging",
+    "risk.long_duration",
+    "risk.no_resources",
+    "risk.should_start",
+    "risk.start_passed",
+    "risk.approaching_deadline",
+    "risk.approaching_low",
+    "risk.completed",
+    "risk.ample_time",
+    "risk.good_progress",
+]
+(OVERDUE, RECENT_OVERDUE, BEHIND_SCHEDULE, LAGGING, LONG_DURATION, NO_RESOURCES, SHOULD_START,
+ START_PASSED, APPROACHING_DEADLINE, APPROACHING_LOW, COMPLETED, AMPLE_TIME, GOOD_PROGRESS) = (
+    1 << i for i in range(len(FACTOR_CODES)))
+
+# Bits whose message quotes task numbers
+_PARAMETRIZED = {FACTOR_CODES.index(code) for code in (
+    "risk.overdue", "risk.recent_overdue", "risk.behind_schedule", "risk.long_duration",
+    "risk.should_start", "risk.approaching_deadline")}
+
+# Lower bound of the total score for levels 2..5
+LEVEL_THRESHOLDS = [1, 2, 4, 6]
+
+
+class RiskScores:
+    """
+    Risk level (1-5) and factor bitmask of every task, plus the numbers the
+    factor messages quote, all aligned with the table.
+    """
+
+    def __init__(self, level: np.ndarray, factors: np.ndarray, percent_complete: np.ndarray,
+                 days_overdue: np.ndarray, time_progress: np.ndarray, duration_days: np.ndarray,
+                 days_since_start: np.ndarray, days_remaining: np.ndarray):
+        self.level = level
+        self.factors = factors
+        self.percent_complete = percent_complete
+        self.days_overdue = days_overdue
+        self.time_progress = time_progress
+        self.duration_days = duration_days
+        self.days_since_start = days_since_start
+        self.days_remaining = days_remaining
+        self._bits_by_mask = {}
+
+    def distribution(self) -> np.ndarray:
+        """Task count per level; entry 0 is level 1."""
+        return np.bincount(self.level - 1, minlength=5)[:5]
+
+    def render_factors(self, language: str = "en") -> List[List[str]]:
+        """Factor texts of every task; fixed texts are rendered once per language."""
+        formatters = [formatter(code, language) for code in FACTOR_CODES]
+        fixed = [None if b in _PARAMETRIZED else formatters[b]() for b in range(len(FACTOR_CODES))]
+        columns = _ParamColumns(self)
+        rendered = []
+        for i, mask in enumerate(self.factors.tolist()):
+            rendered.append([
+                fixed[b] if fixed[b] is not None else formatters[b](*columns.params(b, i))
+                for b in self._bits(mask)
+            ])
+        return rendered
+
+    def _bits(self, mask: int) -> List[int]:
+        bits = self._bits_by_mask.get(mask)
+        if bits is None:
+            bits = self._bits_by_mask[mask] = [b for b in range(len(FACTOR_CODES)) if mask >> b & 1]
+        return bits
+
+
+class _ParamColumns:
+    """The numbers factor messages quote, as plain int lists."""
+
+    def __init__(self, scores: RiskScores):
+        self.percent_complete = scores.percent_complete.tolist()
+        self.days_overdue = scores.days_overdue.tolist()
+        self.time_progress = scores.time_progress.tolist()
+        self.duration_days = scores.duration_days.tolist()
+        self.days_since_start = scores.days_since_start.tolist()
+        self.days_remaining = scores.days_remaining.tolist()
+
+    def params(self, bit: int, i: int) -> tuple:
+        factor = 1 << bit
+        if factor in (OVERDUE, RECENT_OVERDUE):
+            return (self.days_overdue[i],)
+        if factor == BEHIND_SCHEDULE:
+            return (self.percent_complete[i], self.time_progress[i])
+        if factor == LONG_DURATION:
+            return (self.duration_days[i],)
+        if factor == SHOULD_START:
+            return (self.days_since_start[i],)
+        if factor == APPROACHING_DEADLINE:
+            return (self.days_remaining[i], self.percent_complete[i])
+        return ()
+
+
+def score_risks(table: TaskTable, now: datetime) -> RiskScores:
+    """
+    Score every task at once. Each factor is a boolean mask over the task
+    columns; its points go into one score array and its bit into one mask
+    array. Day counts are whole days, floored like timedelta.days.
+    """
+    n = len(table)
+    now64 = np.datetime64(now, "us")
+    one_day = np.timedelta64(1, "D")
+    pct = table.percent_complete
+    has_start = ~np.isnat(table.start)
+    has_finish = ~np.isnat(table.finish)
+    # NaT dates are masked out below; fill them so the arithmetic stays defined
+    start = np.where(has_start, table.start, now64)
+    finish = np.where(has_finish, table.finish, now64)
+
+    score = np.zeros(n, dtype=np.int64)
+    factors = np.zeros(n, dtype=np.int64)
+
+    def add(mask, points, bit):
+        score[mask] += points
+        factors[mask] |= bit
+
+    # Factor 1: Already delayed?
+    days_overdue = (now64 - finish) // one_day
+    overdue = has_finish & (finish < now64) & (pct < 100)
+    add(overdue & (days_overdue > 30), 3, OVERDUE)
+    add(overdue & (days_overdue > 7) & (days_overdue <= 30), 2, OVERDUE)
+    add(overdue & (days_overdue <= 7), 1, RECENT_OVERDUE)
+
+    # Factor 2: Progress vs Time Elapsed
+    total_seconds = (finish - start).astype(np.int64) / 1e6
+    elapsed_seconds = (now64 - start).astype(np.int64) / 1e6
+    started = has_start & has_finish & (start <= now64) & (total_seconds > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        time_ratio = np.where(started, np.minimum(elapsed_seconds / total_seconds, 1.0), 0.0)
+    progress_gap = time_ratio - pct / 100.0
+    checked = started & (time_ratio > 0.1)
+    add(checked & (progress_gap > 0.4), 2, BEHIND_SCHEDULE)
+    add(checked & (progress_gap > 0.2) & (progress_gap <= 0.4), 1, LAGGING)
+    time_progress = (time_ratio * 100).astype(np.int64)
+
+    # Factor 3: Task duration (longer tasks = higher risk)
+    add(table.duration > 60, 1, LONG_DURATION)
+
+    # Factor 4: No resources assigned
+    add(np.diff(table.res_indptr) == 0, 1, NO_RESOURCES)
+
+    # Factor 5: Not started but should have started
+    days_since_start = (now64 - start) // one_day
+    not_started = has_start & (start < now64) & (pct == 0)
+    add(not_started & (days_since_start > 7), 2, SHOULD_START)
+    add(not_started & (days_since_start <= 7), 1, START_PASSED)
+
+    # Factor 6: Approaching deadline with low completion
+    days_remaining = (finish - now64) // one_day
+    upcoming = has_finish & (finish > now64)
+    closing = upcoming & (days_remaining <= 7) & (pct < 80)
+    add(closing, 2, APPROACHING_DEADLINE)
+    add(upcoming & ~closing & (days_remaining <= 14) & (pct < 50), 1, APPROACHING_LOW)
+
+    # Convert score to 1-5 level
+    level = np.searchsorted(LEVEL_THRESHOLDS, score, side="right") + 1
+
+    # Override: If task is completed, risk is always 1
+    completed = pct >= 100
+    level[completed] = 1
+    factors[completed] = COMPLETED
+
+    # Add positive factors for low risk
+    positive = (level <= 2) & (pct > 0)
+    factors[positive & upcoming & (days_remaining > 30)] |= AMPLE_TIME
+    factors[positive & (pct >= 50)] |= GOOD_PROGRESS
+
+    return RiskScores(
+        level,
+        factors,
+        pct,
+        days_overdue,
+        time_progress,
+        table.duration.astype(np.int64),
+        days_since_start,
+        days_remaining
+    )
@@ -0,0 +1,233 @@
+from datetime import datetime
+from typing import List, Dict, Optional, Union, Iterator, NamedTuple
+import numpy as np
+import pandas as pd
+from app.models import Task
+
+
+def isoformat(dates: np.ndarray) -> List[Optional[str]]:
+    """datetime.isoformat() of a datetime64[us] column, None for NaT."""
+    text = np.datetime_as_string(dates, unit="s")
+    # isoformat() only shows microseconds when there are any
+    fractional = np.flatnonzero(dates.astype(np.int64) % 1_000_000 != 0)
+    text[fractional] = np.datetime_as_string(dates[fractional], unit="us")
+    result = text.tolist()
+    for i in np.flatnonzero(np.isnat(dates)).tolist():
+        result[i] = None
+    return result
+
+
+class TaskRow(NamedTuple):
+    """Plain tuple view of one table row, with the same field names as Task."""
+    id: str
+    name: str
+    start_date: Optional[datetime]
+    finish_date: Optional[datetime]
+    duration: float
+    percent_complete: int
+    resource_names: List[str]
+    predecessors: List[str]
+
+
+class TaskTable:
+    """
+    Columnar, array-backed representation of a project schedule.
+
+    This is what the parser emits and what every agent works on. Pydantic
+    Task objects are only built at the API boundary (see to_tasks/from_tasks).
+
+    Columns (one entry per task, in schedule order):
+        ids, names: object arrays of str
+        start, finish: datetime64[us], NaT when the date is missing
+        duration: float64 hours
+        percent_complete: int64
+        summary: bool, MSPDI summary (roll-up) tasks
+        wbs: object array of str, the WBS code ("1.2.3"), "" when missing
+        outline_level: int64, depth in the outline (1 for top-level tasks)
+
+    Resource assignments are stored CSR-style: the resource indices of task i
+    are res_indices[res_indptr[i]:res_indptr[i + 1]], pointing into
+    `resources` (unique names, in order of first appearance).
+
+    Predecessors use the same layout: pred_ids holds the raw predecessor UIDs
+    and pred_index the matching task positions (-1 when the UID is unknown),
+    with the MSPDI link type (0=FF, 1=FS, 2=SF, 3=SS) in pred_type and the
+    link lag in hours in pred_lag.
+    """
+
+    def __init__(self, ids: np.ndarray, names: np.ndarray, start: np.ndarray, finish: np.ndarray,
+                 duration: np.ndarray, percent_complete: np.ndarray, summary: np.ndarray,
+                 resources: np.ndarray, res_indptr: np.ndarray, res_indices: np.ndarray,
+                 pred_indptr: np.ndarray, pred_ids: np.ndarray, pred_index: np.ndarray,
+                 pred_type: np.ndarray, pred_lag: np.ndarray,
+                 wbs: Optional[np.ndarray] = None, outline_level: Optional[np.ndarray] = None):
+        self.ids = ids
+        self.names = names
+        self.start = start
+        self.finish = finish
+        self.duration = duration
+        self.percent_complete = percent_complete
+        self.summary = summary
+        self.resources = resources
+        self.res_indptr = res_indptr
+        self.res_indices = res_indices
+        self.pred_indptr = pred_indptr
+        self.pred_ids = pred_ids
+        self.pred_index = pred_index
+        self.pred_type = pred_type
+        self.pred_lag = pred_lag
+        if wbs is None:
+            wbs = np.full(len(ids), "", dtype=object)
+        if outline_level is None:
+            outline_level = np.ones(len(ids), dtype=np.int64)
+        self.wbs = wbs
+        self.outline_level = outline_level
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def res_task_index(self) -> np.ndarray:
+        """Task position of every assignment, aligned with res_indices."""
+        return np.repeat(np.arange(len(self.ids)), np.diff(self.res_indptr))
+
+    def task_resources(self, i: int) -> List[str]:
+        return self.resources[self.res_indices[self.res_indptr[i]:self.res_indptr[i + 1]]].tolist()
+
+    def task_predecessors(self, i: int) -> List[str]:
+        return self.pred_ids[self.pred_indptr[i]:self.pred_indptr[i + 1]].tolist()
+
+    def iter_rows(self) -> Iterator[TaskRow]:
+        starts = self.start.astype(object)
+        finishes = self.finish.astype(object)
+        durations = self.duration.tolist()
+        percents = self.percent_complete.tolist()
+        for i in range(len(self.ids)):
+            yield TaskRow(
+                self.ids[i],
+                self.names[i],
+                starts[i],
+                finishes[i],
+                durations[i],
+                percents[i],
+                self.task_resources(i),
+                self.task_predecessors(i)
+            )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Scalar columns as a DataFrame (list columns are left out)."""
+        return pd.DataFrame({
+            "id": self.ids,
+            "name": self.names,
+            "start_date": self.start,
+            "finish_date": self.finish,
+            "duration": self.duration,
+            "percent_complete": self.percent_complete
+        })
+
+    def to_tasks(self) -> List[Task]:
+        return [Task(**row._asdict()) for row in self.iter_rows()]
+
+    @classmethod
+    def from_tasks(cls, tasks: List[Task]) -> "TaskTable":
+        builder = TaskTableBuilder()
+        for t in tasks:
+            builder.add(t.id, t.name, t.start_date, t.finish_date, t.duration,
+                        t.percent_complete, t.resource_names, t.predecessors)
+        return builder.build()
+
+    @classmethod
+    def coerce(cls, tasks: Union["TaskTable", List[Task]]) -> "TaskTable":
+        """Accept either a table or a list of Task models."""
+        if isinstance(tasks, TaskTable):
+            return tasks
+        return cls.from_tasks(tasks)
+
+
+class TaskTableBuilder:
+    """Accumulates task records row by row and packs them into a TaskTable."""
+
+    def __init__(self):
+        self._ids = []
+        self._names = []
+        self._start = []
+        self._finish = []
+        self._duration = []
+        self._percent = []
+        self._summary = []
+        self._wbs = []
+        self._outline_level = []
+        self._resource_ids: Dict[str, int] = {}
+        self._res_indptr = [0]
+        self._res_indices = []
+        self._pred_indptr = [0]
+        self._pred_ids = []
+        self._pred_type = []
+        self._pred_lag = []
+
+    def add(self, uid: str, name: str, start_date: Optional[datetime], finish_date: Optional[datetime],
+            duration: float, percent_complete: int, resource_names: List[str], predecessors: List[str],
+            predecessor_types: Optional[List[int]] = None, predecessor_lags: Optional[List[float]] = None,
+            summary: bool = False, wbs: str = "", outline_level: int = 1):
+        """Append one task. Links default to finish-to-start with no lag."""
+        self._ids.append(uid)
+        self._names.append(name)
+        self._start.append(self._naive(start_date))
+        self._finish.append(self._naive(finish_date))
+        self._duration.append(duration)
+        self._percent.append(percent_complete)
+        self._summary.append(summary)
+        self._wbs.append(wbs)
+        self._outline_level.append(outline_level)
+
+        for r in resource_names:
+            idx = self._resource_ids.get(r)
+            if idx is None:
+                idx = self._resource_ids[r] = len(self._resource_ids)
+            self._res_indices.append(idx)
+        self._res_indptr.append(len(self._res_indices))
+
+        self._pred_ids.extend(predecessors)
+        self._pred_type.extend(predecessor_types if predecessor_types is not None else [1] * len(predecessors))
+        self._pred_lag.extend(predecessor_lags if predecessor_lags is not None else [0.0] * len(predecessors))
+        self._pred_indptr.append(len(self._pred_ids))
+
+    def build(self) -> TaskTable:
+        positions = {}
+        for i, uid in enumerate(self._ids):
+            positions.setdefault(uid, i)
+        pred_index = [positions.get(uid, -1) for uid in self._pred_ids]
+
+        return TaskTable(
+            ids=self._object_array(self._ids),
+            names=self._object_array(self._names),
+            start=np.array(self._start, dtype="datetime64[us]"),
+            finish=np.array(self._finish, dtype="datetime64[us]"),
+            duration=np.array(self._duration, dtype=np.float64),
+            percent_complete=np.array(self._percent, dtype=np.int64),
+            summary=np.array(self._summary, dtype=bool),
+            resources=self._object_array(list(self._resource_ids)),
+            res_indptr=np.array(self._res_indptr, dtype=np.int64),
+            res_indices=np.array(self._res_indices, dtype=np.int64),
+            pred_indptr=np.array(self._pred_indptr, dtype=np.int64),
+            pred_ids=self._object_array(self._pred_ids),
+            pred_index=np.array(pred_index, dtype=np.int64),
+            pred_type=np.array(self._pred_type, dtype=np.int8),
+            pred_lag=np.array(self._pred_lag, dtype=np.float64),
+            wbs=self._object_array(self._wbs),
+            outline_level=np.array(self._outline_level, dtype=np.int64)
+        )
+
+    @staticmethod
+    def _naive(value: Optional[datetime]) -> Optional[datetime]:
+        # datetime64 has no timezone; keep the wall-clock time
+        if value is not None and value.tzinfo is not None:
+            return value.replace(tzinfo=None)
+        return value
+
+    @staticmethod
+    def _object_array(values: list) -> np.ndarray:
+        # np.array() would try to broadcast nested sequences
+        arr = np.empty(len(values), dtype=object)
+        arr[:] = values
+        return arr
@@ -0,0 +1,74 @@
+from typing import Dict, List, Pattern
+
+
+class IncrementalScanner:
+    """
+    Runs pattern.findall() over text that arrives in pieces, giving the same
+    matches as one findall() over the joined text.
+
+    Patterns must be free of anchors and lookbehinds, every piece must end
+    with a newline (as page texts joined by "\\n" do), and a match may span
+    at most `max_lines` non-blank lines. A match attempt can only depend on
+    text that has not arrived yet through a whitespace run reaching the end
+    of the buffer, so attempts starting before the last max_lines - 1
+    non-blank lines are final. The rest stays buffered until the next piece
+    or close().
+    """
+
+    def __init__(self, patterns: Dict[str, Pattern], max_lines: int = 4):
+        self.patterns = patterns
+        self.max_lines = max_lines
+        self.results: Dict[str, List[str]] = {name: [] for name in patterns}
+        self._buffer = ""
+        # Per pattern, where in the buffer its next scan starts
+        self._resume = {name: 0 for name in patterns}
+
+    def feed(self, text: str):
+        self._buffer += text
+        safe = self._safe_end()
+        for name, pattern in self.patterns.items():
+            match = pattern.search(self._buffer, self._resume[name])
+            while match is not None and match.start() < safe:
+                self._accept(name, match)
+                self._resume[name] = self._resume_at(match)
+                match = pattern.search(self._buffer, self._resume[name])
+            self._resume[name] = max(self._resume[name], safe)
+
+        # Keep only the part some pattern still has to scan
+        keep = min(self._resume.values())
+        if keep:
+            self._buffer = self._buffer[keep:]
+            self._resume = {name: pos - keep for name, pos in self._resume.items()}
+
+    def close(self) -> Dict[str, List[str]]:
+        for name, pattern in self.patterns.items():
+            match = pattern.search(self._buffer, self._resume[name])
+            while match is not None:
+                self._accept(name, match)
+                match = pattern.search(self._buffer, self._resume_at(match))
+        self._buffer = ""
+        return self.results
+
+    def _accept(self, name: str, match):
+        """Record a final match; subclasses can keep more than group 1."""
+        self.results[name].append(match.group(1))
+
+    def _resume_at(self, match) -> int:
+        """Where scanning continues after a match; findall() goes on at its end."""
+        return match.end()
+
+    def _safe_end(self) -> int:
+        """Start of the (max_lines - 1)-th last non-blank line, 0 if there are fewer."""
+        text = self._buffer
+        end = len(text)
+        remaining = self.max_lines - 1
+        if remaining <= 0:
+            return end
+        while end > 0:
+            start = text.rfind("\n", 0, end - 1) + 1
+            if text[start:end] and not text[start:end].isspace():
+                remaining -= 1
+                if remaining <= 0:
+                    return start
+            end = start
+        return 0
@@ -0,0 +1,80 @@
+"""
+Compare two benchmark result files written by run.py.
+
+Prints, for every size and step the two runs share, the time and peak
+memory of each and the ratio new / old. Ratios beyond --threshold are
+flagged, and the exit status is 1 when any step got slower by more than
+that, so the script can gate a CI job.
+
+    python benchmarks/compare.py baseline.json benchmark-results.json --threshold 1.2
+"""
+import argparse
+import json
+import sys
+from typing import Optional
+
+
+def _ratio(old: Optional[float], new: Optional[float]) -> Optional[float]:
+    if old is None or new is None or old <= 0:
+        return None
+    return new / old
+
+
+def _cell(value: Optional[float], scale: float, unit: str) -> str:
+    return f"{value / scale:10.3f}{unit}" if value is not None else f"{'-':>10}{unit}"
+
+
+def _flag(ratio: Optional[float], threshold: float) -> str:
+    if ratio is None:
+        return f"{'':9}"
+    mark = " !" if ratio > threshold else ("  " if ratio >= 1 / threshold else " +")
+    return f"{ratio:7.2f}{mark}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="ratio flagged as a regression (or, inverted, an improvement)")
+    args = parser.parse_args()
+
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"old: {old.get('git_commit')} {old.get('created')}")
+    print(f"new: {new.get('git_commit')} {new.get('created')}")
+
+    slower = []
+    for size, new_size in new["sizes"].items():
+        old_size = old["sizes"].get(size)
+        if old_size is None:
+            continue
+        print(f"\n{size} tasks")
+        print(f"  {'step':<50} {'old s':>11} {'new s':>11} {'ratio':>9} {'old MiB':>12} {'new MiB':>12} {'ratio':>9}")
+        for step, result in new_size["steps"].items():
+            before = old_size["steps"].get(step)
+            if before is None:
+                continue
+            if "error" in result or "error" in before:
+                failed = "both" if "error" in result and "error" in before else "new" if "error" in result else "old"
+                print(f"  {step:<50} {'failed in ' + failed:>34}")
+                continue
+            time_ratio = _ratio(before["seconds"], result["seconds"])
+            memory_ratio = _ratio(before["peak_bytes"], result["peak_bytes"])
+            if time_ratio is not None and time_ratio > args.threshold:
+                slower.append(f"{size}/{step}")
+            print(f"  {step:<50} {_cell(before['seconds'], 1, ' ')}{_cell(result['seconds'], 1, ' ')}"
+                  f"{_flag(time_ratio, args.threshold)} "
+                  f"{_cell(before['peak_bytes'], 2 ** 20, '  ')}{_cell(result['peak_bytes'], 2 ** 20, '  ')}"
+                  f"{_flag(memory_ratio, args.threshold)}")
+
+    if slower:
+        print(f"\nSlower than {args.threshold}x: {', '.join(slower)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Deterministic synthetic DOCX contracts matching generate_schedule.py.
+
+Activities quote names of the schedule's detail tasks (plus a share that
+is missing from the schedule), with deadlines around the tasks' dates,
+deliverables and responsible resources. Half of them are written as
+clause paragraphs and half as rows of a table, with filler prose in
+between, so both extraction paths of ContractAnalyst.parse_contract_docx
+are exercised.
+
+    python benchmarks/generate_contract.py 100000 contract.docx --activities 2000
+"""
+import argparse
+import random
+import zipfile
+from datetime import timedelta
+from typing import IO, List
+from xml.sax.saxutils import escape
+from generate_schedule import ScheduleSpec, add_spec_arguments, spec_from_arguments, task_name
+
+WORD_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+RELATIONSHIPS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/></Relationships>'
+)
+
+# Clause-free prose; none of it may contain a clause keyword followed by ":" or "-"
+FILLER = [
+    "The contractor shall perform the works in accordance with the approved execution plan.",
+    "O contratado executará os serviços conforme as normas técnicas aplicáveis.",
+    "El contratista mantendrá el sitio limpio y seguro durante toda la ejecución.",
+    "Measurements are taken monthly and approved by the owner within ten days.",
+]
+DELIVERABLES = ["As-built drawings", "Inspection report", "Test certificate", "Relatório técnico",
+                "Memorial descritivo", "Acta de recepción"]
+MISSING_WORDS = ["Mobilize", "Demobilize", "Train operators for", "Audit", "Relocate"]
+
+# Activities written as one table instead of paragraphs
+TABLE_SHARE = 0.5
+
+
+def _paragraph(text: str) -> str:
+    return f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(text)}</w:t></w:r></w:p>"
+
+
+def _row(cells: List[str]) -> str:
+    return "<w:tr>" + "".join(f"<w:tc>{_paragraph(cell)}</w:tc>" for cell in cells) + "</w:tr>"
+
+
+def _activities(spec: ScheduleSpec, count: int, missing: float, rng: random.Random) -> List[tuple]:
+    """(name, deadline, deliverable, responsible) of every contract activity, in schedule order."""
+    count = min(count, spec.tasks)
+    activities = []
+    for i in sorted(rng.sample(range(spec.tasks), count)):
+        deadline = spec.slot(i) + timedelta(days=spec.jitter_days + rng.randint(5, 60))
+        if rng.random() < missing:
+            name = f"{rng.choice(MISSING_WORDS)} {task_name(i).split(' - ')[0].split(' ', 1)[1]} - Lot {i + 1}"
+        else:
+            name = task_name(i)
+        responsible = spec.resource_name(int(spec.resources * rng.random() ** 1.5))
+        activities.append((name, deadline, rng.choice(DELIVERABLES), responsible))
+    return activities
+
+
+def _write_document(out: IO[bytes], activities: List[tuple], filler: int, rng: random.Random):
+    def write(text: str):
+        out.write(text.encode("utf-8"))
+
+    write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document xmlns:w="{WORD_NAMESPACE}"><w:body>')
+    write(_paragraph("CONTRATO DE PRESTAÇÃO DE SERVIÇOS DE ENGENHARIA"))
+    split = int(len(activities) * (1 - TABLE_SHARE))
+    for number, (name, deadline, deliverable, responsible) in enumerate(activities[:split], start=1):
+        write(_paragraph(f"Cláusula {number}"))
+        write(_paragraph(f"Activity: {name}"))
+        write(_paragraph(f"Deadline: {deadline:%d/%m/%Y}"))
+        write(_paragraph(f"Deliverable: {deliverable}"))
+        write(_paragraph(f"Responsible: {responsible}"))
+        for _ in range(filler):
+            write(_paragraph(rng.choice(FILLER)))
+
+    if activities[split:]:
+        write(_paragraph("Anexo I"))
+        write("<w:tbl>")
+        write(_row(["Atividade", "Prazo", "Entregável", "Responsável"]))
+        for name, deadline, deliverable, responsible in activities[split:]:
+            write(_row([name, f"{deadline:%Y-%m-%d}", deliverable, responsible]))
+        write("</w:tbl>")
+    write("</w:body></w:document>")
+
+
+def generate_contract(path: str, spec: ScheduleSpec, activities: int = 200, missing: float = 0.1,
+                      filler: int = 2):
+    """Write a DOCX contract for the schedule of `spec` to path."""
+    rng = random.Random(f"{spec.seed}-contract")
+    rows = _activities(spec, activities, missing, rng)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr(_entry("[Content_Types].xml"), CONTENT_TYPES)
+        docx.writestr(_entry("_rels/.rels"), RELATIONSHIPS)
+        with docx.open(_entry("word/document.xml"), "w", force_zip64=True) as out:
+            _write_document(out, rows, filler, rng)
+
+
+def _entry(name: str) -> zipfile.ZipInfo:
+    # Fixed timestamp, so the same arguments give the same bytes
+    info = zipfile.ZipInfo(name, date_time=(2024, 1, 1, 0, 0, 0))
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("tasks", type=int, help="detail tasks of the matching schedule")
+    parser.add_argument("output")
+    parser.add_argument("--activities", type=int, default=200)
+    parser.add_argument("--missing", type=float, default=0.1, help="share of activities not in the schedule")
+    parser.add_argument("--filler", type=int, default=2, help="prose paragraphs after every clause")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+    generate_contract(args.output, spec_from_arguments(args.tasks, args), args.activities, args.missing, args.filler)
@@ -0,0 +1,263 @@
+"""
+Deterministic synthetic MS Project (MSPDI) schedules for the benchmarks.
+
+The same arguments always produce the same file. Detail tasks sit at the
+deepest WBS level under summary tasks, their start dates spread evenly
+over the schedule with some jitter, and their progress follows a status
+date part-way through the schedule, so some finished tasks are overdue.
+Links point back to recent tasks, mostly finish-to-start.
+
+    python benchmarks/generate_schedule.py 100000 schedule.xml --resources 2000 --seed 1
+"""
+import argparse
+import math
+import random
+from datetime import datetime, timedelta
+from typing import IO, Iterator, List
+from xml.sax.saxutils import escape
+
+MSPDI_NAMESPACE = "http://schemas.microsoft.com/project"
+
+VERBS = ["Install", "Pour", "Inspect", "Excavate", "Assemble", "Paint", "Test", "Survey",
+         "Weld", "Backfill", "Commission", "Design", "Instalar", "Concretar", "Montar", "Revisar"]
+OBJECTS = ["foundation", "slab", "steel frame", "pipe rack", "cable tray", "pump skid", "roof deck",
+           "drainage", "fundação", "laje", "estrutura", "tubulação", "cimentación", "tubería"]
+AREAS = ["Block", "Unit", "Area", "Bloco", "Setor", "Zona"]
+ROLES = ["Civil Crew", "Electrician", "Welder", "Engineer", "Pipefitter", "Painter", "Surveyor",
+         "Equipe Civil", "Eletricista", "Soldador", "Ingeniero", "Operador"]
+
+# Task durations in working hours, and how often each is drawn
+DURATION_HOURS = [8, 16, 24, 40, 80, 120, 160, 240]
+DURATION_WEIGHTS = [10, 14, 14, 20, 16, 10, 10, 6]
+HOURS_PER_DAY = 8
+
+# MSPDI link types (FF, FS, SF, SS) and how often each is drawn
+LINK_TYPES = [0, 1, 2, 3]
+LINK_WEIGHTS = [7, 80, 3, 10]
+# Predecessors are drawn from this many preceding detail tasks
+LINK_WINDOW = 50
+
+# Detail tasks written per buffered write
+WRITE_BATCH = 2000
+
+
+class ScheduleSpec:
+    """Shape of a synthetic schedule; generate_contract reuses it to quote task names and dates."""
+
+    def __init__(self, tasks: int, resources: int = None, assignments_per_task: float = 1.2,
+                 links_per_task: float = 1.3, wbs_depth: int = 3, span_days: int = 730,
+                 start: datetime = datetime(2024, 1, 1, 8), status_fraction: float = 0.4, seed: int = 0):
+        self.tasks = tasks
+        self.resources = resources if resources is not None else max(2, tasks // 20)
+        self.assignments_per_task = assignments_per_task
+        self.links_per_task = links_per_task
+        self.wbs_depth = max(1, wbs_depth)
+        self.span_days = span_days
+        self.start = start
+        self.status_date = start + timedelta(days=span_days * status_fraction)
+        self.status_fraction = status_fraction
+        self.seed = seed
+        # Children per summary task, so that branching ** wbs_depth >= tasks
+        self.branching = max(2, math.ceil(tasks ** (1 / self.wbs_depth) - 1e-9))
+        while self.branching ** self.wbs_depth < tasks:
+            self.branching += 1
+        # Detail tasks under one summary task of each level 1..wbs_depth-1
+        self.group_sizes = [self.branching ** (self.wbs_depth - level) for level in range(1, self.wbs_depth)]
+        self.jitter_days = min(30.0, span_days * 0.02)
+
+    def as_dict(self) -> dict:
+        return {
+            "tasks": self.tasks, "resources": self.resources,
+            "assignments_per_task": self.assignments_per_task, "links_per_task": self.links_per_task,
+            "wbs_depth": self.wbs_depth, "span_days": self.span_days, "start": self.start.isoformat(),
+            "status_fraction": self.status_fraction, "seed": self.seed,
+        }
+
+    def uid(self, i: int) -> int:
+        """UID of detail task i; each summary task takes the UID before its first child."""
+        return i + 1 + sum(i // size + 1 for size in self.group_sizes)
+
+    def wbs(self, i: int, level: int) -> str:
+        digits = [(i // self.branching ** (self.wbs_depth - k)) % self.branching for k in range(1, level + 1)]
+        # The top level is not wrapped, it counts on past `branching`
+        digits[0] = i // self.branching ** (self.wbs_depth - 1)
+        return ".".join(str(d + 1) for d in digits)
+
+    def slot(self, i: int) -> datetime:
+        """Earliest start of detail task i; its start falls within jitter_days after it."""
+        return self.start + timedelta(days=self.span_days * i / max(self.tasks, 1))
+
+    def resource_name(self, r: int) -> str:
+        return f"{ROLES[r % len(ROLES)]} {r // len(ROLES) + 1}"
+
+
+def task_name(i: int) -> str:
+    """Name of detail task i (0-based)."""
+    verb = VERBS[i % len(VERBS)]
+    obj = OBJECTS[(i // len(VERBS)) % len(OBJECTS)]
+    area = AREAS[(i // 7) % len(AREAS)]
+    return f"{verb} {obj} - {area} {i + 1}"
+
+
+def _draw_count(rng: random.Random, mean: float) -> int:
+    """floor(mean) or floor(mean) + 1, averaging to mean."""
+    whole = int(mean)
+    return whole + (rng.random() < mean - whole)
+
+
+def _calendar_days(hours: float) -> float:
+    # Five working days per seven calendar days
+    return hours / HOURS_PER_DAY * 7 / 5
+
+
+def _element(tag: str, value) -> str:
+    return f"<{tag}>{value}</{tag}>"
+
+
+def _task_xml(uid: int, name: str, wbs: str, level: int, start: datetime, finish: datetime,
+              hours: float, percent: int, summary: bool, links: List[tuple] = ()) -> str:
+    parts = [
+        "<Task>", _element("UID", uid), _element("ID", uid), _element("Name", escape(name)),
+        _element("WBS", wbs), _element("OutlineNumber", wbs), _element("OutlineLevel", level),
+        _element("Start", start.isoformat(timespec="seconds")),
+        _element("Finish", finish.isoformat(timespec="seconds")),
+        _element("Duration", f"PT{hours:g}H0M0S"), _element("Summary", int(summary)),
+        _element("PercentComplete", percent),
+    ]
+    for pred_uid, link_type, lag in links:
+        parts.append(
+            f"<PredecessorLink><PredecessorUID>{pred_uid}</PredecessorUID><Type>{link_type}</Type>"
+            f"<LinkLag>{lag}</LinkLag><LagFormat>7</LagFormat></PredecessorLink>"
+        )
+    parts.append("</Task>")
+    return "".join(parts)
+
+
+def _progress(spec: ScheduleSpec, rng: random.Random, start: datetime, finish: datetime) -> int:
+    status = spec.status_date
+    if finish <= status:
+        # Most past tasks are done; the rest are overdue
+        return 100 if rng.random() < 0.85 else rng.choice([40, 60, 80, 90])
+    if start < status:
+        elapsed = (status - start) / (finish - start)
+        return max(0, min(99, int(elapsed * 100 + rng.uniform(-25, 15))))
+    return 0 if rng.random() < 0.95 else 10
+
+
+def _summary_xml(spec: ScheduleSpec, i: int, level: int) -> str:
+    """Summary task of `level` whose first detail task is i, spanning all of its detail tasks."""
+    size = spec.group_sizes[level - 1]
+    last = min(spec.tasks, i + size) - 1
+    start = spec.slot(i)
+    finish = spec.slot(last) + timedelta(days=spec.jitter_days + _calendar_days(max(DURATION_HOURS)))
+    hours = round((finish - start).total_seconds() / 86400 * 5 / 7 * HOURS_PER_DAY)
+    if finish <= spec.status_date:
+        percent = 100
+    elif start < spec.status_date:
+        percent = int((spec.status_date - start) / (finish - start) * 100)
+    else:
+        percent = 0
+    wbs = spec.wbs(i, level)
+    return _task_xml(_summary_uid(spec, i, level), f"{AREAS[level % len(AREAS)]} {wbs}", wbs, level,
+                     start, finish, hours, percent, True)
+
+
+def _summary_uid(spec: ScheduleSpec, i: int, level: int) -> int:
+    # Summaries of levels level..depth-1 starting at i come right before detail task i
+    return spec.uid(i) - (len(spec.group_sizes) - level + 1)
+
+
+def _tasks(spec: ScheduleSpec) -> Iterator[str]:
+    rng = random.Random(f"{spec.seed}-tasks")
+    for i in range(spec.tasks):
+        for level, size in enumerate(spec.group_sizes, start=1):
+            if i % size == 0:
+                yield _summary_xml(spec, i, level)
+
+        hours = rng.choices(DURATION_HOURS, DURATION_WEIGHTS)[0]
+        start = spec.slot(i) + timedelta(days=rng.uniform(0, spec.jitter_days))
+        # Whole working days from 08:00
+        start = start.replace(hour=8, minute=0, second=0, microsecond=0)
+        finish = start + timedelta(days=_calendar_days(hours))
+
+        links = []
+        if i > 0:
+            preds = {rng.randint(max(0, i - LINK_WINDOW), i - 1) for _ in range(_draw_count(rng, spec.links_per_task))}
+            for p in sorted(preds):
+                link_type = rng.choices(LINK_TYPES, LINK_WEIGHTS)[0]
+                # Lag in tenths of a minute: a few days now and then
+                lag = rng.randint(1, 5) * HOURS_PER_DAY * 600 if rng.random() < 0.1 else 0
+                links.append((spec.uid(p), link_type, lag))
+
+        yield _task_xml(spec.uid(i), task_name(i), spec.wbs(i, spec.wbs_depth), spec.wbs_depth,
+                        start, finish, hours, _progress(spec, rng, start, finish), False, links)
+
+
+def _assignments(spec: ScheduleSpec) -> Iterator[str]:
+    rng = random.Random(f"{spec.seed}-assignments")
+    uid = 1
+    for i in range(spec.tasks):
+        # Skewed towards the first resources, some of which end up overloaded
+        chosen = {int(spec.resources * rng.random() ** 1.5) for _ in range(_draw_count(rng, spec.assignments_per_task))}
+        for r in sorted(chosen):
+            yield (f"<Assignment><UID>{uid}</UID><TaskUID>{spec.uid(i)}</TaskUID>"
+                   f"<ResourceUID>{r + 1}</ResourceUID><Units>1</Units></Assignment>")
+            uid += 1
+
+
+def _write_batched(out: IO[str], lines: Iterator[str]):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == WRITE_BATCH:
+            out.write("\n".join(batch) + "\n")
+            batch = []
+    if batch:
+        out.write("\n".join(batch) + "\n")
+
+
+def generate_schedule(path: str, spec: ScheduleSpec):
+    """Write the MSPDI document of `spec` to path, streaming, so memory stays flat at any size."""
+    with open(path, "w", encoding="utf-8") as out:
+        out.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Project xmlns="{MSPDI_NAMESPACE}">\n')
+        out.write(f"<Name>Synthetic {spec.tasks} tasks</Name>\n"
+                  f"<StartDate>{spec.start.isoformat(timespec='seconds')}</StartDate>\n"
+                  f"<StatusDate>{spec.status_date.isoformat(timespec='seconds')}</StatusDate>\n"
+                  "<Calendars><Calendar><UID>1</UID><Name>Standard</Name></Calendar></Calendars>\n")
+        out.write("<Tasks>\n")
+        _write_batched(out, _tasks(spec))
+        out.write("</Tasks>\n<Resources>\n")
+        _write_batched(out, (
+            f"<Resource><UID>{r + 1}</UID><ID>{r + 1}</ID><Name>{escape(spec.resource_name(r))}</Name></Resource>"
+            for r in range(spec.resources)
+        ))
+        out.write("</Resources>\n<Assignments>\n")
+        _write_batched(out, _assignments(spec))
+        out.write("</Assignments>\n</Project>\n")
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser):
+    """ScheduleSpec options, shared by the generators and the benchmark runner."""
+    parser.add_argument("--resources", type=int, default=None, help="resources (default: tasks / 20)")
+    parser.add_argument("--assignments-per-task", type=float, default=1.2)
+    parser.add_argument("--links-per-task", type=float, default=1.3)
+    parser.add_argument("--wbs-depth", type=int, default=3, help="outline levels, detail tasks included")
+    parser.add_argument("--span-days", type=int, default=730, help="calendar days the start dates spread over")
+    parser.add_argument("--start", type=datetime.fromisoformat, default=datetime(2024, 1, 1, 8))
+    parser.add_argument("--status-fraction", type=float, default=0.4,
+                        help="share of the span elapsed at the status date progress follows")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def spec_from_arguments(tasks: int, args: argparse.Namespace) -> ScheduleSpec:
+    return ScheduleSpec(tasks, args.resources, args.assignments_per_task, args.links_per_task,
+                        args.wbs_depth, args.span_days, args.start, args.status_fraction, args.seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("tasks", type=int, help="detail tasks; summary tasks come on top")
+    parser.add_argument("output")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+    generate_schedule(args.output, spec_from_arguments(args.tasks, args))
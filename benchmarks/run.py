@@ -0,0 +1,285 @@
+"""
+End-to-end benchmarks on synthetic schedules of increasing size.
+
+For every size a schedule and a matching contract are generated (once,
+then reused from --workdir). Each step below is timed, then run a second
+time under tracemalloc for the peak of the Python memory it allocates
+(numpy arrays included):
+
+- the MSPDI parser, streaming and (up to --dom-max-tasks) DOM mode
+- every agent on its own, then the orchestrator running them together
+- ContractAnalyst DOCX extraction and compare_with_schedule
+- the FastAPI endpoints through a local TestClient
+
+Results go to a JSON file that compare.py can diff against another run.
+A step that fails is recorded with its error and the run goes on.
+
+    python benchmarks/run.py --sizes 1000 10000 --output results.json
+    python benchmarks/run.py --steps 'parser.*' 'api.*' --sizes 100000
+"""
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.append(os.path.join(REPO_DIR, "backend"))
+
+# Endpoint work stays in this process so tracemalloc sees it, contract
+# extraction is never served from the disk cache, and a slow step at a
+# large size is not cut short. Set any of these to override.
+os.environ.setdefault("OFFLOAD_MODE", "thread")
+os.environ.setdefault("OFFLOAD_TIMEOUT", "86400")
+os.environ.setdefault("CONTRACT_CACHE_MAX_BYTES", "0")
+os.environ.setdefault("REPORT_CACHE_MAX_BYTES", "0")
+
+from generate_contract import generate_contract  # noqa: E402
+from generate_schedule import ScheduleSpec, add_spec_arguments, generate_schedule, spec_from_arguments  # noqa: E402
+
+RESULTS_VERSION = 1
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+
+class Recorder:
+    """Runs the selected steps and keeps their measurements."""
+
+    def __init__(self, patterns: List[str], skip: List[str], trace_memory: bool):
+        self.patterns = patterns
+        self.skip = skip
+        self.trace_memory = trace_memory
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    def selected(self, name: str) -> bool:
+        return (any(fnmatch.fnmatch(name, p) for p in self.patterns)
+                and not any(fnmatch.fnmatch(name, p) for p in self.skip))
+
+    def run(self, name: str, func: Callable, *args, traced: Optional[Callable] = None) -> Any:
+        """
+        Result of func(*args), or None if the step is skipped or fails.
+
+        The step is timed on its own, then run again under tracemalloc for
+        its peak memory, since tracing slows Python code down several
+        times. `traced` replaces func in that second run, for steps whose
+        first run leaves a cache behind.
+        """
+        if not self.selected(name):
+            return None
+        gc.collect()
+        started = time.perf_counter()
+        result, error = self._call(func, args)
+        seconds = time.perf_counter() - started
+
+        peak = None
+        if self.trace_memory and error is None:
+            gc.collect()
+            tracemalloc.start()
+            _, error = self._call(traced or func, args)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        record = {"seconds": round(seconds, 4), "peak_bytes": peak}
+        if error is not None:
+            record["error"] = error
+        self.steps[name] = record
+        peak_text = f"{peak / 2 ** 20:10.1f} MiB" if peak is not None else ""
+        print(f"  {name:<50} {seconds:10.3f} s {peak_text}{'  ' + error if error else ''}", flush=True)
+        return result
+
+    @staticmethod
+    def _call(func: Callable, args: tuple):
+        try:
+            return func(*args), None
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}"
+
+
+def _checked(response):
+    """TestClient response, raising on an error status so the step records it."""
+    if response.status_code >= 400:
+        raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+    return response
+
+
+def _files(spec: ScheduleSpec, workdir: str, contract_activities: int) -> Dict[str, str]:
+    """Schedule and contract of `spec`, generated unless an earlier run left them in workdir."""
+    key = "-".join(f"{value}" for value in spec.as_dict().values()).replace(":", "")
+    paths = {
+        "schedule": os.path.join(workdir, f"schedule-{key}.xml"),
+        "contract": os.path.join(workdir, f"contract-{key}-{contract_activities}.docx"),
+    }
+    if not os.path.exists(paths["schedule"]):
+        print(f"  generating {paths['schedule']}", flush=True)
+        generate_schedule(paths["schedule"] + ".tmp", spec)
+        os.replace(paths["schedule"] + ".tmp", paths["schedule"])
+    if not os.path.exists(paths["contract"]):
+        generate_contract(paths["contract"] + ".tmp", spec, contract_activities)
+        os.replace(paths["contract"] + ".tmp", paths["contract"])
+    return paths
+
+
+def bench_library(rec: Recorder, paths: Dict[str, str], tasks: int, args: argparse.Namespace):
+    from pathlib import Path
+    from app.agents.chart_generator import ChartGenerator
+    from app.agents.contract_analyst import ContractAnalyst
+    from app.agents.orchestrator import REPORT_LANGUAGES, analyze_schedule
+    from app.agents.resource_manager import ResourceManager
+    from app.agents.risk_analyst import RiskAnalyst
+    from app.agents.schedule_analyst import ScheduleAnalyst
+    from app.agents.text_report_generator import TextReportGenerator
+    from app.utils.analysis_context import AnalysisContext
+    from app.utils.parser import MSProjectParser, parse_schedule_file
+
+    table = rec.run("parser.streaming", lambda: MSProjectParser(Path(paths["schedule"]), streaming=True).parse_table())
+    if tasks <= args.dom_max_tasks:
+        with open(paths["schedule"], "rb") as f:
+            content = f.read()
+        rec.run("parser.dom", lambda: MSProjectParser(content).parse_table())
+        del content
+    if table is None:
+        table = parse_schedule_file(paths["schedule"])
+
+    # Every run of an agent gets a fresh context, so it pays for the values it derives
+    schedule = rec.run("schedule_analyst.analyze", lambda: ScheduleAnalyst().analyze(AnalysisContext(table)))
+    resource = rec.run("resource_manager.analyze", lambda: ResourceManager().analyze(AnalysisContext(table)))
+    risk = rec.run("risk_analyst.analyze", lambda: RiskAnalyst().analyze(AnalysisContext(table), resource))
+    rec.run("chart_generator.generate_charts",
+            lambda: ChartGenerator().generate_charts(AnalysisContext(table), resource or {}, risk or {}))
+    analysis = {"schedule_analysis": schedule or {}, "resource_analysis": resource or {}, "risk_analysis": risk or {}}
+    rec.run("text_report_generator.generate_report",
+            lambda: TextReportGenerator().generate_report(AnalysisContext(table), analysis, "en"))
+    rec.run("resource_manager.level", ResourceManager().level, table)
+    rec.run("risk_analyst.simulate", RiskAnalyst().simulate, table, args.iterations, 1)
+    rec.run("orchestrator.analyze_schedule", analyze_schedule, table, "en", None, REPORT_LANGUAGES)
+
+    analyst = ContractAnalyst()
+    with open(paths["contract"], "rb") as f:
+        contract = f.read()
+    contract_data = rec.run("contract_analyst.parse_contract_docx", analyst.parse_contract_docx, contract)
+    if contract_data is None:
+        contract_data = analyst.parse_contract_docx(contract)
+    for mode in ("substring", "fuzzy"):
+        rec.run(f"contract_analyst.compare_with_schedule.{mode}",
+                lambda: analyst.compare_with_schedule(contract_data, AnalysisContext(table), "en", mode))
+
+
+def bench_api(rec: Recorder, paths: Dict[str, str], args: argparse.Namespace):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    if not any(rec.selected(f"api.{name}") for name in (
+            "upload", "tasks", "analyze", "gantt", "report", "level", "simulate", "analyze_contract")):
+        return
+
+    with TestClient(app) as client:
+        def upload(path=paths["schedule"]):
+            with open(path, "rb") as f:
+                return _checked(client.post("/projects/upload", files={"file": ("schedule.xml", f, "text/xml")}))
+
+        # Uploads are cached by file hash: the traced run posts a copy with a comment appended
+        copy = paths["schedule"] + ".copy.xml"
+        shutil.copyfile(paths["schedule"], copy)
+        with open(copy, "a", encoding="utf-8") as f:
+            f.write("<!-- copy -->\n")
+        try:
+            response = rec.run("api.upload", upload, traced=lambda: upload(copy))
+        finally:
+            os.remove(copy)
+        if response is None:
+            # The other endpoints need the uploaded project
+            response = upload()
+        project_id = response.json()["project_id"]
+        del response
+
+        base = f"/projects/{project_id}"
+        rec.run("api.tasks", lambda: _checked(client.get(f"{base}/tasks")))
+        rec.run("api.analyze", lambda: _checked(client.post(f"{base}/analyze", params={"language": "en"})))
+        rec.run("api.gantt", lambda: _checked(client.get(f"{base}/charts/gantt")))
+        # Languages other than the analysis', rendered on demand and then cached
+        rec.run("api.report", lambda: _checked(client.get(f"{base}/report", params={"language": "es"})),
+                traced=lambda: _checked(client.get(f"{base}/report", params={"language": "pt"})))
+        rec.run("api.level", lambda: _checked(client.post(f"{base}/level")))
+        rec.run("api.simulate", lambda: _checked(
+            client.post(f"{base}/simulate", params={"iterations": args.iterations, "seed": 1})))
+
+        def analyze_contract():
+            with open(paths["contract"], "rb") as f:
+                files = {"contract_file": ("contract.docx", f,
+                                           "application/vnd.openxmlformats-officedocument.wordprocessingml.document")}
+                return _checked(client.post("/projects/analyze-contract", files=files, data={"project_id": project_id}))
+
+        rec.run("api.analyze_contract", analyze_contract)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="detail tasks per schedule")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "mcp-benchmarks"),
+                        help="where generated schedules and contracts are kept between runs")
+    parser.add_argument("--steps", nargs="+", default=["*"], help="glob patterns of the steps to run")
+    parser.add_argument("--skip", nargs="+", default=[], help="glob patterns of steps to leave out")
+    parser.add_argument("--contract-activities", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=1000, help="Monte Carlo iterations")
+    parser.add_argument("--dom-max-tasks", type=int, default=100000,
+                        help="largest schedule also parsed in DOM mode, which holds the whole tree in memory")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="time only, skipping the second, traced run of every step")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    results = {
+        "version": RESULTS_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "memory": not args.no_memory,
+        "settings": {name: os.environ[name] for name in (
+            "OFFLOAD_MODE", "OFFLOAD_TIMEOUT", "CONTRACT_CACHE_MAX_BYTES", "REPORT_CACHE_MAX_BYTES")},
+        "iterations": args.iterations,
+        "contract_activities": args.contract_activities,
+        "sizes": {},
+    }
+
+    for tasks in args.sizes:
+        spec = spec_from_arguments(tasks, args)
+        print(f"{tasks} tasks", flush=True)
+        paths = _files(spec, args.workdir, args.contract_activities)
+        rec = Recorder(args.steps, args.skip, not args.no_memory)
+        bench_library(rec, paths, tasks, args)
+        bench_api(rec, paths, args)
+        results["sizes"][str(tasks)] = {
+            "schedule": spec.as_dict(),
+            "schedule_bytes": os.path.getsize(paths["schedule"]),
+            "contract_bytes": os.path.getsize(paths["contract"]),
+            "steps": rec.steps,
+        }
+        # Written after every size, so a long run leaves partial results
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
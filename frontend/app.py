@@ -1,20 +1,31 @@
 import streamlit as st
 import requests
 import pandas as pd
+import numpy as np
 import plotly.express as px
 from datetime import datetime
 from weasyprint import HTML, CSS
 from weasyprint.text.fonts import FontConfiguration
 import io
 import base64
+import hashlib
+import json
+import time
+import plotly.io as pio
 
-def create_chart_img(fig):
-    """Convert Plotly fig to base64 image"""
+@st.cache_data(max_entries=64, show_spinner=False)
+def _chart_png(fig_json):
+    """PNG export of one chart, cached by its JSON so unchanged charts are not rendered again"""
+    fig = pio.from_json(fig_json)
     # Force colorful template
     fig.update_layout(template="plotly_white")
     img_bytes = fig.to_image(format="png", width=800, height=400, scale=2)
     return base64.b64encode(img_bytes).decode('utf-8')
 
+def create_chart_img(fig):
+    """Convert Plotly fig to base64 image"""
+    return _chart_png(fig.to_json())
+
 def create_pdf(analysis_data, text_report, charts=[], language="pt"):
     # CSS Styles - Modern and Colorful
     css = """
@@ -208,6 +219,22 @@ def create_pdf(analysis_data, text_report, charts=[], language="pt"):
         
     return pdf_bytes
 
+def pdf_cache_key(analysis_data, text_report, charts, language):
+    """Hash of everything a PDF report is built from"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(analysis_data, sort_keys=True, default=str).encode())
+    digest.update(text_report.encode())
+    digest.update(language.encode())
+    for title, fig in charts:
+        digest.update(title.encode())
+        digest.update(fig.to_json().encode())
+    return digest.hexdigest()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def build_pdf(key, _analysis_data, _text_report, _charts, language):
+    """create_pdf cached by pdf_cache_key; the underscored arguments are not hashed by Streamlit"""
+    return create_pdf(_analysis_data, _text_report, _charts, language)
+
 # Configuration
 import os
 API_URL = os.environ.get("API_URL", "http://127.0.0.1:8001")
@@ -240,6 +267,7 @@ TRANSLATIONS = {
         "delayed_tasks": "tarefas atrasadas",
         "overloaded_resources": "⚠️ **Recursos Sobrecarregados**",
         "resource_utilization": "**Utilização de Recursos (Tarefas):**",
+        "overallocation_periods": "Períodos de sobrecarga",
         "visualizations": "📊 Visualizações do Projeto",
         "gantt_chart": "Gráfico de Gantt",
         "task_duration": "Duração das Tarefas",
@@ -247,11 +275,16 @@ TRANSLATIONS = {
         "risk_analysis": "🎯 Análise de Risco",
         "view_raw_data": "Ver Dados Brutos das Tarefas",
         "no_valid_dates": "Nenhuma data válida encontrada para o gráfico de Gantt.",
+        "gantt_window": "Período",
+        "gantt_rolled_up": "{} tarefas agrupadas em {} barras por EAP; reduza o período para ver as tarefas.",
+        "others": "Outros ({} recursos)",
         "no_resource_data": "Nenhum dado de recursos disponível.",
         "contract_comparison": "📋 Análise Contrato vs Cronograma",
         "compliance_score": "Score de Conformidade",
         "delayed_activities": "Atividades Atrasadas",
         "missing_activities": "Atividades Faltantes",
+        "fuzzy_matching": "Correspondência aproximada de atividades",
+        "matched_activities": "Atividades Correspondidas",
         "contract_activities": "Atividades no Contrato",
         "delayed_tab": "🚨 Atividades Atrasadas",
         "missing_tab": "❌ Atividades Faltantes",
@@ -302,6 +335,14 @@ TRANSLATIONS = {
         "resource": "Recurso",
         "task_count": "Contagem de Tarefas",
         "text_report": "📝 Relatório em Texto",
+        "critical_path": "🛤️ **Caminho Crítico**",
+        "evm_tab": "💰 Valor Agregado",
+        "evm_curve": "Curva S de Valor Agregado",
+        "planned_value": "Valor Planejado (PV)",
+        "earned_value": "Valor Agregado (EV)",
+        "schedule_variance": "Variação de Prazo (SV)",
+        "hours": "Horas",
+        "no_evm_data": "Não há datas suficientes para a análise de valor agregado.",
     },
     "es": {
         "app_title": "Planus - Project Manager AI",
@@ -329,6 +370,7 @@ TRANSLATIONS = {
         "delayed_tasks": "tareas retrasadas",
         "overloaded_resources": "⚠️ **Recursos Sobrecargados**",
         "resource_utilization": "**Utilización de Recursos (Tareas):**",
+        "overallocation_periods": "Períodos de sobrecarga",
         "visualizations": "📊 Visualizaciones del Proyecto",
         "gantt_chart": "Diagrama de Gantt",
         "task_duration": "Duración de Tareas",
@@ -336,11 +378,16 @@ TRANSLATIONS = {
         "risk_analysis": "🎯 Análisis de Riesgo",
         "view_raw_data": "Ver Datos Brutos de Tareas",
         "no_valid_dates": "No se encontraron fechas válidas para el diagrama de Gantt.",
+        "gantt_window": "Período",
+        "gantt_rolled_up": "{} tareas agrupadas en {} barras por EDT; reduzca el período para ver las tareas.",
+        "others": "Otros ({} recursos)",
         "no_resource_data": "No hay datos de recursos disponibles.",
         "contract_comparison": "📋 Análisis Contrato vs Cronograma",
         "compliance_score": "Puntuación de Cumplimiento",
         "delayed_activities": "Actividades Retrasadas",
         "missing_activities": "Actividades Faltantes",
+        "fuzzy_matching": "Coincidencia aproximada de actividades",
+        "matched_activities": "Actividades Coincidentes",
         "contract_activities": "Actividades en Contrato",
         "delayed_tab": "🚨 Actividades Retrasadas",
         "missing_tab": "❌ Actividades Faltantes",
@@ -361,6 +408,14 @@ TRANSLATIONS = {
         "action_required": "Acción Requerida",
         "complete": "Completo",
         "text_report": "📝 Informe en Texto",
+        "critical_path": "🛤️ **Ruta Crítica**",
+        "evm_tab": "💰 Valor Ganado",
+        "evm_curve": "Curva S de Valor Ganado",
+        "planned_value": "Valor Planificado (PV)",
+        "earned_value": "Valor Ganado (EV)",
+        "schedule_variance": "Variación del Cronograma (SV)",
+        "hours": "Horas",
+        "no_evm_data": "No hay fechas suficientes para el análisis de valor ganado.",
     },
     "en": {
         "app_title": "Planus - Project Manager AI",
@@ -388,6 +443,7 @@ TRANSLATIONS = {
         "delayed_tasks": "delayed tasks",
         "overloaded_resources": "⚠️ **Overloaded Resources**",
         "resource_utilization": "**Resource Utilization (Tasks):**",
+        "overallocation_periods": "Over-allocation periods",
         "visualizations": "📊 Project Visualizations",
         "gantt_chart": "Gantt Chart",
         "task_duration": "Task Duration",
@@ -395,11 +451,16 @@ TRANSLATIONS = {
         "risk_analysis": "🎯 Risk Analysis",
         "view_raw_data": "View Raw Task Data",
         "no_valid_dates": "No valid dates found for Gantt chart.",
+        "gantt_window": "Period",
+        "gantt_rolled_up": "{} tasks rolled up into {} bars by WBS; narrow the period to see tasks.",
+        "others": "Others ({} resources)",
         "no_resource_data": "No resource data available.",
         "contract_comparison": "📋 Contract vs Schedule Analysis",
         "compliance_score": "Compliance Score",
         "delayed_activities": "Delayed Activities",
         "missing_activities": "Missing Activities",
+        "fuzzy_matching": "Fuzzy activity matching",
+        "matched_activities": "Matched Activities",
         "contract_activities": "Contract Activities",
         "delayed_tab": "🚨 Delayed Activities",
         "missing_tab": "❌ Missing Activities",
@@ -420,6 +481,14 @@ TRANSLATIONS = {
         "action_required": "Action Required",
         "complete": "Complete",
         "text_report": "📝 Text Report",
+        "critical_path": "🛤️ **Critical Path**",
+        "evm_tab": "💰 Earned Value",
+        "evm_curve": "Earned Value S-Curve",
+        "planned_value": "Planned Value (PV)",
+        "earned_value": "Earned Value (EV)",
+        "schedule_variance": "Schedule Variance (SV)",
+        "hours": "Hours",
+        "no_evm_data": "Not enough dates for an earned value analysis.",
     }
 }
 
@@ -461,6 +530,41 @@ contract_file = st.sidebar.file_uploader(t("upload_contract"), type=["pdf", "doc
 
 st.sidebar.divider()
 
+def upload_schedule(schedule_file):
+    """Upload the schedule once; the backend caches it under a content hash."""
+    files = {"file": (schedule_file.name, schedule_file.getvalue(), "text/xml")}
+    response = requests.post(f"{API_URL}/projects/upload", files=files)
+    if response.status_code == 200:
+        upload = response.json()
+        st.session_state['project_id'] = upload['project_id']
+        st.session_state['tasks'] = upload['tasks']
+    return response
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def fetch_gantt(project_id, start=None, finish=None):
+    """Gantt bars rolled up by the backend for a date window (None: whole project)."""
+    params = {key: value for key, value in (("start", start), ("finish", finish)) if value}
+    response = requests.get(f"{API_URL}/projects/{project_id}/charts/gantt", params=params)
+    response.raise_for_status()
+    return response.json()
+
+def wait_for_job(job, poll_interval=1.0):
+    """Poll a backend job, showing its stage progress, and return the finished payload."""
+    progress_bar = st.progress(0.0, text=t("analyzing_contract"))
+    while job["status"] not in ("done", "failed"):
+        time.sleep(poll_interval)
+        status_response = requests.get(f"{API_URL}/projects/jobs/{job['job_id']}")
+        status_response.raise_for_status()
+        job = status_response.json()
+        running = [name for name, stage in job["stages"].items() if stage["status"] == "running"]
+        progress_bar.progress(job["progress"], text=f"{t('analyzing_contract')} {', '.join(running)}")
+    progress_bar.empty()
+    if job["status"] == "failed":
+        raise RuntimeError(job["error"])
+    result_response = requests.get(f"{API_URL}/projects/jobs/{job['job_id']}/result")
+    result_response.raise_for_status()
+    return result_response.json()
+
 # Analysis buttons
 if schedule_file:
     st.sidebar.success(t("schedule_uploaded"))
@@ -470,15 +574,15 @@ if schedule_file:
         with st.spinner(t("analyzing")):
             try:
                 # 1. Upload File
-                files = {"file": (schedule_file.name, schedule_file.getvalue(), "text/xml")}
-                response = requests.post(f"{API_URL}/projects/upload", files=files)
+                response = upload_schedule(schedule_file)
                 
                 if response.status_code == 200:
-                    tasks_data = response.json()
-                    st.session_state['tasks'] = tasks_data
-                    
-                    # 2. Run Analysis Agent
-                    analysis_response = requests.post(f"{API_URL}/projects/analyze", json=tasks_data)
+                    # 2. Run Analysis Agent on the cached project
+                    project_id = st.session_state['project_id']
+                    analysis_response = requests.post(
+                        f"{API_URL}/projects/{project_id}/analyze",
+                        params={"language": st.session_state.get('language', 'pt')}
+                    )
                     if analysis_response.status_code == 200:
                         st.session_state['analysis'] = analysis_response.json()
                         st.session_state['contract_analysis'] = None  # Clear contract analysis
@@ -495,35 +599,38 @@ if schedule_file:
     if contract_file:
         st.sidebar.success(t("contract_uploaded"))
         
+        fuzzy_matching = st.sidebar.checkbox(t("fuzzy_matching"), key="fuzzy_matching")
+        
         if st.sidebar.button(t("analyze_contract_schedule"), key="analyze_contract", use_container_width=True):
             with st.spinner(t("analyzing_contract")):
                 try:
-                    # Send both files to contract analysis endpoint
+                    # Upload the schedule once (parsed tasks are kept for display),
+                    # then send only the contract plus the project id
+                    schedule_response = upload_schedule(schedule_file)
+                    schedule_response.raise_for_status()
+                    
                     files = {
                         "contract_file": (contract_file.name, contract_file.getvalue(), 
-                                         "application/pdf" if contract_file.name.endswith('.pdf') else "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
-                        "schedule_file": (schedule_file.name, schedule_file.getvalue(), "text/xml")
+                                         "application/pdf" if contract_file.name.endswith('.pdf') else "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
                     }
                     current_lang = st.session_state.get('language', 'pt')
+                    # Submit as a background job and poll, so long contracts
+                    # do not hit request timeouts
                     response = requests.post(
-                        f"{API_URL}/projects/analyze-contract", 
+                        f"{API_URL}/projects/analyze-contract/jobs", 
                         files=files,
-                        params={"language": current_lang}
+                        data={"project_id": st.session_state['project_id']},
+                        params={
+                            "language": current_lang,
+                            "match_mode": "fuzzy" if fuzzy_matching else "substring"
+                        }
                     )
                     
-                    if response.status_code == 200:
-                        result = response.json()
+                    if response.status_code == 202:
+                        result = wait_for_job(response.json())
                         st.session_state['contract_analysis'] = result
                         st.session_state['analysis'] = result # Now contains full analysis including risk
                         
-                        # Also parse schedule for display
-                        schedule_response = requests.post(
-                            f"{API_URL}/projects/upload",
-                            files={"file": (schedule_file.name, schedule_file.getvalue(), "text/xml")}
-                        )
-                        if schedule_response.status_code == 200:
-                            st.session_state['tasks'] = schedule_response.json()
-                        
                         st.sidebar.success(t("contract_analysis_complete"))
                         st.rerun()
                     else:
@@ -585,6 +692,9 @@ if 'tasks' in st.session_state:
                         st.write(f"- {risk}")
                 if 'delayed_tasks' in sched and sched['delayed_tasks']:
                     st.error(f"{t('found')} {len(sched['delayed_tasks'])} {t('delayed_tasks')}.")
+                if sched.get('critical_path'):
+                    st.write(t("critical_path"))
+                    st.write(" → ".join(sched['critical_path']))
 
             with col_res:
                 res_summary = res.get('summary', {})
@@ -596,6 +706,13 @@ if 'tasks' in st.session_state:
 
                 if 'overloaded_resources' in res and res['overloaded_resources']:
                     st.warning(f"{t('overloaded_resources')}: {', '.join(res['overloaded_resources'])}")
+                if res.get('overallocations'):
+                    with st.expander(t("overallocation_periods")):
+                        st.dataframe(pd.DataFrame([
+                            {"resource": name, **period}
+                            for name, periods in res['overallocations'].items()
+                            for period in periods
+                        ]))
                 
                 st.write(t("resource_utilization"))
                 st.json(res.get('utilization', {}))
@@ -604,22 +721,49 @@ if 'tasks' in st.session_state:
         st.divider()
         st.subheader(t("visualizations"))
         
-        tab1, tab2, tab3, tab4, tab5 = st.tabs([t("gantt_chart"), t("task_duration"), t("resource_load"), t("risk_analysis"), t("text_report")])
+        tab1, tab2, tab3, tab4, tab_evm, tab5 = st.tabs([t("gantt_chart"), t("task_duration"), t("resource_load"), t("risk_analysis"), t("evm_tab"), t("text_report")])
         
         with tab1:
-            # Simple Gantt using Plotly Timeline
+            # Gantt bars come pre-aggregated from the backend (WBS roll-up at
+            # coarse zoom), so large schedules are not drawn task by task
+            chart_data = analysis.get('chart_data', {}) if analysis else {}
+            gantt = chart_data.get('gantt')
             valid_dates = df.dropna(subset=['start_date', 'finish_date'])
             if not valid_dates.empty:
+                project_start = pd.to_datetime(valid_dates['start_date']).min().date()
+                project_finish = pd.to_datetime(valid_dates['finish_date']).max().date()
+                window = st.date_input(
+                    t("gantt_window"),
+                    value=(project_start, project_finish),
+                    min_value=project_start,
+                    max_value=project_finish
+                )
+                zoomed = isinstance(window, tuple) and len(window) == 2 and window != (project_start, project_finish)
+                project_id = st.session_state.get('project_id')
+                if project_id and (zoomed or gantt is None):
+                    try:
+                        if zoomed:
+                            gantt = fetch_gantt(project_id, window[0].isoformat(), f"{window[1].isoformat()}T23:59:59")
+                        else:
+                            gantt = fetch_gantt(project_id)
+                    except requests.RequestException as e:
+                        st.warning(f"{t('connection_error')}: {e}")
+
+            if gantt and gantt['bars']['name']:
+                gantt_df = pd.DataFrame(gantt['bars'])
                 fig_gantt = px.timeline(
-                    valid_dates, 
-                    x_start="start_date", 
-                    x_end="finish_date", 
+                    gantt_df,
+                    x_start="start",
+                    x_end="finish",
                     y="name",
                     color="percent_complete",
+                    hover_data=["task_count"],
                     title=t("project_schedule")
                 )
                 fig_gantt.update_yaxes(autorange="reversed")
                 st.plotly_chart(fig_gantt, use_container_width=True)
+                if gantt['level'] is None or gantt['level'] < gantt['max_level']:
+                    st.caption(t("gantt_rolled_up").format(gantt['total_tasks'], len(gantt_df)))
                 if 'charts' not in st.session_state: st.session_state['charts'] = []
                 # Avoid duplicates
                 if not any(c[0] == t("project_schedule") for c in st.session_state['charts']):
@@ -628,7 +772,17 @@ if 'tasks' in st.session_state:
                 st.warning(t("no_valid_dates"))
                 
         with tab2:
-            fig_hist = px.histogram(df, x="duration", title=t("task_duration_dist"))
+            bins = analysis.get('chart_data', {}).get('duration_histogram') if analysis else None
+            if bins is None:
+                counts, edges = np.histogram(df['duration'].dropna(), bins=40)
+                bins = {"edges": edges.tolist(), "counts": counts.tolist()}
+            edges = bins['edges']
+            hist_df = pd.DataFrame({
+                "duration": [(a + b) / 2 for a, b in zip(edges, edges[1:])],
+                t("task_count"): bins['counts']
+            })
+            fig_hist = px.bar(hist_df, x="duration", y=t("task_count"), title=t("task_duration_dist"))
+            fig_hist.update_traces(width=(edges[1] - edges[0]) if len(edges) > 1 else None)
             st.plotly_chart(fig_hist, use_container_width=True)
             if 'charts' not in st.session_state: st.session_state['charts'] = []
             if not any(c[0] == t("task_duration_dist") for c in st.session_state['charts']):
@@ -636,9 +790,14 @@ if 'tasks' in st.session_state:
 
         with tab3:
             if analysis and 'chart_data' in analysis:
-                res_dist = analysis['chart_data'].get('resource_distribution', {})
-                if res_dist:
-                    res_df = pd.DataFrame(list(res_dist.items()), columns=[t('resource'), t('task_count')])
+                res_bars = analysis['chart_data'].get('resource_bars', {})
+                if res_bars.get('names'):
+                    names = res_bars['names']
+                    counts = res_bars['counts']
+                    if res_bars['others_resources']:
+                        names = names + [t("others").format(res_bars['others_resources'])]
+                        counts = counts + [res_bars['others_count']]
+                    res_df = pd.DataFrame({t('resource'): names, t('task_count'): counts})
                     fig_res = px.bar(res_df, x=t('resource'), y=t('task_count'), title=t("tasks_per_resource"))
                     st.plotly_chart(fig_res, use_container_width=True)
                 else:
@@ -776,25 +935,65 @@ if 'tasks' in st.session_state:
             else:
                 st.info(t("risk_not_available"))
         
+        with tab_evm:
+            evm = analysis.get('chart_data', {}).get('evm') if analysis else None
+            if evm:
+                col_spi, col_sv, col_ev = st.columns(3)
+                if evm.get('spi_to_date') is not None:
+                    col_spi.metric("SPI", f"{evm['spi_to_date']:.2f}")
+                col_sv.metric(t("schedule_variance"), f"{evm['sv_to_date']:,.1f} h")
+                col_ev.metric(t("earned_value"), f"{evm['earned_value_to_date']:,.1f} h")
+
+                # Earned value stops at the status date
+                earned = evm['earned_value'] + [None] * (len(evm['dates']) - len(evm['earned_value']))
+                evm_df = pd.DataFrame({
+                    "date": pd.to_datetime(evm['dates']),
+                    t("planned_value"): evm['planned_value'],
+                    t("earned_value"): earned
+                })
+                fig_evm = px.line(evm_df, x="date", y=[t("planned_value"), t("earned_value")], title=t("evm_curve"))
+                fig_evm.update_layout(yaxis_title=t("hours"), xaxis_title=None, legend_title=None)
+                st.plotly_chart(fig_evm, use_container_width=True)
+            else:
+                st.info(t("no_evm_data"))
+
         with tab5:
             # Text Report Tab
             if analysis and 'text_reports' in analysis:
                 text_reports = analysis['text_reports']
                 current_lang = st.session_state.get('language', 'pt')
                 
+                # Only the analysis language comes with the results; other
+                # languages are rendered by the backend from the cached analysis
+                if current_lang not in text_reports and analysis.get('project_id'):
+                    report_response = requests.get(
+                        f"{API_URL}/projects/{analysis['project_id']}/report",
+                        params={"language": current_lang, "contract_id": analysis.get('contract_id')}
+                    )
+                    if report_response.status_code == 200:
+                        text_reports[current_lang] = report_response.json()['report']
+                
                 # Get report for current language
-                report_text = text_reports.get(current_lang, text_reports.get('pt', ''))
+                report_text = text_reports.get(current_lang, next(iter(text_reports.values()), ''))
                 
                 if report_text:
                     # Display the markdown report
                     st.markdown(report_text)
                     
-                    st.download_button(
-                        label="📥 " + ("Baixar Relatório PDF" if current_lang == "pt" else "Descargar Informe PDF" if current_lang == "es" else "Download PDF Report"),
-                        data=create_pdf(analysis, report_text, st.session_state.get('charts', [])),
-                        file_name=f"relatorio_cronograma_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                        mime="application/pdf"
-                    )
+                    # The PDF is only rendered once asked for, then kept
+                    # until the analysis, language or charts change
+                    charts = st.session_state.get('charts', [])
+                    pdf_key = pdf_cache_key(analysis, report_text, charts, current_lang)
+                    if st.session_state.get('pdf_key') != pdf_key:
+                        if st.button("📄 " + ("Gerar Relatório PDF" if current_lang == "pt" else "Generar Informe PDF" if current_lang == "es" else "Generate PDF Report")):
+                            st.session_state['pdf_key'] = pdf_key
+                    if st.session_state.get('pdf_key') == pdf_key:
+                        st.download_button(
+                            label="📥 " + ("Baixar Relatório PDF" if current_lang == "pt" else "Descargar Informe PDF" if current_lang == "es" else "Download PDF Report"),
+                            data=build_pdf(pdf_key, analysis, report_text, charts, current_lang),
+                            file_name=f"relatorio_cronograma_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                            mime="application/pdf"
+                        )
                 else:
                     st.info(t("risk_not_available"))
             else:
@@ -896,6 +1095,11 @@ if 'contract_analysis' in st.session_state and st.session_state['contract_analys
             with st.expander("View extra activities"):
                 for i, activity in enumerate(extra, 1):
                     st.write(f"{i}. {activity}")
+        
+        matched = comparison.get('matched_activities', [])
+        if matched:
+            with st.expander(f"{t('matched_activities')} ({len(matched)})"):
+                st.dataframe(pd.DataFrame(matched)[['activity', 'task_name', 'score']], use_container_width=True)
     
     with tab3:
         productivity = comparison.get('productivity_metrics', [])
@@ -0,0 +1,87 @@
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app import config
+from app.agents.resource_manager import ResourceManager
+from app.models import Task
+from app.utils.loading import resource_loading
+from app.utils.task_table import TaskTable
+
+# Checks resource leveling on random unlinked schedules, weekend dates
+# included: every leveled task ends no earlier than it starts, and the
+# leveled schedule leaves no resource over its daily capacity
+TABLES = 200
+TASKS_PER_TABLE = 15
+FIRST_DAY = datetime(2024, 1, 1, 8, 0, 0)
+
+
+def random_task(rng: random.Random, i: int) -> Task:
+    start = FIRST_DAY + timedelta(days=rng.randint(0, 20))
+    days = rng.randint(0, 6)
+    finish = start + timedelta(days=days, hours=9)
+    # At most a full day's work per calendar day, so each task fits alone
+    hours = rng.choice([1, 4, 8]) * max(days - 2, 1)
+    return Task(
+        id=str(i),
+        name=f"Task {i}",
+        start_date=start,
+        finish_date=finish,
+        duration=hours,
+        percent_complete=0,
+        resource_names=rng.sample(["A", "B", "C"], rng.randint(1, 2)),
+    )
+
+
+def leveled(tasks, result):
+    dates = {s["task_id"]: s for s in result["shifted_tasks"]}
+    return [
+        task.model_copy(update={
+            "start_date": datetime.fromisoformat(dates[task.id]["leveled_start_date"]),
+            "finish_date": datetime.fromisoformat(dates[task.id]["leveled_finish_date"]),
+        }) if task.id in dates else task
+        for task in tasks
+    ]
+
+
+def check(tasks, label):
+    result = ResourceManager().level(tasks)
+    for shifted in result["shifted_tasks"]:
+        if shifted["leveled_finish_date"] < shifted["leveled_start_date"]:
+            print(f"{label}: {shifted['task_name']} ends before it starts: {shifted}")
+            sys.exit(1)
+    table = TaskTable.from_tasks(leveled(tasks, result))
+    left = resource_loading(table).overallocations(config.RESOURCE_DAILY_CAPACITY)
+    if left:
+        print(f"{label}: over-allocations left after leveling: {left}")
+        sys.exit(1)
+    return result
+
+
+# A weekend task of the resource busy Monday and Tuesday is delayed past
+# them, and must still start and end on the same business day
+print("Leveling a weekend-dated task...")
+weekend = [
+    Task(id="1", name="Friday", start_date=datetime(2024, 1, 5, 8), finish_date=datetime(2024, 1, 5, 17),
+         duration=8, percent_complete=0, resource_names=["A"]),
+    Task(id="2", name="Weekend", start_date=datetime(2024, 1, 6, 8), finish_date=datetime(2024, 1, 7, 17),
+         duration=8, percent_complete=0, resource_names=["A"]),
+    Task(id="3", name="Monday", start_date=datetime(2024, 1, 8, 8), finish_date=datetime(2024, 1, 9, 17),
+         duration=16, percent_complete=0, resource_names=["A"]),
+]
+result = check(weekend, "weekend")
+shifted = {s["task_id"]: s for s in result["shifted_tasks"]}
+if "2" not in shifted or shifted["2"]["leveled_start_date"][:10] != shifted["2"]["leveled_finish_date"][:10]:
+    print(f"Weekend task not leveled onto one business day: {result['shifted_tasks']}")
+    sys.exit(1)
+
+print(f"Leveling {TABLES} random tables of {TASKS_PER_TABLE} tasks...")
+rng = random.Random(0)
+for n in range(TABLES):
+    check([random_task(rng, i) for i in range(TASKS_PER_TABLE)], f"table {n}")
+
+print("Leveled schedules keep their tasks in order and within capacity")
@@ -0,0 +1,42 @@
+import sys
+import os
+import random
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.utils.matching import match_containment
+
+# Checks the Aho-Corasick containment matching against comparing every pair,
+# on random small-alphabet strings (so containment is frequent), duplicates
+# and empty strings included
+CASES = 3000
+
+
+def brute_force(left, right):
+    return ([any(l in r or r in l for r in right) for l in left],
+            [any(l in r or r in l for l in left) for r in right])
+
+
+def random_strings(rng: random.Random, alphabet: str, max_length: int):
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_length)))
+            for _ in range(rng.randint(0, 8))]
+
+
+print(f"Comparing containment matching on {CASES} random cases...")
+rng = random.Random(0)
+for n in range(CASES):
+    alphabet = rng.choice(["ab", "abc ", "aé b"])
+    left = random_strings(rng, alphabet, 6)
+    right = random_strings(rng, alphabet, 9)
+    if rng.random() < 0.2:
+        left.append("")
+    expected = brute_force(left, right)
+    result = match_containment(left, right)
+    if result != expected:
+        print(f"Mismatch in case {n}: left={left!r} right={right!r}")
+        print(f"  expected {expected}")
+        print(f"  got      {result}")
+        sys.exit(1)
+
+print("Containment matching agrees with the pairwise comparison")
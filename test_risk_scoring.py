@@ -0,0 +1,149 @@
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+
+# Add backend to path
+sys.path.append(os.path.join(os.getcwd(), 'backend'))
+
+from app.models import Task
+from app.utils.messages import Message
+from app.utils.risk_scoring import score_risks
+from app.utils.task_table import TaskTable
+
+# Checks the vectorized risk scoring against the per-task rules it replaced,
+# on random tables whose dates cluster around every day threshold
+NOW = datetime(2024, 6, 15, 12, 0, 0)
+TABLES = 300
+TASKS_PER_TABLE = 30
+LANGUAGES = ["en", "pt", "es"]
+
+
+def reference_risk_level(task: Task, now: datetime):
+    """The per-task scoring RiskAnalyst used before utils/risk_scoring.py."""
+    risk_score = 0
+    risk_factors = []
+
+    # Factor 1: Already delayed?
+    if task.finish_date and task.finish_date < now and task.percent_complete < 100:
+        days_delayed = (now - task.finish_date).days
+        if days_delayed > 30:
+            risk_score += 3
+            risk_factors.append(Message("risk.overdue", (days_delayed,)))
+        elif days_delayed > 7:
+            risk_score += 2
+            risk_factors.append(Message("risk.overdue", (days_delayed,)))
+        else:
+            risk_score += 1
+            risk_factors.append(Message("risk.recent_overdue", (days_delayed,)))
+
+    # Factor 2: Progress vs Time Elapsed
+    if task.start_date and task.finish_date and task.start_date <= now:
+        total_duration = (task.finish_date - task.start_date).total_seconds()
+        elapsed_duration = (now - task.start_date).total_seconds()
+        if total_duration > 0:
+            time_progress_ratio = min(elapsed_duration / total_duration, 1.0)
+            work_progress_ratio = task.percent_complete / 100.0
+            if time_progress_ratio > 0.1:
+                progress_gap = time_progress_ratio - work_progress_ratio
+                if progress_gap > 0.4:
+                    risk_score += 2
+                    risk_factors.append(Message("risk.behind_schedule",
+                                                (task.percent_complete, int(time_progress_ratio * 100))))
+                elif progress_gap > 0.2:
+                    risk_score += 1
+                    risk_factors.append(Message("risk.lagging"))
+
+    # Factor 3: Task duration
+    if task.duration > 60:
+        risk_score += 1
+        risk_factors.append(Message("risk.long_duration", (int(task.duration),)))
+
+    # Factor 4: No resources assigned
+    if not task.resource_names:
+        risk_score += 1
+        risk_factors.append(Message("risk.no_resources"))
+
+    # Factor 5: Not started but should have started
+    if task.start_date and task.start_date < now and task.percent_complete == 0:
+        days_behind_start = (now - task.start_date).days
+        if days_behind_start > 7:
+            risk_score += 2
+            risk_factors.append(Message("risk.should_start", (days_behind_start,)))
+        else:
+            risk_score += 1
+            risk_factors.append(Message("risk.start_passed"))
+
+    # Factor 6: Approaching deadline with low completion
+    if task.finish_date and task.finish_date > now:
+        days_remaining = (task.finish_date - now).days
+        if days_remaining <= 7 and task.percent_complete < 80:
+            risk_score += 2
+            risk_factors.append(Message("risk.approaching_deadline", (days_remaining, task.percent_complete)))
+        elif days_remaining <= 14 and task.percent_complete < 50:
+            risk_score += 1
+            risk_factors.append(Message("risk.approaching_low"))
+
+    if risk_score >= 6:
+        risk_level = 5
+    elif risk_score >= 4:
+        risk_level = 4
+    elif risk_score >= 2:
+        risk_level = 3
+    elif risk_score >= 1:
+        risk_level = 2
+    else:
+        risk_level = 1
+
+    if task.percent_complete >= 100:
+        risk_level = 1
+        risk_factors = [Message("risk.completed")]
+
+    if risk_level <= 2 and task.percent_complete > 0:
+        if task.finish_date and task.finish_date > now:
+            if (task.finish_date - now).days > 30:
+                risk_factors.append(Message("risk.ample_time"))
+        if task.percent_complete >= 50:
+            risk_factors.append(Message("risk.good_progress"))
+
+    return risk_level, risk_factors
+
+
+def random_date(rng: random.Random):
+    if rng.random() < 0.05:
+        return None
+    days = rng.choice([-40, -31, -30, -29, -8, -7, -6, -1, 0, 1, 6, 7, 8, 13, 14, 15, 29, 30, 31, 45])
+    seconds = rng.choice([0, -1, 1, rng.randint(-86400, 86400)])
+    return NOW + timedelta(days=days, seconds=seconds)
+
+
+def random_task(rng: random.Random, i: int) -> Task:
+    return Task(
+        id=str(i),
+        name=f"Task {i}",
+        start_date=random_date(rng),
+        finish_date=random_date(rng),
+        duration=rng.choice([0, 8, 60, 60.5, 61, 120, rng.uniform(0, 200)]),
+        percent_complete=rng.choice([0, 0, 10, 20, 49, 50, 79, 80, 99, 100, rng.randint(0, 100)]),
+        resource_names=rng.choice([[], ["A"], ["A", "B"]]),
+    )
+
+
+print(f"Comparing risk scores on {TABLES} random tables of {TASKS_PER_TABLE} tasks...")
+rng = random.Random(0)
+for n in range(TABLES):
+    tasks = [random_task(rng, i) for i in range(TASKS_PER_TABLE)]
+    scores = score_risks(TaskTable.from_tasks(tasks), NOW)
+    expected = [reference_risk_level(task, NOW) for task in tasks]
+    levels = scores.level.tolist()
+    for language in LANGUAGES:
+        factors = scores.render_factors(language)
+        for i, (level, messages) in enumerate(expected):
+            rendered = [message.render(language) for message in messages]
+            if levels[i] != level or factors[i] != rendered:
+                print(f"Mismatch in table {n}, task {i} ({language}): {tasks[i]}")
+                print(f"  expected {level} {rendered}")
+                print(f"  got      {levels[i]} {factors[i]}")
+                sys.exit(1)
+
+print("Risk scores match the per-task rules")